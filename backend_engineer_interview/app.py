@@ -1,25 +1,131 @@
+import importlib
 import logging
 import os
 import time
-from typing import List
+from dataclasses import dataclass
+from typing import Any, List, Optional, Union
 import connexion  # type: ignore
 import connexion.mock  # type: ignore
+from connexion.middleware import MiddlewarePosition  # type: ignore
 import flask
 from flask import g
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import Connection, Engine, create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from backend_engineer_interview.cache import TTLCache
+from backend_engineer_interview.compression import CompressionConfig, CompressionMiddleware
+from backend_engineer_interview.handlers import CachedEmployee
+from backend_engineer_interview.metrics import (
+    MetricsMiddleware,
+    RequestMetrics,
+    RequestStats,
+    instrument_engine,
+    request_stats,
+)
+from backend_engineer_interview.spec import load_spec
+from backend_engineer_interview.validators import ResponseValidation, response_validator_map
 
 logger = logging.getLogger(__name__)
 
 
-def init_db(db_name):
+@dataclass(frozen=True)
+class EngineConfig:
+    """
+    Connection pool and SQLite settings for the app's engine.  The defaults suit a multi-threaded
+    server: WAL journaling lets readers proceed while a write transaction is open, and
+    `busy_timeout` makes writers wait for each other instead of failing immediately.
+    """
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # Negative values are in KiB, so this is a 64MiB page cache per connection.
+    cache_size: int = -64000
+    mmap_size: int = 256 * 1024 * 1024
+    busy_timeout_ms: int = 5000
+    # Statements taking longer are logged with their query plan; None disables the log.
+    slow_query_threshold_ms: Optional[float] = 100.0
+    # Strict mode for tests: fail requests issuing the same statement more often than this.
+    max_statement_repeats: Optional[int] = None
+
+    def pragmas(self) -> dict[str, Union[str, int]]:
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "busy_timeout": self.busy_timeout_ms,
+        }
+
+
+def configure_sqlite_engine(engine: Engine, engine_config: EngineConfig) -> None:
+    """Apply the config's PRAGMAs to new connections and take over transaction control."""
+
+    @event.listens_for(engine, "connect")
+    def configure_connection(dbapi_connection, connection_record):  # type: ignore
+        # Leave transaction control to SQLAlchemy (see the "begin" hook) rather than pysqlite,
+        # which would otherwise start transactions implicitly and break SAVEPOINTs.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in engine_config.pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def begin_transaction(connection):  # type: ignore
+        # Write paths ask for IMMEDIATE (see handlers.begin_write) to take the write lock up front.
+        mode = connection.get_execution_options().get("sqlite_begin", "DEFERRED")
+        if mode not in ("DEFERRED", "IMMEDIATE", "EXCLUSIVE"):
+            raise ValueError(f"Unknown SQLite transaction mode {mode}")
+        connection.exec_driver_sql(f"BEGIN {mode}")
+
+
+def init_db(
+    db: Union[str, Engine, Connection] = "app", engine_config: Optional[EngineConfig] = None
+) -> scoped_session:
+    """
+    Sessions for the app's database: a database name, for which a pooled engine is created, or an
+    existing engine or connection.  An existing engine is used as it is, so should have been set
+    up with `configure_sqlite_engine` for the handlers' transaction modes.
+
+    Sessions bound to a connection join its transaction, committing to SAVEPOINTs, so whoever
+    holds the connection decides whether their work is kept; tests roll it back.
+    """
+    if isinstance(db, Connection):
+        return scoped_session(
+            sessionmaker(bind=db, expire_on_commit=False, join_transaction_mode="create_savepoint")
+        )
+
+    engine = db if isinstance(db, Engine) else create_sqlite_engine(db, engine_config)
+    # Handlers commit their own writes; objects stay usable for serializing after the commit.
+    return scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+
+
+def create_sqlite_engine(db_name: str, engine_config: Optional[EngineConfig] = None) -> Engine:
+    """A pooled engine for ``{db_name}.db``, configured and instrumented for the app."""
+    engine_config = engine_config or EngineConfig()
     engine = create_engine(
-        f"sqlite:///{db_name}.db", execution_options={"isolation_level": "AUTOCOMMIT"}
+        f"sqlite:///{db_name}.db",
+        poolclass=QueuePool,
+        pool_size=engine_config.pool_size,
+        max_overflow=engine_config.max_overflow,
+        pool_timeout=engine_config.pool_timeout,
     )
-    session_factory = scoped_session(sessionmaker(bind=engine))
+    configure_sqlite_engine(engine, engine_config)
+    instrument_engine(
+        engine, engine_config.slow_query_threshold_ms, engine_config.max_statement_repeats
+    )
+    return engine
+
 
-    engine.dispose()
-    return session_factory
+def request_stats_extra(stats: Optional[RequestStats]) -> dict:
+    """Access log fields for the database work done by a request."""
+    if stats is None:
+        return {}
+    return {"statement_count": stats.statements, "db_time_ms": 1000 * stats.db_time}
 
 
 def openapi_filenames() -> List[str]:
@@ -30,20 +136,83 @@ def get_project_root_dir() -> str:
     return os.path.join(os.path.dirname(__file__), "../")
 
 
-def create_app(db_name: str = "app") -> connexion.FlaskApp:
+def openapi_spec_path() -> str:
+    return os.path.normpath(os.path.join(os.path.dirname(__file__), openapi_filenames()[0]))
+
+
+def openapi_spec() -> dict:
+    """The parsed OpenAPI spec, from the cache `load_spec` keeps while the file is unchanged."""
+    return load_spec(openapi_spec_path())
+
+
+def response_validation_options(response_validation: Optional[ResponseValidation]) -> dict:
+    """`add_api` options for a response validation policy; full validation by default."""
+    response_validation = response_validation or ResponseValidation()
+    return {
+        "validate_responses": response_validation.mode != "off",
+        "validator_map": response_validator_map(response_validation),
+    }
+
+
+def add_compression_middleware(
+    app: connexion.AbstractApp, compression: Optional[CompressionConfig] = None
+) -> None:
+    """
+    Compress the app's responses, outside every other middleware so that validation and metrics
+    see uncompressed bodies.
+    """
+    compression = compression or CompressionConfig()
+    # Compressed bodies of responses with an ETag, by path, ETag and encoding.
+    variants: TTLCache[tuple[str, str, str], bytes] = TTLCache(
+        compression.variant_cache_size, compression.variant_cache_ttl
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        position=MiddlewarePosition.BEFORE_EXCEPTION,
+        config=compression,
+        variants=variants,
+    )
+
+
+def create_app(
+    db_name: Union[str, Engine, Connection] = "app",
+    count_cache_size: int = 1024,
+    count_cache_ttl: float = 60.0,
+    employee_cache_enabled: bool = True,
+    employee_cache_size: int = 4096,
+    employee_cache_ttl: float = 300.0,
+    engine_config: Optional[EngineConfig] = None,
+    response_validation: Optional[ResponseValidation] = None,
+    compression: Optional[CompressionConfig] = None,
+) -> connexion.FlaskApp:
     logger.info("Starting API")
 
-    db_session_factory = init_db(db_name)
+    db_session_factory = init_db(db_name, engine_config)
+
+    # Totals for application searches, keyed by normalized search term.  Writes through this app
+    # invalidate affected entries; the TTL bounds staleness from writes made elsewhere.
+    count_cache: TTLCache[str, int] = TTLCache(count_cache_size, count_cache_ttl)
+
+    # Serialized employee payloads and their ETags, keyed by id; invalidated by employee patches.
+    employee_cache: Optional[TTLCache[int, CachedEmployee]] = (
+        TTLCache(employee_cache_size, employee_cache_ttl) if employee_cache_enabled else None
+    )
+
+    metrics = RequestMetrics()
 
     # Enable mock responses for unimplemented paths.
     resolver = connexion.mock.MockResolver(mock_all=False)
 
     app = connexion.FlaskApp(__name__)
     app.add_api(
-        openapi_filenames()[0],
+        openapi_spec(),
         resolver=resolver,
         strict_validation=True,
-        validate_responses=True,
+        **response_validation_options(response_validation),
+    )
+    add_compression_middleware(app, compression)
+    app.add_middleware(
+        MetricsMiddleware, position=MiddlewarePosition.BEFORE_SECURITY, metrics=metrics
     )
 
     flask_app = app.app
@@ -53,7 +222,11 @@ def create_app(db_name: str = "app") -> connexion.FlaskApp:
     @flask_app.before_request
     def push_db():
         g.db = db_session_factory
+        g.count_cache = count_cache
+        g.employee_cache = employee_cache
+        g.metrics = metrics
         g.start_time = time.monotonic()
+        g.request_stats = request_stats.get()
         g.connexion_flask_app = app
 
     @flask_app.teardown_request
@@ -82,8 +255,26 @@ def create_app(db_name: str = "app") -> connexion.FlaskApp:
                 "response_type": response.content_type,
                 "status_code": response.status_code,
                 "response_time_ms": response_time_ms,
+                **request_stats_extra(g.get("request_stats")),
             },
         )
         return response
 
     return app
+
+
+# The async app lives in `async_app`, imported on first use so the sync app doesn't pay for the
+# asyncio stack; these names stay importable from here, as in `app:create_async_app --factory`.
+_ASYNC_APP_NAMES = {
+    "AsyncAppStateMiddleware",
+    "AsyncHandlerResolver",
+    "create_async_app",
+    "create_async_sqlite_engine",
+    "init_async_db",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _ASYNC_APP_NAMES:
+        return getattr(importlib.import_module("backend_engineer_interview.async_app"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,184 @@
+"""
+The API served by connexion's AsyncApp, with the handlers in `async_handlers` over aiosqlite.
+Kept apart from `app` so the sync app doesn't import the asyncio stack it never uses.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Callable, MutableMapping, Optional, Union
+
+import connexion  # type: ignore
+import connexion.mock  # type: ignore
+from connexion.jsonifier import Jsonifier  # type: ignore
+from connexion.middleware import MiddlewarePosition  # type: ignore
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend_engineer_interview import async_handlers
+from backend_engineer_interview.app import (
+    EngineConfig,
+    add_compression_middleware,
+    configure_sqlite_engine,
+    openapi_spec,
+    request_stats_extra,
+    response_validation_options,
+)
+from backend_engineer_interview.cache import TTLCache
+from backend_engineer_interview.compression import CompressionConfig
+from backend_engineer_interview.metrics import (
+    MetricsMiddleware,
+    RequestMetrics,
+    RequestStats,
+    instrument_engine,
+    request_stats,
+)
+from backend_engineer_interview.validators import ResponseValidation
+
+# Access logs go to the same logger in both modes.
+logger = logging.getLogger("backend_engineer_interview.app")
+
+
+def init_async_db(
+    db: Union[str, AsyncEngine, AsyncConnection] = "app",
+    engine_config: Optional[EngineConfig] = None,
+) -> async_sessionmaker[AsyncSession]:
+    """`init_db` for the async app, with aiosqlite engines and connections."""
+    if isinstance(db, AsyncConnection):
+        return async_sessionmaker(
+            bind=db, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+
+    engine = db if isinstance(db, AsyncEngine) else create_async_sqlite_engine(db, engine_config)
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def create_async_sqlite_engine(
+    db_name: str, engine_config: Optional[EngineConfig] = None
+) -> AsyncEngine:
+    """A pooled aiosqlite engine for ``{db_name}.db``, configured and instrumented for the app."""
+    engine_config = engine_config or EngineConfig()
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_name}.db",
+        pool_size=engine_config.pool_size,
+        max_overflow=engine_config.max_overflow,
+        pool_timeout=engine_config.pool_timeout,
+    )
+    # The aiosqlite adapter exposes the same DBAPI surface, so the sync engine's hooks apply.
+    configure_sqlite_engine(engine.sync_engine, engine_config)
+    instrument_engine(
+        engine.sync_engine,
+        engine_config.slow_query_threshold_ms,
+        engine_config.max_statement_repeats,
+    )
+    return engine
+
+
+class AsyncHandlerResolver(connexion.mock.MockResolver):
+    """
+    Resolves operationIds naming `handlers` functions to their `async_handlers` versions, or to
+    `async_handlers.not_implemented` for those without one.
+    """
+
+    def resolve_function_from_operation_id(self, operation_id: str) -> Callable:
+        module, _, name = operation_id.rpartition(".")
+        if module == "backend_engineer_interview.handlers":
+            return getattr(async_handlers, name, async_handlers.not_implemented)
+        return super().resolve_function_from_operation_id(operation_id)
+
+
+class AsyncAppStateMiddleware:
+    """Sets `async_handlers.app_state` for each request and writes the access log."""
+
+    def __init__(self, app: ASGIApp, state: async_handlers.AsyncAppState) -> None:
+        self.app = app
+        self.state = state
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = async_handlers.app_state.set(self.state)
+        stats = RequestStats()
+        stats_token = request_stats.set(stats)
+        start_time = time.monotonic()
+        response_start: dict = {}
+
+        async def send_(message: MutableMapping[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                response_start.update(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_)
+        finally:
+            async_handlers.app_state.reset(token)
+            request_stats.reset(stats_token)
+            status_code = response_start.get("status")
+            path = scope["path"]
+            if scope.get("query_string"):
+                path += "?" + scope["query_string"].decode("latin-1")
+            logger.info(
+                "%s %s %s",
+                status_code,
+                scope["method"],
+                path,
+                extra={
+                    "remote_addr": scope["client"][0] if scope.get("client") else None,
+                    "status_code": status_code,
+                    "response_time_ms": 1000 * (time.monotonic() - start_time),
+                    **request_stats_extra(stats),
+                },
+            )
+
+
+def create_async_app(
+    db_name: Union[str, AsyncEngine, AsyncConnection] = "app",
+    count_cache_size: int = 1024,
+    count_cache_ttl: float = 60.0,
+    employee_cache_enabled: bool = True,
+    employee_cache_size: int = 4096,
+    employee_cache_ttl: float = 300.0,
+    engine_config: Optional[EngineConfig] = None,
+    response_validation: Optional[ResponseValidation] = None,
+    compression: Optional[CompressionConfig] = None,
+) -> connexion.AsyncApp:
+    """
+    The same API as `create_app`, served by connexion's AsyncApp with the handlers in
+    `async_handlers` over aiosqlite.  Operations without an async handler answer 501.
+    """
+    logger.info("Starting async API")
+
+    state = async_handlers.AsyncAppState(
+        session_factory=init_async_db(db_name, engine_config),
+        count_cache=TTLCache(count_cache_size, count_cache_ttl),
+        employee_cache=(
+            TTLCache(employee_cache_size, employee_cache_ttl) if employee_cache_enabled else None
+        ),
+        metrics=RequestMetrics(),
+    )
+
+    # Encode JSON bodies like the Flask app does, so both modes respond with identical bytes.
+    app = connexion.AsyncApp(__name__, jsonifier=Jsonifier(json, indent=2, sort_keys=True))
+    app.add_api(
+        openapi_spec(),
+        resolver=AsyncHandlerResolver(mock_all=False),
+        strict_validation=True,
+        **response_validation_options(response_validation),
+    )
+    app.add_middleware(
+        AsyncAppStateMiddleware, position=MiddlewarePosition.BEFORE_EXCEPTION, state=state
+    )
+    add_compression_middleware(app, compression)
+    app.add_middleware(
+        MetricsMiddleware, position=MiddlewarePosition.BEFORE_SECURITY, metrics=state.metrics
+    )
+
+    return app
@@ -0,0 +1,261 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, NamedTuple, Optional
+
+import connexion  # type: ignore
+from connexion.lifecycle import ConnexionResponse  # type: ignore
+import pydantic
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend_engineer_interview.cache import TTLCache
+from backend_engineer_interview.handlers import (
+    ApplicationRequest,
+    application_response,
+    CachedEmployee,
+    PatchEmployeeRequest,
+    application_request_error,
+    cache_employee,
+    conflict_message,
+    conflicting_application_statement,
+    conditional_employee_response,
+    patch_employee_error,
+    search_response,
+)
+from backend_engineer_interview.leave_usage import (
+    MonthUsagePage,
+    add_usage,
+    employee_summary,
+    employee_summary_statement,
+    usage_rows,
+)
+from backend_engineer_interview.metrics import RequestMetrics
+from backend_engineer_interview.models import Application, Employee, employee_public_columns
+from backend_engineer_interview.search import (
+    ApplicationSearch,
+    InvalidSearch,
+    OverlappingApplicationSearch,
+    invalidate_search_counts_for_applications,
+    invalidate_search_counts_for_rename,
+)
+
+
+class AsyncAppState(NamedTuple):
+    session_factory: async_sessionmaker[AsyncSession]
+    count_cache: TTLCache[str, int]
+    employee_cache: Optional[TTLCache[int, CachedEmployee]]
+    metrics: RequestMetrics
+
+
+# Set for the duration of each request by the async app's middleware; the async counterpart of
+# what the sync app pushes into flask's `g`.
+app_state: ContextVar[AsyncAppState] = ContextVar("app_state")
+
+
+@asynccontextmanager
+async def db_session() -> AsyncIterator[AsyncSession]:
+    """Get an AsyncSession, closed when the block exits."""
+    state = app_state.get(None)
+    if state is None:
+        raise Exception("No database session available in application context")
+
+    async with state.session_factory() as session:
+        yield session
+
+
+async def begin_write(session: AsyncSession) -> None:
+    """See `handlers.begin_write`."""
+    await session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+
+
+def get_count_cache() -> Optional[TTLCache[str, int]]:
+    state = app_state.get(None)
+    return state.count_cache if state is not None else None
+
+
+def get_employee_cache() -> Optional[TTLCache[int, CachedEmployee]]:
+    state = app_state.get(None)
+    return state.employee_cache if state is not None else None
+
+
+async def not_implemented(**kwargs: Any) -> tuple[dict, int, dict]:
+    """Stands in for handlers that have no async version."""
+    return ({"message": "Not implemented in async mode"}, 501, {})
+
+
+async def status() -> tuple[dict, int, dict]:
+    async with db_session() as session:
+        (await session.execute(text("SELECT 1;"))).one()
+
+        response: dict = {"status": "up"}
+        count_cache = get_count_cache()
+        if count_cache is not None:
+            response["count_cache"] = count_cache.stats()
+        return (response, 200, {})
+
+
+async def metrics() -> tuple[str, int, dict]:
+    state = app_state.get(None)
+    return (state.metrics.render() if state is not None else "", 200, {})
+
+
+async def get_employee(id: int) -> tuple[Optional[dict], int, dict] | ConnexionResponse:
+    employee_cache = get_employee_cache()
+    cached = employee_cache.get(id) if employee_cache is not None else None
+
+    if cached is None:
+        generation = employee_cache.generation if employee_cache is not None else None
+        async with db_session() as session:
+            employee = (
+                await session.execute(
+                    select(Employee)
+                    .options(load_only(*employee_public_columns))
+                    .where(Employee.id == id)
+                )
+            ).scalar_one_or_none()
+
+            if not employee:
+                return ({"message": "No such employee"}, 404, {})
+
+            cached = cache_employee(employee)
+            if employee_cache is not None:
+                employee_cache.set(id, cached, generation=generation)
+
+    return conditional_employee_response(cached, connexion.request.headers.get("If-None-Match"))
+
+
+async def patch_employee(id: int, body: dict) -> tuple[Optional[dict], int, dict]:
+    async with db_session() as session:
+        await begin_write(session)
+        employee: Optional[Employee] = (
+            await session.execute(select(Employee).where(Employee.id == id))
+        ).scalar_one_or_none()
+        if not employee:
+            return ({"message": "No such employee"}, 404, {})
+
+        try:
+            request_body = PatchEmployeeRequest.model_validate(body)
+        except pydantic.ValidationError:
+            return ({"message": patch_employee_error(body)}, 400, {})
+
+        previous_names = (employee.first_name, employee.last_name)
+        if request_body.first_name is not None:
+            employee.first_name = request_body.first_name
+
+        if request_body.last_name is not None:
+            employee.last_name = request_body.last_name
+
+        await session.commit()
+
+        employee_cache = get_employee_cache()
+        if employee_cache is not None:
+            employee_cache.invalidate(id)
+
+        if previous_names != (employee.first_name, employee.last_name):
+            invalidate_search_counts_for_rename(
+                get_count_cache(), previous_names + (employee.first_name, employee.last_name)
+            )
+
+        return (None, 204, {})
+
+
+async def post_application(body: dict) -> tuple[dict, int, dict] | ConnexionResponse:
+    async with db_session() as session:
+        try:
+            request_body = ApplicationRequest.model_validate(body)
+        except pydantic.ValidationError as e:
+            return ({"message": application_request_error(body, e)}, 400, {})
+
+        await begin_write(session)
+        employee: Optional[Employee] = (
+            await session.execute(
+                select(Employee)
+                .options(load_only(*employee_public_columns))
+                .where(Employee.id == request_body.employee_id)
+            )
+        ).scalar_one_or_none()
+
+        if not employee:
+            return ({"message": "No such employee"}, 404, {})
+
+        conflict = (
+            await session.execute(
+                conflicting_application_statement(
+                    request_body.employee_id,
+                    request_body.leave_start_date,
+                    request_body.leave_end_date,
+                )
+            )
+        ).scalar_one_or_none()
+        if conflict is not None:
+            return ({"message": conflict_message(conflict)}, 409, {})
+
+        application = Application(
+            leave_start_date=request_body.leave_start_date,
+            leave_end_date=request_body.leave_end_date,
+            employee_id=request_body.employee_id,
+        )
+
+        session.add(application)
+        await session.execute(
+            add_usage,
+            usage_rows([(employee.id, request_body.leave_start_date, request_body.leave_end_date)]),
+        )
+        await session.commit()
+        # The relationship can't be lazy loaded under asyncio; attach the employee loaded above.
+        set_committed_value(application, "employee", employee)
+        invalidate_search_counts_for_applications(
+            get_count_cache(), {employee.id: (employee.first_name, employee.last_name)}
+        )
+
+        return application_response(application)
+
+
+async def get_leave_summary(id: int) -> tuple[dict, int, dict]:
+    async with db_session() as session:
+        rows = (await session.execute(employee_summary_statement(id))).all()
+        if not rows:
+            return ({"message": "No such employee"}, 404, {})
+
+        return (employee_summary(id, rows), 200, {})
+
+
+async def get_leave_usage(month: str, after: int = 0, limit: int = 1000) -> tuple[dict, int, dict]:
+    if limit < 1:
+        return ({"message": "limit must be positive"}, 400, {})
+
+    page = MonthUsagePage(month, after, limit)
+    async with db_session() as session:
+        rows = (await session.execute(page.page_statement())).all()
+        totals = (await session.execute(page.totals_statement())).one()
+        return (page.response(rows, totals), 200, {})
+
+
+async def search_application() -> tuple[dict, int, dict] | ConnexionResponse:
+    try:
+        application_search = ApplicationSearch(connexion.request.query_params, get_count_cache())
+    except InvalidSearch as e:
+        return ({"message": str(e)}, 400, {})
+
+    return await run_search(application_search)
+
+
+async def search_overlapping_applications() -> tuple[dict, int, dict] | ConnexionResponse:
+    try:
+        application_search = OverlappingApplicationSearch(connexion.request.query_params)
+    except InvalidSearch as e:
+        return ({"message": str(e)}, 400, {})
+
+    return await run_search(application_search)
+
+
+async def run_search(application_search: ApplicationSearch) -> ConnexionResponse:
+    async with db_session() as session:
+        rows = (await session.execute(application_search.page_statement())).all()
+        fallback_count: Optional[int] = None
+        if application_search.needs_count_statement(rows):
+            fallback_count = (await session.execute(application_search.count_statement())).scalar()
+
+        return search_response(application_search.page(rows, fallback_count))
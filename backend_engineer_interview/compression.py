@@ -0,0 +1,339 @@
+"""
+Response compression for both apps, as ASGI middleware around connexion's stack, so handlers and
+response validation see uncompressed bodies.  Each response is compressed in the encoding the
+request's Accept-Encoding prefers among those available: gzip always, and zstd and brotli when
+the `zstandard` and `brotli` packages are installed.
+
+Bodies whose length is known are compressed whole.  Responses with an ETag are the same bytes
+for as long as the ETag is, so their compressed variants are cached by it and served again
+without recompressing.  Streamed bodies (the NDJSON export) are compressed as they are sent,
+each chunk flushed so the client can decode every row as it arrives.
+"""
+
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, MutableMapping, NamedTuple, Optional, Protocol, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend_engineer_interview.cache import TTLCache
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # Optional: brotli is offered only when installed.
+    brotli = None
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # Optional: zstd is offered only when installed.
+    zstandard = None
+
+
+@dataclass(frozen=True)
+class CompressionConfig:
+    """
+    Which responses are compressed, and how hard.  Levels trade CPU for size per encoding
+    (`python -m benchmarks.compression` measures both); the defaults are the usual choices for
+    compressing responses on the fly.
+    """
+
+    enabled: bool = True
+    # Smaller bodies are sent as they are: their compressed size barely differs, if at all.
+    minimum_size: int = 512
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    zstd_level: int = 3
+    # Preferred first among those a request accepts equally.
+    encodings: tuple[str, ...] = ("zstd", "br", "gzip")
+    # Compressed variants of responses with an ETag, keyed by path, ETag and encoding.
+    variant_cache_size: int = 1024
+    variant_cache_ttl: float = 300.0
+
+    def __post_init__(self) -> None:
+        unknown = [
+            encoding for encoding in self.encodings if encoding not in ("zstd", "br", "gzip")
+        ]
+        if unknown:
+            raise ValueError(f"Unknown encodings {unknown}")
+        if self.minimum_size < 0:
+            raise ValueError("minimum_size must not be negative")
+
+    def level(self, encoding: str) -> int:
+        return {"gzip": self.gzip_level, "br": self.brotli_quality, "zstd": self.zstd_level}[
+            encoding
+        ]
+
+
+class StreamCompressor(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        """Compress ``data`` and flush, so the output so far decodes to all input so far."""
+
+    def finish(self) -> bytes:
+        """Compress any remaining input and end the stream."""
+
+
+class Codec(NamedTuple):
+    compress: Callable[[bytes, int], bytes]
+    stream: Callable[[int], StreamCompressor]
+
+
+class _GzipStream:
+    def __init__(self, level: int) -> None:
+        # wbits 31: a deflate stream with the gzip header and trailer.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# The encodings this process can produce, by Accept-Encoding token.
+CODECS: dict[str, Codec] = {
+    "gzip": Codec(lambda data, level: zlib.compress(data, level, wbits=31), _GzipStream),
+}
+if brotli is not None:
+    CODECS["br"] = Codec(lambda data, level: brotli.compress(data, quality=level), _BrotliStream)
+if zstandard is not None:
+    CODECS["zstd"] = Codec(
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _ZstdStream
+    )
+
+# Media types worth compressing, besides text/* and +json/+xml types.
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+}
+
+
+def choose_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    The encoding of ``encodings`` that ``accept_encoding`` gives the highest q-value, the earliest
+    in ``encodings`` among equals, or None if it accepts none of them.
+    """
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, *params = (part.strip() for part in item.split(";"))
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token.lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best: Optional[str] = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def _weak_etag(etag: str) -> str:
+    # A compressed variant isn't byte-for-byte the representation the strong ETag names; as a
+    # weak ETag it still answers If-None-Match, which compares weakly.
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Compresses responses as negotiated with each request's Accept-Encoding."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: CompressionConfig,
+        variants: Optional[TTLCache[tuple[str, str, str], bytes]] = None,
+    ) -> None:
+        self.app = app
+        self.config = config
+        self.encodings = [encoding for encoding in config.encodings if encoding in CODECS]
+        self.variants = variants
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        response = _CompressedResponse(self, scope, encoding, send)
+        await self.app(scope, receive, response.send)
+
+
+class _CompressedResponse:
+    """The state of compressing one response, fed the inner app's messages in order."""
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        encoding: Optional[str],
+        send: Send,
+    ) -> None:
+        self.config = middleware.config
+        self.variants = middleware.variants
+        self.path: str = scope["path"]
+        self.cacheable = scope["method"] == "GET"
+        self.encoding = encoding
+        self.downstream = send
+
+        self.start: Optional[MutableMapping[str, Any]] = None
+        self.headers: Optional[MutableHeaders] = None
+        # Passing messages through unchanged, or compressing them as a stream.
+        self.passthrough = False
+        self.stream: Optional[StreamCompressor] = None
+        self.content_length: Optional[int] = None
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+
+    async def send(self, message: MutableMapping[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            await self._start(message)
+        elif message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+        else:
+            await self._body(message.get("body", b""), message.get("more_body", False))
+
+    async def _start(self, message: MutableMapping[str, Any]) -> None:
+        headers = MutableHeaders(scope=message)
+        status = message["status"]
+        if (
+            status < 200
+            or status in (204, 304)
+            or "content-encoding" in headers
+            or "no-transform" in headers.get("cache-control", "")
+            or not compressible(headers.get("content-type"))
+        ):
+            self.passthrough = True
+            await self.downstream(message)
+            return
+
+        # The body varies with Accept-Encoding whether or not this one is compressed.
+        vary = headers.get("vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+
+        content_length = headers.get("content-length")
+        self.content_length = int(content_length) if content_length is not None else None
+        if self.encoding is None or (
+            self.content_length is not None and self.content_length < self.config.minimum_size
+        ):
+            self.passthrough = True
+            await self.downstream(message)
+            return
+
+        # Held until enough of the body has been seen to decide how to send it.
+        self.start = message
+        self.headers = headers
+
+    async def _body(self, body: bytes, more_body: bool) -> None:
+        if self.stream is not None:
+            chunk = self.stream.compress(body) if body else b""
+            if not more_body:
+                chunk += self.stream.finish()
+            if chunk or not more_body:
+                await self.downstream(
+                    {"type": "http.response.body", "body": chunk, "more_body": more_body}
+                )
+            return
+
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if more_body and (
+            self.content_length is not None or self.buffered < self.config.minimum_size
+        ):
+            return
+
+        data = b"".join(self.buffer)
+        self.buffer = []
+        if not more_body:
+            await self._send_whole(data)
+            return
+
+        # A streamed body at least the minimum size so far: compressed as it comes.
+        assert self.start is not None and self.headers is not None and self.encoding is not None
+        self._compressed_headers()
+        del self.headers["content-length"]
+        await self.downstream(self.start)
+        self.stream = CODECS[self.encoding].stream(self.config.level(self.encoding))
+        await self.downstream(
+            {"type": "http.response.body", "body": self.stream.compress(data), "more_body": True}
+        )
+
+    async def _send_whole(self, data: bytes) -> None:
+        assert self.start is not None and self.headers is not None and self.encoding is not None
+        compressed: Optional[bytes] = None
+        if len(data) >= self.config.minimum_size:
+            etag = self.headers.get("etag")
+            key = (self.path, etag, self.encoding) if etag and self.cacheable else None
+            if key is not None and self.variants is not None:
+                compressed = self.variants.get(key)
+            if compressed is None:
+                compressed = CODECS[self.encoding].compress(data, self.config.level(self.encoding))
+                if key is not None and self.variants is not None:
+                    self.variants.set(key, compressed)
+
+        # Sent as it is if it's small, or compresses to no smaller.
+        if compressed is None or len(compressed) >= len(data):
+            await self.downstream(self.start)
+            await self.downstream({"type": "http.response.body", "body": data})
+            return
+
+        self._compressed_headers()
+        self.headers["Content-Length"] = str(len(compressed))
+        await self.downstream(self.start)
+        await self.downstream({"type": "http.response.body", "body": compressed})
+
+    def _compressed_headers(self) -> None:
+        assert self.headers is not None and self.encoding is not None
+        self.headers["Content-Encoding"] = self.encoding
+        etag = self.headers.get("etag")
+        if etag:
+            self.headers["ETag"] = _weak_etag(etag)
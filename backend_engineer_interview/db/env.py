@@ -12,9 +12,10 @@ from backend_engineer_interview.models import Base
 config = context.config
 
 # Interpret the config file for Python logging.
-# This line sets up loggers basically.
+# This line sets up loggers basically.  Loggers created before migrating (e.g. the app's, when
+# migrations are run programmatically) are left enabled.
 if config.config_file_name:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -22,6 +23,17 @@ if config.config_file_name:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata  # type: ignore
 
+# Virtual tables (and their shadow tables) are managed by hand-written migrations and must be
+# ignored by autogenerate.
+virtual_table_prefixes = ("employee_name_fts", "application_period")
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table" and name is not None and name.startswith(virtual_table_prefixes):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +56,7 @@ def run_migrations_offline():
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -66,7 +79,9 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection, target_metadata=target_metadata, include_name=include_name
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,57 @@
+"""Add trigram full-text index over employee names
+
+Revision ID: 3f9a1c2e7b44
+Revises: cafac01f835d
+Create Date: 2026-10-18 09:12:31.402118
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f9a1c2e7b44"
+down_revision = "cafac01f835d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # External-content FTS5 table: the index stores trigrams only, the names themselves stay
+    # in `employee`.  Triggers keep it in sync with every write to the employee table.
+    op.execute("""
+        CREATE VIRTUAL TABLE employee_name_fts USING fts5(
+            first_name,
+            last_name,
+            content='employee',
+            content_rowid='id',
+            tokenize='trigram'
+        )
+        """)
+    op.execute("""
+        CREATE TRIGGER employee_name_fts_ai AFTER INSERT ON employee BEGIN
+            INSERT INTO employee_name_fts(rowid, first_name, last_name)
+            VALUES (new.id, new.first_name, new.last_name);
+        END
+        """)
+    op.execute("""
+        CREATE TRIGGER employee_name_fts_ad AFTER DELETE ON employee BEGIN
+            INSERT INTO employee_name_fts(employee_name_fts, rowid, first_name, last_name)
+            VALUES ('delete', old.id, old.first_name, old.last_name);
+        END
+        """)
+    op.execute("""
+        CREATE TRIGGER employee_name_fts_au AFTER UPDATE OF first_name, last_name ON employee BEGIN
+            INSERT INTO employee_name_fts(employee_name_fts, rowid, first_name, last_name)
+            VALUES ('delete', old.id, old.first_name, old.last_name);
+            INSERT INTO employee_name_fts(rowid, first_name, last_name)
+            VALUES (new.id, new.first_name, new.last_name);
+        END
+        """)
+    op.execute("INSERT INTO employee_name_fts(employee_name_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER employee_name_fts_au")
+    op.execute("DROP TRIGGER employee_name_fts_ad")
+    op.execute("DROP TRIGGER employee_name_fts_ai")
+    op.execute("DROP TABLE employee_name_fts")
@@ -0,0 +1,65 @@
+"""Add R*Tree index over application leave periods
+
+Revision ID: 5e1b7c3d9f20
+Revises: 8c2d5e7a9b13
+Create Date: 2026-10-18 22:05:43.190624
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e1b7c3d9f20"
+down_revision = "8c2d5e7a9b13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One-dimensional boxes from each application's first to last day of leave, as whole Julian
+    # day numbers.  Triggers keep it in sync with every write to the application table.  A
+    # period entered back to front covers no days, so has no box (which would be rejected).
+    op.execute("CREATE VIRTUAL TABLE application_period USING rtree_i32(id, start_day, end_day)")
+    op.execute("""
+        CREATE TRIGGER application_period_ai AFTER INSERT ON application
+        WHEN new.leave_start_date <= new.leave_end_date BEGIN
+            INSERT INTO application_period VALUES (
+                new.id,
+                CAST(julianday(new.leave_start_date) AS INTEGER),
+                CAST(julianday(new.leave_end_date) AS INTEGER)
+            );
+        END
+        """)
+    op.execute("""
+        CREATE TRIGGER application_period_ad AFTER DELETE ON application BEGIN
+            DELETE FROM application_period WHERE id = old.id;
+        END
+        """)
+    op.execute("""
+        CREATE TRIGGER application_period_au
+        AFTER UPDATE OF id, leave_start_date, leave_end_date ON application BEGIN
+            DELETE FROM application_period WHERE id = old.id;
+            INSERT INTO application_period
+            SELECT
+                new.id,
+                CAST(julianday(new.leave_start_date) AS INTEGER),
+                CAST(julianday(new.leave_end_date) AS INTEGER)
+            WHERE new.leave_start_date <= new.leave_end_date;
+        END
+        """)
+    op.execute("""
+        INSERT INTO application_period
+        SELECT
+            id,
+            CAST(julianday(leave_start_date) AS INTEGER),
+            CAST(julianday(leave_end_date) AS INTEGER)
+        FROM application
+        WHERE leave_start_date <= leave_end_date
+        """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER application_period_au")
+    op.execute("DROP TRIGGER application_period_ad")
+    op.execute("DROP TRIGGER application_period_ai")
+    op.execute("DROP TABLE application_period")
@@ -0,0 +1,30 @@
+"""Index applications by employee and leave start date
+
+Revision ID: 8c2d5e7a9b13
+Revises: 3f9a1c2e7b44
+Create Date: 2026-10-18 20:41:07.518309
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8c2d5e7a9b13"
+down_revision = "3f9a1c2e7b44"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every search joins applications to their employee, so without this each one scans the
+    # application table.  The leading column alone serves the join; leave_start_date orders an
+    # employee's applications by date.
+    op.create_index(
+        "ix_application_employee_id_leave_start_date",
+        "application",
+        ["employee_id", "leave_start_date"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_application_employee_id_leave_start_date", table_name="application")
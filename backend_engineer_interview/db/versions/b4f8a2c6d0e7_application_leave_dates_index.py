@@ -0,0 +1,37 @@
+"""Index applications by employee and both leave dates
+
+Revision ID: b4f8a2c6d0e7
+Revises: 5e1b7c3d9f20
+Create Date: 2026-10-18 23:38:12.604457
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b4f8a2c6d0e7"
+down_revision = "5e1b7c3d9f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Extends ix_application_employee_id_leave_start_date, which it replaces, so the overlap
+    # check for a new application reads the end date of the one before it from the index alone.
+    op.create_index(
+        "ix_application_employee_id_leave_start_date_leave_end_date",
+        "application",
+        ["employee_id", "leave_start_date", "leave_end_date"],
+    )
+    op.drop_index("ix_application_employee_id_leave_start_date", table_name="application")
+
+
+def downgrade():
+    op.create_index(
+        "ix_application_employee_id_leave_start_date",
+        "application",
+        ["employee_id", "leave_start_date"],
+    )
+    op.drop_index(
+        "ix_application_employee_id_leave_start_date_leave_end_date", table_name="application"
+    )
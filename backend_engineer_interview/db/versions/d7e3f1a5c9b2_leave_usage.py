@@ -0,0 +1,66 @@
+"""Add leave usage per employee and month
+
+Revision ID: d7e3f1a5c9b2
+Revises: b4f8a2c6d0e7
+Create Date: 2026-10-19 08:17:52.330861
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d7e3f1a5c9b2"
+down_revision = "b4f8a2c6d0e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "leave_usage",
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.String(), nullable=False),
+        sa.Column("days", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["employee_id"], ["employee.id"]),
+        sa.PrimaryKeyConstraint("employee_id", "month"),
+        sqlite_with_rowid=False,
+    )
+    op.create_index(
+        "ix_leave_usage_month_employee_id_days",
+        "leave_usage",
+        ["month", "employee_id", "days"],
+    )
+    # Existing applications, split into the months they span.  From here on the app adds to
+    # these totals as it adds applications.
+    op.execute("""
+        WITH RECURSIVE segment(employee_id, month_start, leave_start_date, leave_end_date) AS (
+            SELECT
+                employee_id,
+                date(leave_start_date, 'start of month'),
+                leave_start_date,
+                leave_end_date
+            FROM application
+            WHERE leave_start_date <= leave_end_date
+            UNION ALL
+            SELECT employee_id, date(month_start, '+1 month'), leave_start_date, leave_end_date
+            FROM segment
+            WHERE date(month_start, '+1 month') <= leave_end_date
+        )
+        INSERT INTO leave_usage (employee_id, month, days)
+        SELECT
+            employee_id,
+            strftime('%Y-%m', month_start),
+            sum(
+                julianday(min(leave_end_date, date(month_start, '+1 month', '-1 day')))
+                - julianday(max(leave_start_date, month_start))
+                + 1
+            )
+        FROM segment
+        GROUP BY employee_id, month_start
+        """)
+
+
+def downgrade():
+    op.drop_index("ix_leave_usage_month_employee_id_days", table_name="leave_usage")
+    op.drop_table("leave_usage")
@@ -0,0 +1,48 @@
+"""Flag applications that overlap earlier leave of the same employee
+
+Revision ID: e9c1b3d5f7a2
+Revises: d7e3f1a5c9b2
+Create Date: 2026-10-19 09:42:16.508193
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e9c1b3d5f7a2"
+down_revision = "d7e3f1a5c9b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "application_overlap",
+        sa.Column("application_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["application_id"], ["application.id"]),
+        sa.PrimaryKeyConstraint("application_id"),
+    )
+    # Each application starting on or before the latest end of the employee's other leave that
+    # started no later, in one pass over the applications in employee and start date order.
+    # The API refuses overlapping leave from here on, so adds none.
+    op.execute("""
+        INSERT INTO application_overlap (application_id)
+        SELECT id
+        FROM (
+            SELECT
+                id,
+                leave_start_date,
+                max(leave_end_date) OVER (
+                    PARTITION BY employee_id
+                    ORDER BY leave_start_date
+                    RANGE BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW EXCLUDE CURRENT ROW
+                ) AS earlier_end
+            FROM application
+        )
+        WHERE earlier_end >= leave_start_date
+        """)
+
+
+def downgrade():
+    op.drop_table("application_overlap")
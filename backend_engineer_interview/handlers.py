@@ -1,14 +1,69 @@
+import functools
+import hashlib
 from contextlib import contextmanager
 from datetime import date
-from typing import Generator, Optional
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Generator,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+)
 import connexion.lifecycle  # type: ignore
+import flask
 from flask import g, request
 import pydantic
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.orm import Session, aliased, load_only, scoped_session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Date,
+    Integer,
+    Select,
+    bindparam,
+    case,
+    column,
+    func,
+    insert,
+    select,
+    text,
+    update,
+    values,
+)
 import connexion  # type: ignore
-
-from backend_engineer_interview.models import Application, Employee
+from connexion.lifecycle import ConnexionResponse  # type: ignore
+
+from backend_engineer_interview.cache import TTLCache
+from backend_engineer_interview.leave_usage import (
+    MonthUsagePage,
+    add_usage,
+    employee_summary,
+    employee_summary_statement,
+    usage_rows,
+)
+from backend_engineer_interview.metrics import RequestMetrics
+from backend_engineer_interview.models import (
+    Application,
+    ApplicationOverlap,
+    Employee,
+    employee_public_columns,
+)
+from backend_engineer_interview.serialization import dump_json, json_response
+from backend_engineer_interview.search import (
+    ApplicationSearch,
+    FieldSelection,
+    InvalidSearch,
+    OverlappingApplicationSearch,
+    SearchPage,
+    invalidate_search_counts_for_applications,
+    invalidate_search_counts_for_rename,
+    search_filter,
+)
 
 
 class PydanticBaseModel(pydantic.BaseModel):
@@ -25,6 +80,42 @@ def db_session() -> Generator[Session, None, None]:
     yield session
 
 
+def begin_write(session: Session) -> None:
+    """
+    Start the session's transaction with BEGIN IMMEDIATE, taking SQLite's write lock before the
+    reads a write depends on, so a concurrent writer can't invalidate them before the commit.
+    Must be called before the session issues any statement.
+    """
+    session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+
+
+def streaming_db_session() -> Callable[[], ContextManager[Session]]:
+    """
+    Get a factory for Sessions independent of the request's scoped session, for response
+    generators that keep reading after the handler (and its request teardown) has returned.
+    """
+    session_factory: Optional[scoped_session] = g.get("db")
+    if session_factory is None:
+        raise Exception("No database session available in application context")
+
+    return session_factory.session_factory
+
+
+def get_count_cache() -> Optional[TTLCache[str, int]]:
+    """Get the application search count cache, if the app has one."""
+    return g.get("count_cache")
+
+
+def get_employee_cache() -> Optional[TTLCache[int, "CachedEmployee"]]:
+    """Get the employee payload cache, if the app has it enabled."""
+    return g.get("employee_cache")
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    """Get the app's request metrics, if it records them."""
+    return g.get("metrics")
+
+
 def get_request() -> connexion.lifecycle.ConnexionRequest:
     return connexion.request
 
@@ -32,38 +123,114 @@ def get_request() -> connexion.lifecycle.ConnexionRequest:
 def status() -> tuple[dict, int, dict]:
     with db_session() as session:
         session.execute(text("SELECT 1;")).one()
-        return ({"status": "up"}, 200, {})
+
+        response: dict = {"status": "up"}
+        count_cache = get_count_cache()
+        if count_cache is not None:
+            response["count_cache"] = count_cache.stats()
+        return (response, 200, {})
+
+
+def metrics() -> tuple[str, int, dict]:
+    request_metrics = get_request_metrics()
+    return (request_metrics.render() if request_metrics is not None else "", 200, {})
 
 
+# Response models declare their fields in alphabetical order, the order connexion's jsonifier
+# writes keys in, so their pydantic JSON encoding is the response body (see `dump_json`).
 class EmployeeResponse(PydanticBaseModel):
     model_config = {"from_attributes": True}
 
-    id: int
+    date_of_birth: date
     first_name: str
+    id: int
     last_name: str
-    date_of_birth: date
 
 
-def get_employee(id: int) -> tuple[dict, int, dict]:
-    # ANSWER
-    with db_session() as session:
+employee_response_adapter = pydantic.TypeAdapter(EmployeeResponse)
 
-        employee = session.query(Employee).filter(Employee.id == id).one_or_none()
 
-        if not employee:
-            return ({"message": "No such employee"}, 404, {})
-        return (EmployeeResponse.model_validate(employee).model_dump(), 200, {})
+class CachedEmployee(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def get_employee(id: int) -> tuple[Optional[dict], int, dict] | ConnexionResponse:
+    """
+    Employee payloads are cached per id along with a strong ETag over their JSON encoding, so
+    repeat reads, and conditional reads answered with 304, don't need the database.
+    """
+    employee_cache = get_employee_cache()
+    cached = employee_cache.get(id) if employee_cache is not None else None
+
+    if cached is None:
+        # Taken before reading, so a payload that a concurrent patch has since invalidated
+        # isn't cached, and then answered with 304s, for the TTL.
+        generation = employee_cache.generation if employee_cache is not None else None
+        with db_session() as session:
+            employee = (
+                session.query(Employee)
+                .options(load_only(*employee_public_columns))
+                .filter(Employee.id == id)
+                .one_or_none()
+            )
+
+            if not employee:
+                return ({"message": "No such employee"}, 404, {})
+
+            cached = cache_employee(employee)
+            if employee_cache is not None:
+                employee_cache.set(id, cached, generation=generation)
+
+    return conditional_employee_response(cached, request.headers.get("If-None-Match"))
+
+
+def cache_employee(employee: Employee) -> CachedEmployee:
+    body = dump_json(employee_response_adapter, employee_response_adapter.validate_python(employee))
+    return CachedEmployee(etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', body=body)
+
+
+def conditional_employee_response(
+    cached: CachedEmployee, if_none_match: Optional[str]
+) -> tuple[None, int, dict] | ConnexionResponse:
+    headers = {"ETag": cached.etag}
+    if _etag_matches(if_none_match, cached.etag):
+        return (None, 304, headers)
+    return json_response(cached.body, 200, headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison function, so W/ prefixes are ignored.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
+    )
 
 
 # Answer
 class PatchEmployeeRequest(PydanticBaseModel):
-    first_name: Optional[str]
-    last_name: Optional[str]
+    first_name: Optional[str] = pydantic.Field(default=None, min_length=1)
+    last_name: Optional[str] = pydantic.Field(default=None, min_length=1)
+
+
+def patch_employee_error(body: dict) -> str:
+    """The 400 message for an employee patch body that failed validation."""
+    if "first_name" in body and body["first_name"] == "":
+        return "first_name cannot be blank"
+
+    if "last_name" in body and body["last_name"] == "":
+        return "last_name cannot be blank"
+
+    return "request not valid"
 
 
 def patch_employee(id: int, body: dict) -> tuple[dict, int, dict]:
     # Answer
     with db_session() as session:
+        begin_write(session)
         employee: Optional[Employee] = (
             session.query(Employee).filter(Employee.id == id).one_or_none()
         )
@@ -72,23 +239,101 @@ def patch_employee(id: int, body: dict) -> tuple[dict, int, dict]:
 
         try:
             request_body = PatchEmployeeRequest.model_validate(body)
+            previous_names = (employee.first_name, employee.last_name)
             if request_body.first_name is not None:
                 employee.first_name = request_body.first_name
 
             if request_body.last_name is not None:
                 employee.last_name = request_body.last_name
 
-            session.flush()
+            session.commit()
+
+            employee_cache = get_employee_cache()
+            if employee_cache is not None:
+                employee_cache.invalidate(id)
+
+            if previous_names != (employee.first_name, employee.last_name):
+                invalidate_search_counts_for_rename(
+                    get_count_cache(), previous_names + (employee.first_name, employee.last_name)
+                )
 
             return ({}, 204, {})
         except pydantic.ValidationError:
-            if "first_name" in body and body["first_name"] == "":
-                return ({"message": "first_name cannot be blank"}, 400, {})
+            return ({"message": patch_employee_error(body)}, 400, {})
+
+
+class PatchEmployeesItem(PatchEmployeeRequest):
+    id: int
+
+
+patch_employees_adapter = pydantic.TypeAdapter(list[PatchEmployeesItem])
 
-            if "last_name" in body and body["last_name"] == "":
-                return ({"message": "last_name cannot be blank"}, 400, {})
 
-            return ({"message": "request not valid"}, 400, {})
+def patch_employees(body: list[dict]) -> tuple[dict, int, dict]:
+    """
+    Renames many employees in one transaction.  Each item is validated like a `patch_employee`
+    body and the response lists, in request order, the status for each id along with the message
+    the single endpoint would have returned on failure.
+    """
+    with db_session() as session:
+        results: list[dict] = [{"id": item.get("id")} for item in body]
+
+        try:
+            items = dict(enumerate(patch_employees_adapter.validate_python(body)))
+        except pydantic.ValidationError as e:
+            invalid = {error["loc"][0] for error in e.errors()}
+            items = {}
+            for index, item in enumerate(body):
+                if index in invalid:
+                    results[index].update(status=400, message=patch_employee_error(item))
+                else:
+                    items[index] = PatchEmployeesItem.model_validate(item)
+
+        begin_write(session)
+        previous_names = {
+            row.id: (row.first_name, row.last_name)
+            for row in session.execute(
+                select(Employee.id, Employee.first_name, Employee.last_name).where(
+                    Employee.id.in_({item.id for item in items.values()})
+                )
+            )
+        }
+
+        # Bulk UPDATE by primary key only batches rows that set the same columns.
+        updates: dict[frozenset[str], list[dict]] = {}
+        for index, item in items.items():
+            if item.id not in previous_names:
+                results[index].update(status=404, message="No such employee")
+                continue
+
+            changes = item.model_dump(exclude_none=True)
+            if len(changes) > 1:
+                updates.setdefault(frozenset(changes), []).append(changes)
+            results[index]["status"] = 204
+
+        if updates:
+            for rows in updates.values():
+                session.execute(update(Employee), rows)
+            session.commit()
+
+            employee_cache = get_employee_cache()
+            if employee_cache is not None:
+                for rows in updates.values():
+                    for row in rows:
+                        employee_cache.invalidate(row["id"])
+
+            invalidate_search_counts_for_rename(
+                get_count_cache(),
+                (
+                    name
+                    for rows in updates.values()
+                    for row in rows
+                    for name in previous_names[row["id"]]
+                    + (row.get("first_name", ""), row.get("last_name", ""))
+                ),
+            )
+
+        return ({"results": results}, 200, {})
 
 
 class ApplicationRequest(PydanticBaseModel):
@@ -96,21 +341,166 @@ class ApplicationRequest(PydanticBaseModel):
     leave_end_date: date
     employee_id: int
 
+    @pydantic.model_validator(mode="after")
+    def check_dates_in_order(self) -> "ApplicationRequest":
+        if self.leave_end_date < self.leave_start_date:
+            raise ValueError("leave_end_date cannot be before leave_start_date")
+        return self
+
 
 class ApplicationResponse(PydanticBaseModel):
-    leave_start_date: date
-    leave_end_date: date
     employee: EmployeeResponse
     id: int
+    leave_end_date: date
+    leave_start_date: date
 
 
-def post_application(body: dict) -> tuple[dict, int, dict]:
+application_response_adapter = pydantic.TypeAdapter(ApplicationResponse)
+
+
+def application_response(application: Application) -> ConnexionResponse:
+    """The 200 response for an application whose employee is loaded."""
+    return json_response(
+        dump_json(
+            application_response_adapter, application_response_adapter.validate_python(application)
+        )
+    )
+
+
+def application_request_error(body: dict, error: pydantic.ValidationError) -> str:
+    """The 400 message for an application request body that failed validation."""
+    if body.get("leave_start_date") == "":
+        return "leave_start_date cannot be blank"
+    if body.get("leave_end_date") == "":
+        return "leave_end_date cannot be blank"
+    if "leave_start_date" not in body or "leave_end_date" not in body:
+        return "leave_start_date is missing;leave_end_date is missing"
+    for detail in error.errors():
+        if detail["type"] == "value_error" and not detail["loc"]:
+            return str(detail["ctx"]["error"])
+    return str(error)
+
+
+# New applications checked for overlaps, and employees looked up, per statement in a batch, so
+# the statement's bound parameters stay well under SQLite's default limit of 32766.
+CONFLICT_CHECK_BATCH_SIZE = 1000
+
+
+def _conflict_statement(
+    employee_id: ColumnElement[int],
+    leave_start_date: ColumnElement[date],
+    leave_end_date: ColumnElement[date],
+    probe: Optional[CTE] = None,
+) -> Select:
+    """
+    The id, labelled ``id``, of an application of ``employee_id`` overlapping leave from
+    ``leave_start_date`` to ``leave_end_date``, or NULL if none does.  Given the ``probe`` those
+    are columns of, a row per probe, preceded by its key.  There is no row for an employee
+    with no application starting by the new leave's end.
+    """
+    # The last of the employee's applications to start by the new leave's end: applications
+    # the API added never overlap each other, so ordered by start date their end dates increase
+    # too, and only this one can reach into the new leave.  One probe of the (employee_id,
+    # leave_start_date, leave_end_date) index, however many applications the employee has.
+    latest = aliased(Application, name="latest")
+    latest_id = (
+        select(Application.id)
+        .where(
+            Application.employee_id == employee_id,
+            Application.leave_start_date <= leave_end_date,
+        )
+        .order_by(Application.leave_start_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    # Unless it starts inside earlier leave (see `ApplicationOverlap`): then any earlier
+    # application may overlap, so they are walked back from the new leave's end.  Only
+    # evaluated for the few employees whose leave overlapped before the API refused it.
+    overlapping = (
+        select(Application.id)
+        .where(
+            Application.employee_id == employee_id,
+            Application.leave_start_date <= leave_end_date,
+            Application.leave_end_date >= leave_start_date,
+        )
+        .order_by(Application.leave_start_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    conflict = case(
+        (latest.leave_end_date >= leave_start_date, latest.id),
+        (ApplicationOverlap.application_id.is_not(None), overlapping),
+    ).label("id")
+
+    if probe is None:
+        statement = select(conflict).select_from(latest).where(latest.id == latest_id)
+    else:
+        statement = (
+            select(probe.c.key, conflict).select_from(probe).join(latest, latest.id == latest_id)
+        )
+    return statement.outerjoin(ApplicationOverlap, ApplicationOverlap.application_id == latest.id)
+
+
+# Built once, as building it costs more than running it.
+_conflicting_application = _conflict_statement(
+    bindparam("employee_id", type_=Integer),
+    bindparam("leave_start_date", type_=Date),
+    bindparam("leave_end_date", type_=Date),
+)
+
+
+def conflicting_application_statement(
+    employee_id: int, leave_start_date: date, leave_end_date: date
+) -> Select:
+    """
+    The id of an application of ``employee_id`` overlapping leave from ``leave_start_date`` to
+    ``leave_end_date``, or NULL or no row if none does.  Reads one entry of the (employee_id,
+    leave_start_date, leave_end_date) index, however long the employee's history.
+
+    Run inside the write transaction (see `begin_write`), so no application can be added
+    between the check and the insert.
+    """
+    return _conflicting_application.params(
+        employee_id=employee_id, leave_start_date=leave_start_date, leave_end_date=leave_end_date
+    )
+
+
+def conflicting_applications_statement(probes: Iterable[tuple[int, int, date, date]]) -> Select:
+    """
+    `conflicting_application_statement` for many new applications in one statement, given as
+    (key, employee_id, leave_start_date, leave_end_date): the key and overlapped application id
+    of each that overlaps one.  Callers pass at most `CONFLICT_CHECK_BATCH_SIZE` at a time.
+    """
+    # A CTE, as SQLite can't name a VALUES subquery's columns.
+    probe = (
+        values(
+            column("key", Integer),
+            column("employee_id", Integer),
+            column("leave_start_date", Date),
+            column("leave_end_date", Date),
+            name="probe",
+        )
+        .data(list(probes))
+        .cte("probe")
+    )
+    checked = _conflict_statement(
+        probe.c.employee_id, probe.c.leave_start_date, probe.c.leave_end_date, probe
+    ).subquery()
+    return select(checked.c.key, checked.c.id).where(checked.c.id.is_not(None))
+
+
+def conflict_message(application_id: int) -> str:
+    return f"Leave overlaps application {application_id}"
+
+
+def post_application(body: dict) -> tuple[dict, int, dict] | ConnexionResponse:
     """
     Accepts a leave_start_date, leave_end_date, employee_id and creates an Application
     with those properties.  It should then return the new application with a status code of 200.
 
     If any of the properties are missing in the request body, it should return the new application
-    with a status code of 400.
+    with a status code of 400.  Leave overlapping one of the employee's existing applications is
+    refused with a 409 naming it.
 
     Verify the handler using the test cases in TestPostApplication.  Add any more tests you think
     are necessary.
@@ -119,25 +509,27 @@ def post_application(body: dict) -> tuple[dict, int, dict]:
         try:
             request_body = ApplicationRequest.model_validate(body)
         except pydantic.ValidationError as e:
-            if body.get("leave_start_date") == "":
-                return ({"message": "leave_start_date cannot be blank"}, 400, {})
-            if body.get("leave_end_date") == "":
-                return ({"message": "leave_end_date cannot be blank"}, 400, {})
-            if "leave_start_date" not in body or "leave_end_date" not in body:
-                return (
-                    {"message": "leave_start_date is missing;leave_end_date is missing"},
-                    400,
-                    {},
-                )
-            return ({"message": str(e)}, 400, {})
+            return ({"message": application_request_error(body, e)}, 400, {})
 
+        begin_write(session)
         employee: Optional[Employee] = (
-            session.query(Employee).filter(Employee.id == request_body.employee_id).one_or_none()
+            session.query(Employee)
+            .options(load_only(*employee_public_columns))
+            .filter(Employee.id == request_body.employee_id)
+            .one_or_none()
         )
 
         if not employee:
             return ({"message": "No such employee"}, 404, {})
 
+        conflict = session.execute(
+            conflicting_application_statement(
+                request_body.employee_id, request_body.leave_start_date, request_body.leave_end_date
+            )
+        ).scalar_one_or_none()
+        if conflict is not None:
+            return ({"message": conflict_message(conflict)}, 409, {})
+
         application = Application(
             leave_start_date=request_body.leave_start_date,
             leave_end_date=request_body.leave_end_date,
@@ -145,83 +537,341 @@ def post_application(body: dict) -> tuple[dict, int, dict]:
         )
 
         session.add(application)
-        session.flush()
+        session.execute(
+            add_usage,
+            usage_rows([(employee.id, request_body.leave_start_date, request_body.leave_end_date)]),
+        )
+        session.commit()
+        # Attach the employee loaded above so serializing doesn't lazy load it again.
+        set_committed_value(application, "employee", employee)
+        invalidate_search_counts_for_applications(
+            get_count_cache(), {employee.id: (employee.first_name, employee.last_name)}
+        )
+
+        return application_response(application)
 
-        return (
-            ApplicationResponse.model_validate(application).model_dump(),
-            200,
-            {},
+
+application_requests_adapter = pydantic.TypeAdapter(list[ApplicationRequest])
+
+
+def post_application_batch(body: list[dict]) -> tuple[dict, int, dict]:
+    """
+    Creates many applications in one transaction.  Each item is validated and checked like a
+    `post_application` body, and the response lists, in request order, either the created
+    application id or the status and message the single endpoint would have returned.  Invalid
+    items don't prevent the valid ones from being created; an item overlapping an earlier item
+    for the same employee is refused with a 409 too.
+    """
+    with db_session() as session:
+        results: list[dict] = [{} for _ in body]
+
+        try:
+            request_bodies = dict(enumerate(application_requests_adapter.validate_python(body)))
+        except pydantic.ValidationError as e:
+            invalid = {error["loc"][0] for error in e.errors()}
+            request_bodies = {}
+            for index, item in enumerate(body):
+                if index in invalid:
+                    try:
+                        ApplicationRequest.model_validate(item)
+                    except pydantic.ValidationError as item_error:
+                        message = application_request_error(item, item_error)
+                        results[index] = {"status": 400, "message": message}
+                else:
+                    request_bodies[index] = ApplicationRequest.model_validate(item)
+
+        begin_write(session)
+        employee_ids = iter({request_body.employee_id for request_body in request_bodies.values()})
+        employees: dict[int, tuple[str, str]] = {}
+        while batch_ids := list(islice(employee_ids, CONFLICT_CHECK_BATCH_SIZE)):
+            employees.update(
+                (row.id, (row.first_name, row.last_name))
+                for row in session.execute(
+                    select(Employee.id, Employee.first_name, Employee.last_name).where(
+                        Employee.id.in_(batch_ids)
+                    )
+                )
+            )
+
+        candidates: list[int] = []
+        for index, request_body in request_bodies.items():
+            if request_body.employee_id in employees:
+                candidates.append(index)
+            else:
+                results[index] = {"status": 404, "message": "No such employee"}
+
+        # Each item is checked against the existing applications, a statement per batch of items,
+        # and against the items before it in the batch.
+        conflicts: dict[int, int] = {}
+        probes = (
+            (
+                index,
+                request_bodies[index].employee_id,
+                request_bodies[index].leave_start_date,
+                request_bodies[index].leave_end_date,
+            )
+            for index in candidates
         )
+        while batch := list(islice(probes, CONFLICT_CHECK_BATCH_SIZE)):
+            conflicts.update(
+                (row.key, row.id)
+                for row in session.execute(conflicting_applications_statement(batch))
+            )
+        accepted: dict[int, list[ApplicationRequest]] = {}
+        to_insert: list[int] = []
+        for index in candidates:
+            request_body = request_bodies[index]
+            if index in conflicts:
+                results[index] = {"status": 409, "message": conflict_message(conflicts[index])}
+                continue
+            earlier = accepted.setdefault(request_body.employee_id, [])
+            if any(
+                other.leave_start_date <= request_body.leave_end_date
+                and other.leave_end_date >= request_body.leave_start_date
+                for other in earlier
+            ):
+                results[index] = {"status": 409, "message": "Leave overlaps an earlier item"}
+                continue
+            earlier.append(request_body)
+            to_insert.append(index)
+
+        if to_insert:
+            # Ids are allocated up front so the rows can be sent with a single executemany; SQLite
+            # can't report per-row ids from one.  The write lock taken by begin_write keeps the
+            # allocated range free until the commit.
+            max_id = session.execute(select(func.coalesce(func.max(Application.id), 0)))
+            first_id = max_id.scalar_one() + 1
+            rows = [
+                {"id": first_id + offset, **request_bodies[index].model_dump()}
+                for offset, index in enumerate(to_insert)
+            ]
+            session.execute(insert(Application), rows)
+            session.execute(
+                add_usage,
+                usage_rows(
+                    (row["employee_id"], row["leave_start_date"], row["leave_end_date"])
+                    for row in rows
+                ),
+            )
+            session.commit()
+
+            for index, row in zip(to_insert, rows):
+                results[index] = {"status": 200, "id": row["id"]}
+
+            invalidate_search_counts_for_applications(
+                get_count_cache(),
+                {
+                    employee_id: employees[employee_id]
+                    for employee_id in {request_bodies[index].employee_id for index in to_insert}
+                },
+            )
+
+        return ({"results": results}, 200, {})
+
+
+def get_leave_summary(id: int) -> tuple[dict, int, dict]:
+    """
+    The employee's days of leave in each month they took any, and in total, read from the
+    `leave_usage` summary table rather than summed from their applications.
+
+    `curl http://localhost:8000/v1/employee/1/leave-summary`
+    """
+    with db_session() as session:
+        rows = session.execute(employee_summary_statement(id)).all()
+        if not rows:
+            return ({"message": "No such employee"}, 404, {})
+
+        return (employee_summary(id, rows), 200, {})
+
+
+def get_leave_usage(month: str, after: int = 0, limit: int = 1000) -> tuple[dict, int, dict]:
+    """
+    Every employee's days of leave in ``month`` (``YYYY-MM``), in employee id order and paged by
+    the last id of the previous page, with the month's totals.
+
+    `curl http://localhost:8000/v1/leave-usage/2021-02`
+    """
+    if limit < 1:
+        return ({"message": "limit must be positive"}, 400, {})
+
+    page = MonthUsagePage(month, after, limit)
+    with db_session() as session:
+        rows = session.execute(page.page_statement()).all()
+        totals = session.execute(page.totals_statement()).one()
+        return (page.response(rows, totals), 200, {})
+
+
+# Rows fetched from the cursor (and written to the response) at a time when exporting.
+EXPORT_BATCH_SIZE = 1000
 
 
 class ApplicationSearchResponse(PydanticBaseModel):
     applications: list[ApplicationResponse]
-    count: int
+    count: Optional[int]
     limit: int
-    offset: int
     next: Optional[str]
+    offset: int
     prev: Optional[str]
 
 
-def search_application() -> None:
+search_response_adapter = pydantic.TypeAdapter(ApplicationSearchResponse)
+
+
+@functools.cache
+def fields_search_response_adapter(fields: FieldSelection) -> pydantic.TypeAdapter:
+    """
+    `ApplicationSearchResponse` with only the selected fields of each application, built the
+    first time the selection is requested and reused after.
+    """
+    item_fields: dict[str, Any] = {
+        name: (ApplicationResponse.model_fields[name].annotation, ...)
+        for name in fields.application
+    }
+    if fields.employee:
+        item_fields["employee"] = (
+            pydantic.create_model(
+                "EmployeeFieldsResponse",
+                __base__=PydanticBaseModel,
+                **{
+                    name: (EmployeeResponse.model_fields[name].annotation, ...)
+                    for name in fields.employee
+                },
+            ),
+            ...,
+        )
+    # Declared in alphabetical order, like the other response models (see `dump_json`).
+    item_model = pydantic.create_model(
+        "ApplicationFieldsResponse", __base__=PydanticBaseModel, **dict(sorted(item_fields.items()))
+    )
+    return pydantic.TypeAdapter(
+        pydantic.create_model(
+            "ApplicationFieldsSearchResponse",
+            __base__=PydanticBaseModel,
+            applications=(list[item_model], ...),  # type: ignore
+            **{
+                name: (field.annotation, ...)
+                for name, field in ApplicationSearchResponse.model_fields.items()
+                if name != "applications"
+            },
+        )
+    )
+
+
+def search_application() -> tuple[dict, int, dict] | ConnexionResponse:
     """
     Accepts an optional search parameter of an employee's first name, last name, or employee id and returns
     a list of applications.
 
-    To test, there is a seed script in application_seed.py that will populate the database with
-    some applications.  You can run this script with `python application_seed.py`.
+    To test, `python -m backend_engineer_interview.seed` will populate the database with
+    generated employees and applications.
 
     examples to run from the command line:
     `curl http://localhost:8000/v1/application` should return all applications.
     `curl http://localhost:8000/v1/application?search=1` should return the application with the id 1.
     `curl http://localhost:8000/v1/application?search=John` should return all applications for employees with the first name John.
     `curl http://localhost:8000/v1/application?search=Lennon` should return all applications for employees with the last name Lennon.
+
+    Pages are linked with opaque keyset cursors (the last seen application id plus the search term),
+    so following `next`/`prev` costs the same at any depth.  `offset` is still accepted for the first
+    request.
+
+    `count` is computed by the page query itself; pass `include_count=false` to skip it, in which
+    case `count` is null and `next` is derived from fetching one row past the page.
+
+    `fields=id,leave_start_date,employee.first_name` returns only those fields of each application,
+    read as plain rows of their columns rather than ORM entities; the employee is only joined
+    for its fields other than its id.
     """
+    try:
+        application_search = ApplicationSearch(request.args, get_count_cache())
+    except InvalidSearch as e:
+        return ({"message": str(e)}, 400, {})
+
+    return run_search(application_search)
+
+
+def search_overlapping_applications() -> tuple[dict, int, dict] | ConnexionResponse:
+    """
+    Lists the applications whose leave overlaps the days `from` to `to`, inclusive, for calendar
+    views.  Pages, cursors and `include_count` work as for `search_application`.
+
+    `curl "http://localhost:8000/v1/application/overlapping?from=2021-01-15&to=2021-02-15"`
+    """
+    try:
+        application_search = OverlappingApplicationSearch(request.args)
+    except InvalidSearch as e:
+        return ({"message": str(e)}, 400, {})
+
+    return run_search(application_search)
+
+
+def run_search(application_search: ApplicationSearch) -> ConnexionResponse:
     with db_session() as session:
-        search: Optional[str] = request.args.get("search", "")
-        offset: int = int(request.args.get("offset", 0))
-        limit: int = int(request.args.get("limit", 10))
-
-        query = session.query(Application).join(Employee)
-        if search:
-            if search.isdigit():
-                query = query.filter(Employee.id == int(search))
-            else:
-                query = query.filter(
-                    Employee.first_name.ilike(f"%{search}%")
-                    | Employee.last_name.ilike(f"%{search}%")
-                )
+        rows = session.execute(application_search.page_statement()).all()
+        fallback_count: Optional[int] = None
+        if application_search.needs_count_statement(rows):
+            fallback_count = session.execute(application_search.count_statement()).scalar()
 
-        query_count = query.count()
-        applications = query.order_by(Application.id).slice(offset, offset + limit).all()
+        return search_response(application_search.page(rows, fallback_count))
 
-        next_offset = offset + limit
-        prev_offset = max(offset - limit, 0)
 
-        next_url = (
-            f"/v1/application?search={search}&offset={next_offset}&limit={limit}"
-            if next_offset < query_count
-            else ""
-        )
-        prev_url = (
-            f"/v1/application?search={search}&offset={prev_offset}&limit={limit}"
-            if offset > 0
-            else ""
-        )
+def search_response(page: SearchPage) -> ConnexionResponse:
+    # One validation pass reads the page's ORM objects (or selected fields) straight into the
+    # response model.
+    adapter = (
+        search_response_adapter
+        if page.fields is None
+        else fields_search_response_adapter(page.fields)
+    )
+    return json_response(dump_json(adapter, adapter.validate_python(page._asdict())))
 
-        return (
-            ApplicationSearchResponse.model_validate(
-                {
-                    "applications": [
-                        ApplicationResponse.model_validate(app).model_dump() for app in applications
-                    ],
-                    "count": query_count,
-                    "limit": limit,
-                    "offset": offset,
-                    "next": next_url,
-                    "prev": prev_url,
-                }
-            ).model_dump(),
-            200,
-            {},
+
+def export_applications() -> flask.Response:
+    """
+    Streams every application matching the optional `search` term (with the same semantics as
+    `search_application`) as newline-delimited JSON, one `ApplicationResponse` per line, in id
+    order.
+
+    Rows are read as plain tuples through a streaming cursor in batches, so neither the result
+    set nor the session's identity map is held in memory.  Each is encoded through
+    `application_response_adapter`, so lines match the application payloads of every other
+    endpoint.
+    """
+    search: str = request.args.get("search", "")
+
+    statement = (
+        select(
+            Application.id,
+            Application.leave_start_date,
+            Application.leave_end_date,
+            *employee_public_columns,
         )
+        .join(Application.employee)
+        .order_by(Application.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if search:
+        statement = statement.where(search_filter(search))
+
+    new_session = streaming_db_session()
+    employee_keys = [column.key for column in employee_public_columns]
+
+    def generate() -> Iterator[bytes]:
+        with new_session() as session:
+            for rows in session.execute(statement).partitions():
+                yield b"".join(
+                    application_response_adapter.dump_json(
+                        application_response_adapter.validate_python(
+                            {
+                                "employee": dict(zip(employee_keys, employee)),
+                                "id": application_id,
+                                "leave_end_date": leave_end_date,
+                                "leave_start_date": leave_start_date,
+                            }
+                        )
+                    )
+                    + b"\n"
+                    for application_id, leave_start_date, leave_end_date, *employee in rows
+                )
+
+    return flask.Response(generate(), status=200, mimetype="application/x-ndjson")
@@ -0,0 +1,276 @@
+"""
+Days of leave per employee and month, for reporting.  The `leave_usage` table holds the totals and
+every path that adds applications adds their days to it in the same transaction (see `usage_rows`
+and `add_usage`), so a report reads a handful of summary rows rather than summing applications.
+
+The totals can be recomputed from the applications in one streaming pass, to check the table or
+to replace it:
+
+    python -m backend_engineer_interview.leave_usage --db-name app --check
+"""
+
+import argparse
+import logging
+import sys
+import time
+from collections import Counter
+from datetime import date
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import Connection, Engine, Select, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend_engineer_interview.models import Application, Employee, LeaveUsage
+
+leave_usage_table = LeaveUsage.__table__
+
+# Adds each row's days to the employee's month, creating the month if it has no leave yet.
+# Executed with the list of `usage_rows`, as one executemany.
+_add_usage = sqlite_insert(leave_usage_table)
+add_usage = _add_usage.on_conflict_do_update(
+    index_elements=[leave_usage_table.c.employee_id, leave_usage_table.c.month],
+    set_={"days": leave_usage_table.c.days + _add_usage.excluded.days},
+)
+
+# Rows written per executemany when rebuilding.
+REBUILD_BATCH_SIZE = 10_000
+
+
+def month_days(start: date, end: date) -> Iterator[tuple[str, int]]:
+    """The days of leave from ``start`` to ``end``, inclusive, in each month they fall in."""
+    # Rebuilding splits every application, so this avoids date formatting and replace().
+    year, month = start.year, start.month
+    while True:
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        if end < next_month:
+            yield f"{year:04d}-{month:02d}", (end - start).days + 1
+            return
+        yield f"{year:04d}-{month:02d}", (next_month - start).days
+        start, year, month = next_month, next_month.year, next_month.month
+
+
+def usage_rows(applications: Iterable[tuple[int, date, date]]) -> list[dict]:
+    """
+    The rows for `add_usage` for new applications, given as (employee_id, leave_start_date,
+    leave_end_date): the days they add to each employee's months.
+    """
+    days: Counter[tuple[int, str]] = Counter()
+    for employee_id, start, end in applications:
+        for month, month_total in month_days(start, end):
+            days[employee_id, month] += month_total
+    return [
+        {"employee_id": employee_id, "month": month, "days": total}
+        for (employee_id, month), total in days.items()
+    ]
+
+
+def employee_summary_statement(employee_id: int) -> Select:
+    """
+    The employee's months of leave in order, as (id, month, days), or a single row with no month
+    if the employee has taken none, or no rows if there is no such employee.  Reads a range of
+    the table's primary key.
+    """
+    return (
+        select(Employee.id, LeaveUsage.month, LeaveUsage.days)
+        .outerjoin(LeaveUsage, LeaveUsage.employee_id == Employee.id)
+        .where(Employee.id == employee_id)
+        .order_by(LeaveUsage.month)
+    )
+
+
+def employee_summary(employee_id: int, rows: list) -> dict:
+    """The leave summary response for `employee_summary_statement`'s rows."""
+    months = [{"month": row.month, "days": row.days} for row in rows if row.month is not None]
+    return {
+        "employee_id": employee_id,
+        "months": months,
+        "total_days": sum(month["days"] for month in months),
+    }
+
+
+class MonthUsagePage(NamedTuple):
+    """A page of the employees with leave in a month, in id order, after the ``after`` id."""
+
+    month: str
+    after: int
+    limit: int
+
+    def page_statement(self) -> Select:
+        # One row past the page, to tell whether there is a next one.
+        return (
+            select(LeaveUsage.employee_id, LeaveUsage.days)
+            .where(LeaveUsage.month == self.month, LeaveUsage.employee_id > self.after)
+            .order_by(LeaveUsage.employee_id)
+            .limit(self.limit + 1)
+        )
+
+    def totals_statement(self) -> Select:
+        """The month's days and employees with leave, across all pages."""
+        return select(func.coalesce(func.sum(LeaveUsage.days), 0), func.count()).where(
+            LeaveUsage.month == self.month
+        )
+
+    def response(self, rows: list, totals: tuple[int, int]) -> dict:
+        page = rows[: self.limit]
+        return {
+            "month": self.month,
+            "employees": [{"employee_id": row.employee_id, "days": row.days} for row in page],
+            "employee_count": totals[1],
+            "total_days": totals[0],
+            "next": (
+                f"/v1/leave-usage/{self.month}?after={page[-1].employee_id}&limit={self.limit}"
+                if len(rows) > self.limit
+                else None
+            ),
+        }
+
+
+def computed_usage(
+    connection: Connection, employee_ids: Optional[range] = None
+) -> Iterator[tuple[int, str, int]]:
+    """
+    The (employee_id, month, days) the applications add up to, in primary key order, computed
+    in one pass over the (employee_id, leave_start_date, leave_end_date) index.  Applications
+    are streamed in batches and totalled an employee at a time, so memory doesn't grow with
+    the table.
+    """
+    statement = (
+        select(Application.employee_id, Application.leave_start_date, Application.leave_end_date)
+        .where(Application.leave_start_date <= Application.leave_end_date)
+        .order_by(Application.employee_id)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    if employee_ids is not None:
+        statement = statement.where(
+            Application.employee_id >= employee_ids.start,
+            Application.employee_id < employee_ids.stop,
+        )
+
+    rows = connection.execute(statement)
+    for employee_id, applications in groupby(rows, key=itemgetter(0)):
+        days: Counter[str] = Counter()
+        for _, start, end in applications:
+            for month, month_total in month_days(start, end):
+                days[month] += month_total
+        for month in sorted(days):
+            yield employee_id, month, days[month]
+
+
+def stored_usage(
+    connection: Connection, employee_ids: Optional[range] = None
+) -> Iterator[tuple[int, str, int]]:
+    """The table's (employee_id, month, days) rows, in primary key order."""
+    statement = (
+        select(LeaveUsage.employee_id, LeaveUsage.month, LeaveUsage.days)
+        .order_by(LeaveUsage.employee_id, LeaveUsage.month)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    if employee_ids is not None:
+        statement = statement.where(
+            LeaveUsage.employee_id >= employee_ids.start,
+            LeaveUsage.employee_id < employee_ids.stop,
+        )
+    for row in connection.execute(statement):
+        yield tuple(row)  # type: ignore
+
+
+class UsageDifference(NamedTuple):
+    employee_id: int
+    month: str
+    stored_days: Optional[int]
+    computed_days: Optional[int]
+
+
+def usage_differences(
+    connection: Connection, employee_ids: Optional[range] = None
+) -> Iterator[UsageDifference]:
+    """Where the table disagrees with the applications, merging the two in primary key order."""
+    stored_rows = stored_usage(connection, employee_ids)
+    computed_rows = computed_usage(connection, employee_ids)
+    stored = next(stored_rows, None)
+    computed = next(computed_rows, None)
+    while stored is not None or computed is not None:
+        if computed is None or (stored is not None and stored[:2] < computed[:2]):
+            yield UsageDifference(stored[0], stored[1], stored[2], None)  # type: ignore
+            stored = next(stored_rows, None)
+        elif stored is None or computed[:2] < stored[:2]:
+            yield UsageDifference(computed[0], computed[1], None, computed[2])
+            computed = next(computed_rows, None)
+        else:
+            if stored[2] != computed[2]:
+                yield UsageDifference(stored[0], stored[1], stored[2], computed[2])
+            stored = next(stored_rows, None)
+            computed = next(computed_rows, None)
+
+
+def rebuild_leave_usage(engine: Engine, employee_ids: Optional[range] = None) -> int:
+    """
+    Replace the table's rows, or those of ``employee_ids``, with `computed_usage`, in one write
+    transaction.  Returns the number of rows written.
+    """
+    written = 0
+    with engine.connect().execution_options(sqlite_begin="IMMEDIATE") as connection:
+        with connection.begin():
+            statement = delete(leave_usage_table)
+            if employee_ids is not None:
+                statement = statement.where(
+                    leave_usage_table.c.employee_id >= employee_ids.start,
+                    leave_usage_table.c.employee_id < employee_ids.stop,
+                )
+            connection.execute(statement)
+
+            # Handed to the driver as tuples, as the seed module does, skipping SQLAlchemy's
+            # per-row parameter processing.
+            insert_rows = str(
+                insert(leave_usage_table).compile(
+                    dialect=connection.dialect, column_keys=["employee_id", "month", "days"]
+                )
+            )
+            rows = computed_usage(connection, employee_ids)
+            while batch := list(islice(rows, REBUILD_BATCH_SIZE)):
+                connection.exec_driver_sql(insert_rows, batch)
+                written += len(batch)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db-name", default="app", help="database to use, as passed to init_db")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="report where the table disagrees with the applications instead of replacing it",
+    )
+    args = parser.parse_args()
+
+    # Imported here rather than at the top, as the app imports this module through its handlers.
+    from backend_engineer_interview.app import EngineConfig, init_db
+
+    logging.disable(logging.INFO)
+    session_factory = init_db(args.db_name, EngineConfig(slow_query_threshold_ms=None))
+    engine = session_factory.get_bind()
+    session_factory.remove()
+
+    start = time.perf_counter()
+    if args.check:
+        with engine.connect() as connection:
+            differences = 0
+            for difference in usage_differences(connection):
+                differences += 1
+                if differences <= 20:
+                    print(
+                        f"employee {difference.employee_id} {difference.month}: "
+                        f"{difference.stored_days} stored, "
+                        f"{difference.computed_days} from applications"
+                    )
+        print(f"{differences} differences, checked in {time.perf_counter() - start:.1f}s")
+        sys.exit(1 if differences else 0)
+
+    written = rebuild_leave_usage(engine)  # type: ignore
+    print(f"Rebuilt {written} rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
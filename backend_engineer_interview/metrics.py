@@ -0,0 +1,268 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, MutableMapping, Optional
+
+from sqlalchemy import Connection, Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class RequestStats:
+    """Database work done while serving one request."""
+
+    db_time: float = 0.0
+    statements: int = 0
+    # Times each statement shape (its SQL text, parameters being bound separately) was issued.
+    statement_shapes: dict[str, int] = field(default_factory=dict)
+
+
+# Set by MetricsMiddleware (or, in the async app, the outer state middleware) for the duration of
+# each request.  Sync handlers run in a copy of the middleware's context, so the engine hooks find
+# the same RequestStats in both app modes.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class RepeatedStatementError(Exception):
+    """A request issued the same statement shape more times than strict mode allows."""
+
+
+def instrument_engine(
+    engine: Engine,
+    slow_query_threshold_ms: Optional[float] = None,
+    max_statement_repeats: Optional[int] = None,
+) -> None:
+    """
+    Count the statements each request issues and add their time in the database to the current
+    request's stats.
+
+    Statements slower than ``slow_query_threshold_ms`` are logged with their query plan.  With
+    ``max_statement_repeats`` set, a request issuing the same statement shape more often than
+    that (typically lazy loads in a loop) fails with RepeatedStatementError.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):  # type: ignore
+        stats = request_stats.get()
+        if stats is not None and not statement.startswith(_TRANSACTION_CONTROL):
+            stats.statements += 1
+            repeats = stats.statement_shapes[statement] = (
+                stats.statement_shapes.get(statement, 0) + 1
+            )
+            if max_statement_repeats is not None and repeats > max_statement_repeats:
+                raise RepeatedStatementError(
+                    f"Statement issued {repeats} times in one request: {statement}"
+                )
+        context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):  # type: ignore
+        elapsed = time.perf_counter() - context._query_start_time
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_time += elapsed
+
+        if slow_query_threshold_ms is not None and 1000 * elapsed > slow_query_threshold_ms:
+            logger.warning(
+                "Slow statement (%.1fms): %s",
+                1000 * elapsed,
+                statement,
+                extra={
+                    "statement_time_ms": 1000 * elapsed,
+                    "parameters": parameters,
+                    "query_plan": None if executemany else query_plan(conn, statement, parameters),
+                },
+            )
+
+
+_TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+def query_plan(conn: Connection, statement: str, parameters: Any) -> Optional[list[str]]:
+    """SQLite's EXPLAIN QUERY PLAN for a statement, one line per step."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()  # type: ignore
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[3] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception:
+        logger.exception("Could not explain slow statement")
+        return None
+
+
+class _Series:
+    __slots__ = ("total_buckets", "total_sum", "db_buckets", "db_sum", "count")
+
+    def __init__(self, buckets: int) -> None:
+        # One count per bucket plus one for +Inf; cumulated when rendered.
+        self.total_buckets = [0] * (buckets + 1)
+        self.total_sum = 0.0
+        self.db_buckets = [0] * (buckets + 1)
+        self.db_sum = 0.0
+        self.count = 0
+
+
+class _Shard:
+    __slots__ = ("series", "in_flight")
+
+    def __init__(self) -> None:
+        self.series: dict[tuple[str, int], _Series] = {}
+        self.in_flight: dict[str, int] = {}
+
+
+class RequestMetrics:
+    """
+    Latency histograms of total and database time per operation and status, and in-flight
+    request gauges per operation.
+
+    Each thread records into its own shard, so recording takes no lock; shards are only summed
+    when rendered.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard: Optional[_Shard] = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def start(self, operation_id: str) -> None:
+        in_flight = self._shard().in_flight
+        in_flight[operation_id] = in_flight.get(operation_id, 0) + 1
+
+    def finish(self, operation_id: str, status: int, total_time: float, db_time: float) -> None:
+        shard = self._shard()
+        shard.in_flight[operation_id] -= 1
+
+        series = shard.series.get((operation_id, status))
+        if series is None:
+            series = shard.series[(operation_id, status)] = _Series(len(self.buckets))
+        series.total_buckets[bisect.bisect_left(self.buckets, total_time)] += 1
+        series.total_sum += total_time
+        series.db_buckets[bisect.bisect_left(self.buckets, db_time)] += 1
+        series.db_sum += db_time
+        series.count += 1
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        in_flight: dict[str, int] = {}
+        series: dict[tuple[str, int], _Series] = {}
+        for shard in shards:
+            for operation_id, count in list(shard.in_flight.items()):
+                in_flight[operation_id] = in_flight.get(operation_id, 0) + count
+            for key, shard_series in list(shard.series.items()):
+                merged = series.setdefault(key, _Series(len(self.buckets)))
+                for i in range(len(self.buckets) + 1):
+                    merged.total_buckets[i] += shard_series.total_buckets[i]
+                    merged.db_buckets[i] += shard_series.db_buckets[i]
+                merged.total_sum += shard_series.total_sum
+                merged.db_sum += shard_series.db_sum
+                merged.count += shard_series.count
+
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for operation_id, count in sorted(in_flight.items()):
+            lines.append(
+                f'http_requests_in_flight{{operation_id="{_escape(operation_id)}"}} {count}'
+            )
+
+        for name, help_text, buckets_attr, sum_attr in [
+            (
+                "http_request_duration_seconds",
+                "Time to serve requests.",
+                "total_buckets",
+                "total_sum",
+            ),
+            (
+                "http_request_db_duration_seconds",
+                "Time spent in the database while serving requests.",
+                "db_buckets",
+                "db_sum",
+            ),
+        ]:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (operation_id, status), merged in sorted(series.items()):
+                labels = f'operation_id="{_escape(operation_id)}",status="{status}"'
+                cumulative = 0
+                bucket_counts = getattr(merged, buckets_attr)
+                for bound, count in zip(self.buckets, bucket_counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {merged.count}')
+                lines.append(f"{name}_sum{{{labels}}} {getattr(merged, sum_attr)}")
+                lines.append(f"{name}_count{{{labels}}} {merged.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label_value: str) -> str:
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsMiddleware:
+    """
+    Records each routed request in `metrics`.  Sits after connexion's routing middleware, which
+    identifies the operation; requests that match no operation aren't recorded.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        operation_id = scope.get("extensions", {}).get("connexion_routing", {}).get("operation_id")
+        if scope["type"] != "http" or operation_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+        status = 500
+        start_time = time.perf_counter()
+        self.metrics.start(operation_id)
+
+        async def send_(message: MutableMapping[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_)
+        except Exception as e:
+            # Errors raised here are turned into responses by connexion's exception middleware.
+            status = getattr(e, "status_code", None) or getattr(e, "status", None) or 500
+            raise
+        finally:
+            if token is not None:
+                request_stats.reset(token)
+            self.metrics.finish(
+                operation_id, status, time.perf_counter() - start_time, stats.db_time
+            )
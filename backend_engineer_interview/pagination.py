@@ -0,0 +1,53 @@
+import base64
+import binascii
+import json
+from typing import Literal, NamedTuple
+
+CursorDirection = Literal["next", "prev"]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Cursor(NamedTuple):
+    """
+    Position of a keyset page: rows strictly after (``next``) or strictly before (``prev``)
+    ``last_id``, for the given search term.
+    """
+
+    last_id: int
+    search: str
+    direction: CursorDirection = "next"
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = json.dumps(
+        {"id": cursor.last_id, "search": cursor.search, "dir": cursor.direction},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor(value) from e
+
+    if not isinstance(payload, dict):
+        raise InvalidCursor(value)
+
+    last_id = payload.get("id")
+    search = payload.get("search")
+    direction = payload.get("dir")
+    if (
+        not isinstance(last_id, int)
+        or isinstance(last_id, bool)
+        or not isinstance(search, str)
+        or direction not in ("next", "prev")
+    ):
+        raise InvalidCursor(value)
+
+    return Cursor(last_id=last_id, search=search, direction=direction)
@@ -0,0 +1,450 @@
+import string
+from datetime import date
+from typing import Callable, Iterable, Mapping, NamedTuple, Optional, Sequence
+from urllib.parse import urlencode
+
+from sqlalchemy import ColumnElement, Row, Select, func, select
+from sqlalchemy.orm import contains_eager
+
+from backend_engineer_interview.cache import TTLCache
+from backend_engineer_interview.models import (
+    Application,
+    Employee,
+    application_period,
+    employee_name_fts,
+    employee_public_columns,
+    julian_day,
+)
+from backend_engineer_interview.pagination import (
+    Cursor,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+# The application fields `fields=` can select, with the columns they are read from.  An
+# employee's id is the application's own employee_id, so selecting it needs no join.
+APPLICATION_FIELD_COLUMNS: dict[str, ColumnElement] = {
+    "id": Application.id,
+    "leave_end_date": Application.leave_end_date,
+    "leave_start_date": Application.leave_start_date,
+}
+EMPLOYEE_FIELD_COLUMNS: dict[str, ColumnElement] = {
+    "date_of_birth": Employee.date_of_birth,
+    "first_name": Employee.first_name,
+    "id": Application.employee_id,
+    "last_name": Employee.last_name,
+}
+
+
+class FieldSelection(NamedTuple):
+    """
+    The fields of each application a search returns, as requested with ``fields=``: a
+    comma-separated list of application fields, ``employee`` for all of the employee's, or
+    ``employee.<field>`` for some.  Each tuple is in alphabetical order.
+    """
+
+    application: tuple[str, ...]
+    employee: tuple[str, ...]
+
+    @classmethod
+    def parse(cls, value: str) -> "FieldSelection":
+        application: set[str] = set()
+        employee: set[str] = set()
+        for name in filter(None, (name.strip() for name in value.split(","))):
+            if name == "employee":
+                employee.update(EMPLOYEE_FIELD_COLUMNS)
+            elif name.startswith("employee.") and name[9:] in EMPLOYEE_FIELD_COLUMNS:
+                employee.add(name[9:])
+            elif name in APPLICATION_FIELD_COLUMNS:
+                application.add(name)
+            else:
+                raise InvalidSearch(f"unknown field: {name}")
+        if not application and not employee:
+            raise InvalidSearch("fields cannot be empty")
+        return cls(tuple(sorted(application)), tuple(sorted(employee)))
+
+    @property
+    def joins_employee(self) -> bool:
+        return any(name != "id" for name in self.employee)
+
+    def columns(self) -> list[ColumnElement]:
+        # The application id comes first whether requested or not: pages are keyed by it.
+        return [
+            Application.id,
+            *(APPLICATION_FIELD_COLUMNS[name] for name in self.application if name != "id"),
+            *(EMPLOYEE_FIELD_COLUMNS[name] for name in self.employee),
+        ]
+
+    def items(self, rows: Sequence[Row]) -> list[dict]:
+        """The page's rows of `columns` as the response's application objects."""
+        others = [name for name in self.application if name != "id"]
+        application = [
+            (name, 0 if name == "id" else 1 + others.index(name)) for name in self.application
+        ]
+        if not self.employee:
+            return [{name: row[i] for name, i in application} for row in rows]
+
+        employee = [(name, 1 + len(others) + i) for i, name in enumerate(self.employee)]
+        return [
+            {
+                **{name: row[i] for name, i in application},
+                "employee": {name: row[i] for name, i in employee},
+            }
+            for row in rows
+        ]
+
+    def param(self) -> str:
+        return ",".join([*self.application, *(f"employee.{name}" for name in self.employee)])
+
+
+class SearchPage(NamedTuple):
+    # Application objects, or with `fields`, dicts of the selected fields.
+    applications: list
+    count: Optional[int]
+    limit: int
+    offset: int
+    next: str
+    prev: str
+    fields: Optional[FieldSelection] = None
+
+
+class ApplicationSearch:
+    """
+    The statements for one application search request and the assembly of their results into a
+    page, independent of how the statements are executed (so shared by the sync and async
+    handlers).  Raises InvalidSearch for a cursor that can't be used.
+    """
+
+    path = "/v1/application"
+
+    def __init__(
+        self, args: Mapping[str, str], count_cache: Optional[TTLCache[str, int]] = None
+    ) -> None:
+        self.search: str = args.get("search", "")
+        self.offset: int = int(args.get("offset", 0))
+        self.limit: int = int(args.get("limit", 10))
+        self.include_count: bool = str(args.get("include_count", "true")).lower() != "false"
+        self.count_cache = count_cache
+
+        self.cursor: Optional[Cursor] = None
+        cursor_param = args.get("cursor")
+        if cursor_param:
+            try:
+                self.cursor = decode_cursor(cursor_param)
+            except InvalidCursor:
+                raise InvalidSearch("cursor not valid")
+            if "search" in args and self.search != self.cursor.search:
+                raise InvalidSearch("cursor does not match search")
+            self.search = self.cursor.search
+            self.offset = 0
+
+        self.cached_count: Optional[int] = None
+        # Taken before the search reads anything, so a total counted from a snapshot that a
+        # concurrent write has since invalidated isn't cached.
+        self.count_generation: Optional[int] = None
+        if self.include_count and count_cache is not None:
+            self.count_generation = count_cache.generation
+            self.cached_count = count_cache.get(search_count_key(self.search))
+        self.count_in_query = self.include_count and self.cached_count is None
+
+        # Selected fields are read as plain rows of their columns, skipping the ORM.
+        self.fields: Optional[FieldSelection] = None
+        if "fields" in args:
+            self.fields = FieldSelection.parse(args["fields"])
+
+    @property
+    def joins_employee(self) -> bool:
+        return self.fields is None or self.fields.joins_employee
+
+    def _filtered(self, statement: Select) -> Select:
+        if not self.joins_employee:
+            # Searches by name or id match the application's employee_id instead.  Every
+            # application has its employee, so the joined and unjoined totals agree.
+            if self.search:
+                statement = statement.where(search_filter(self.search, Application.employee_id))
+            return statement
+
+        statement = statement.join(Application.employee)
+        if self.search:
+            statement = statement.where(search_filter(self.search))
+        return statement
+
+    def page_statement(self) -> Select:
+        if self.fields is not None:
+            statement = self._filtered(select(*self.fields.columns()))
+        else:
+            # The employee is loaded from the same joined row, so serializing a page never
+            # issues per-row queries.
+            statement = self._filtered(select(Application)).options(
+                contains_eager(Application.employee).load_only(*employee_public_columns)
+            )
+
+        # The total is returned by the page statement itself: as a window over the filtered set
+        # in offset mode, or as an uncorrelated subquery when the keyset predicate would otherwise
+        # narrow the window.
+        if self.count_in_query and self.cursor is None:
+            statement = statement.add_columns(func.count().over())
+        elif self.count_in_query:
+            statement = statement.add_columns(
+                self.count_statement().scalar_subquery().correlate(None)
+            )
+
+        return self._paged(statement, Application.id)
+
+    def _paged(self, statement: Select, id_column: ColumnElement[int]) -> Select:
+        """``statement`` limited to the page's rows, by ``id_column``, in page order."""
+        # Fetch one extra row so the presence of a following page is known without
+        # comparing against the count.
+        if self.cursor is None:
+            return statement.order_by(id_column).offset(self.offset).limit(self.limit + 1)
+        if self.cursor.direction == "next":
+            return (
+                statement.where(id_column > self.cursor.last_id)
+                .order_by(id_column)
+                .limit(self.limit + 1)
+            )
+        return (
+            statement.where(id_column < self.cursor.last_id)
+            .order_by(id_column.desc())
+            .limit(self.limit + 1)
+        )
+
+    def count_statement(self) -> Select:
+        return self._filtered(select(func.count(Application.id)))
+
+    def needs_count_statement(self, rows: Sequence[Row]) -> bool:
+        """An empty page carries no total; only this case needs the count statement run."""
+        return self.count_in_query and not rows
+
+    def page(self, rows: Sequence[Row], fallback_count: Optional[int] = None) -> SearchPage:
+        # Rows of selected fields keep their id as ``.id``, as Application objects do.
+        page = [row[0] for row in rows] if self.fields is None else list(rows)
+
+        count: Optional[int] = self.cached_count
+        if self.count_in_query:
+            count = rows[0][-1] if rows else fallback_count
+            if self.count_cache is not None and count is not None:
+                self.count_cache.set(
+                    search_count_key(self.search), count, generation=self.count_generation
+                )
+
+        has_more = len(page) > self.limit
+        applications = page[: self.limit]
+        if self.cursor is not None and self.cursor.direction == "prev":
+            applications.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, (self.offset > 0 if self.cursor is None else True)
+
+        next_url = ""
+        prev_url = ""
+        if applications:
+            if has_next:
+                next_url = self._url(Cursor(applications[-1].id, self.search, "next"))
+            if has_prev:
+                prev_url = self._url(Cursor(applications[0].id, self.search, "prev"))
+        elif self.cursor is None and self.offset > 0:
+            prev_url = self._url(None, max(self.offset - self.limit, 0))
+
+        return SearchPage(
+            applications=applications if self.fields is None else self.fields.items(applications),
+            count=count,
+            limit=self.limit,
+            offset=self.offset,
+            next=next_url,
+            prev=prev_url,
+            fields=self.fields,
+        )
+
+    def _url(self, cursor: Optional[Cursor], offset: int = 0) -> str:
+        params: dict[str, object] = (
+            {"cursor": encode_cursor(cursor)}
+            if cursor is not None
+            else {**self._query_params(), "offset": offset}
+        )
+        params["limit"] = self.limit
+        if not self.include_count:
+            params["include_count"] = "false"
+        if self.fields is not None:
+            params["fields"] = self.fields.param()
+        return f"{self.path}?{urlencode(params)}"
+
+    def _query_params(self) -> dict[str, object]:
+        return {"search": self.search}
+
+
+class OverlappingApplicationSearch(ApplicationSearch):
+    """
+    Applications whose leave overlaps the days ``from`` to ``to``, inclusive, paginated like
+    `ApplicationSearch`.  Pages and totals come from the `application_period` R*Tree, which
+    finds the overlapping periods without reading every application.  Cursors carry the range as
+    the search term ``from/to``.
+    """
+
+    path = "/v1/application/overlapping"
+
+    def __init__(self, args: Mapping[str, str]) -> None:
+        if "from" in args or "to" in args:
+            args = {**args, "search": f"{args.get('from', '')}/{args.get('to', '')}"}
+        # Totals aren't cached: the count cache is only invalidated for name and id searches.
+        super().__init__(args)
+
+        if not self.search:
+            raise InvalidSearch("from and to are required")
+        start, _, end = self.search.partition("/")
+        try:
+            self.start = date.fromisoformat(start)
+            self.end = date.fromisoformat(end)
+        except ValueError:
+            raise InvalidSearch("from and to must be dates")
+        if self.start > self.end:
+            raise InvalidSearch("from cannot be after to")
+
+    def _periods(self) -> Select:
+        return select(application_period.c.id).where(
+            application_period.c.start_day <= julian_day(self.end),
+            application_period.c.end_day >= julian_day(self.start),
+        )
+
+    def page_statement(self) -> Select:
+        # The page's ids are picked from the R*Tree, SQLite keeping only the lowest (or highest)
+        # as it goes, so only the page's own applications are read however many overlap.
+        in_page = Application.id.in_(self._paged(self._periods(), application_period.c.id))
+        if self.fields is not None:
+            statement = select(*self.fields.columns()).where(in_page)
+            if self.fields.joins_employee:
+                statement = statement.join(Application.employee)
+        else:
+            statement = (
+                select(Application)
+                .join(Application.employee)
+                .where(in_page)
+                .options(contains_eager(Application.employee).load_only(*employee_public_columns))
+            )
+        if self.count_in_query:
+            statement = statement.add_columns(
+                self.count_statement().scalar_subquery().correlate(None)
+            )
+
+        if self.cursor is not None and self.cursor.direction == "prev":
+            return statement.order_by(Application.id.desc())
+        return statement.order_by(Application.id)
+
+    def count_statement(self) -> Select:
+        # Counted from the R*Tree alone, without reading the applications.
+        return select(func.count()).select_from(self._periods().subquery())
+
+    def _query_params(self) -> dict[str, object]:
+        return {"from": self.start.isoformat(), "to": self.end.isoformat()}
+
+
+def search_filter(
+    search: str, employee_id: ColumnElement[int] = Employee.id
+) -> ColumnElement[bool]:
+    """
+    Filter applications by employee id (numeric search) or by a case-insensitive substring of the
+    employee's first or last name, matched against ``employee_id``: the joined employee's id, or
+    the application's own employee_id when the employee isn't joined.
+    """
+    if search.isdigit():
+        return employee_id == int(search)
+
+    if _name_index_answers(search):
+        phrase = '"' + search.replace('"', '""') + '"'
+        return employee_id.in_(
+            select(employee_name_fts.c.rowid).where(
+                employee_name_fts.c.employee_name_fts.match(phrase)
+            )
+        )
+
+    # Matching employees are found first, so applications are reached through their employee_id
+    # index rather than scanned.  SQLite's LIKE already ignores (ASCII) case, as its lower() only
+    # folds ASCII: this matches what ILIKE would, without two lower() calls per name.
+    return employee_id.in_(
+        select(Employee.id).where(
+            Employee.first_name.like(f"%{search}%") | Employee.last_name.like(f"%{search}%")
+        )
+    )
+
+
+def _name_index_answers(search: str) -> bool:
+    # The trigram index can only answer terms of at least three characters, and treats LIKE
+    # wildcards literally; anything else falls back to scanning employee names.
+    return len(search) >= 3 and not any(c in search for c in "%_")
+
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _fold_case(text: str, unicode: bool) -> str:
+    return text.lower() if unicode else text.translate(_ASCII_LOWER)
+
+
+def search_count_key(search: str) -> str:
+    """Normalize a search term to the key its total is cached under."""
+    if search.isdigit():
+        return str(int(search))
+    # The trigram index folds case across Unicode, while LIKE folds only ASCII letters (so "É"
+    # and "é" match different names there): terms share a key only if they match alike.
+    return _fold_case(search, unicode=_name_index_answers(search))
+
+
+def _name_term_matcher(names: Iterable[str]) -> Callable[[str], bool]:
+    """Whether the name search cached under a key may match any of ``names``."""
+    names = list(names)
+    # Names joined by a separator no search term can span, folded as each kind of term is.
+    # Folding never shortens a term, and only terms the index can't answer keep their length,
+    # so a key still tells which way its term was matched.
+    haystacks = {
+        unicode: "\0".join(_fold_case(name, unicode) for name in names) for unicode in (True, False)
+    }
+
+    def may_match(key: str) -> bool:
+        # Terms with LIKE wildcards are matched by pattern, so can't be ruled out by substring.
+        if "%" in key or "_" in key:
+            return True
+        return key in haystacks[_name_index_answers(key)]
+
+    return may_match
+
+
+def invalidate_search_counts_for_applications(
+    count_cache: Optional[TTLCache[str, int]], employees: dict[int, tuple[str, str]]
+) -> None:
+    """
+    Drop cached totals for every search that new applications of these employees (keyed by id,
+    with their first and last names) are counted in.
+    """
+    if count_cache is None:
+        return
+
+    employee_ids = {str(employee_id) for employee_id in employees}
+    name_may_match = _name_term_matcher(name for pair in employees.values() for name in pair)
+
+    def affected(key: str) -> bool:
+        if key == "":
+            return True
+        if key.isdigit():
+            return key in employee_ids
+        return name_may_match(key)
+
+    count_cache.invalidate_where(affected)
+
+
+def invalidate_search_counts_for_rename(
+    count_cache: Optional[TTLCache[str, int]], names: Iterable[str]
+) -> None:
+    """Drop cached totals for name searches matching renamed employees' old or new names."""
+    if count_cache is None:
+        return
+
+    name_may_match = _name_term_matcher(names)
+    count_cache.invalidate_where(
+        lambda key: key != "" and not key.isdigit() and name_may_match(key)
+    )
@@ -0,0 +1,300 @@
+"""
+Generates synthetic employees and leave applications.  Output is deterministic for a given seed,
+and rows are written with bulk Core inserts, a batch per transaction.
+
+A database with a million applications takes about 40 seconds to build, and only about 10 of
+those are the inserts.  Their leave is indexed in the `application_period` R*Tree in one statement
+after the load, but SQLite still adds each entry to an R*Tree on its own, which takes about 20
+seconds; totalling their leave usage takes the rest:
+
+    python -m backend_engineer_interview.seed --db-name app --employees 100000 --applications 1000000
+"""
+
+import argparse
+import logging
+import random
+import time
+from contextlib import contextmanager
+from datetime import date
+from itertools import accumulate, islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import Connection, Dialect, Engine, Integer, Table, cast, func, insert, select
+
+from backend_engineer_interview.app import EngineConfig, init_db
+from backend_engineer_interview.leave_usage import rebuild_leave_usage
+from backend_engineer_interview.models import Application, Employee, application_period
+
+# Common names, most frequent first; picked with weights falling off with rank, so a few names are
+# shared by many employees and searches by name return pages of varying size.
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David",
+    "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+    "Charles", "Karen", "Christopher", "Lisa", "Daniel", "Nancy", "Matthew", "Betty", "Anthony",
+    "Sandra", "Mark", "Margaret", "Donald", "Ashley", "Steven", "Kimberly", "Paul", "Emily",
+    "Andrew", "Donna", "Joshua", "Michelle", "Kenneth", "Carol", "Kevin", "Amanda", "Brian",
+    "Melissa", "George", "Deborah", "Timothy", "Stephanie", "Ronald", "Rebecca", "Jason", "Sharon",
+    "Edward", "Laura", "Jeffrey", "Cynthia", "Ryan", "Dorothy", "Jacob", "Amy", "Gary", "Kathleen",
+    "Nicholas", "Angela", "Eric", "Shirley", "Jonathan", "Emma", "Stephen", "Brenda", "Larry",
+    "Pamela", "Justin", "Nicole", "Scott", "Anna", "Brandon", "Samantha", "Benjamin", "Katherine",
+    "Samuel", "Christine", "Gregory", "Debra", "Alexander", "Rachel", "Patrick", "Carolyn", "Frank",
+    "Janet", "Raymond", "Maria", "Jack", "Olivia", "Dennis", "Heather", "Jerry", "Helen", "Ringo",
+    "Yoko",
+]  # fmt: skip
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+    "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore",
+    "Jackson", "Martin", "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark",
+    "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres",
+    "Nguyen", "Hill", "Flores", "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell",
+    "Mitchell", "Carter", "Roberts", "Gomez", "Phillips", "Evans", "Turner", "Diaz", "Parker",
+    "Cruz", "Edwards", "Collins", "Reyes", "Stewart", "Morris", "Morales", "Murphy", "Cook",
+    "Rogers", "Gutierrez", "Ortiz", "Morgan", "Cooper", "Peterson", "Bailey", "Reed", "Kelly",
+    "Howard", "Ramos", "Kim", "Cox", "Ward", "Richardson", "Watson", "Brooks", "Chavez", "Wood",
+    "James", "Bennett", "Gray", "Mendoza", "Ruiz", "Hughes", "Price", "Alvarez", "Castillo",
+    "Sanders", "Patel", "Myers", "Long", "Ross", "Foster", "Lennon", "McCartney", "Harrison",
+    "Starr", "Ono",
+]  # fmt: skip
+
+# Cumulative weights falling off with rank, precomputed for `random.choices`.
+FIRST_NAME_WEIGHTS = list(accumulate(1 / rank for rank in range(1, len(FIRST_NAMES) + 1)))
+LAST_NAME_WEIGHTS = list(accumulate(1 / rank for rank in range(1, len(LAST_NAMES) + 1)))
+
+# Relative frequency of leave starting in each month: summer holidays and the end of the year.
+MONTH_WEIGHTS = list(accumulate([6, 5, 7, 8, 8, 11, 14, 14, 8, 7, 6, 12]))
+
+# Leave lengths in days, as (shortest, longest) with their relative frequency: mostly a few days
+# off, some longer holidays, and occasional long medical or parental leave.
+LEAVE_LENGTHS = [(1, 5), (6, 15), (16, 60), (61, 180)]
+LEAVE_LENGTH_WEIGHTS = list(accumulate([60, 30, 8, 2]))
+
+DEFAULT_BATCH_SIZE = 50_000
+
+# Rows are generated a chunk of this size at a time, drawing each column with one call; the
+# chunk size is fixed so the output for a seed doesn't depend on the insert batch size.
+_CHUNK_SIZE = 10_000
+
+
+class SeededEmployees(NamedTuple):
+    # Ids are assigned after the highest existing id, so the generated employees are contiguous.
+    employee_ids: range
+    applications: int
+
+
+# Rows are generated as tuples of these columns, in table order, and handed to the driver as they
+# are: SQLAlchemy's per-row parameter processing would otherwise cost more than the inserts.
+# Dates are generated in the ISO format SQLAlchemy stores them in.
+EMPLOYEE_COLUMNS = ("id", "first_name", "last_name", "date_of_birth", "secret")
+APPLICATION_COLUMNS = ("leave_start_date", "leave_end_date", "employee_id")
+
+
+def employee_rows(rng: random.Random, employee_ids: range, today: date) -> Iterator[tuple]:
+    """Employees of working age, with names drawn from `FIRST_NAMES` and `LAST_NAMES`."""
+    today_ordinal = today.toordinal()
+    for offset in range(0, len(employee_ids), _CHUNK_SIZE):
+        chunk = employee_ids[offset : offset + _CHUNK_SIZE]
+        first_names = rng.choices(FIRST_NAMES, cum_weights=FIRST_NAME_WEIGHTS, k=len(chunk))
+        last_names = rng.choices(LAST_NAMES, cum_weights=LAST_NAME_WEIGHTS, k=len(chunk))
+        for employee_id, first_name, last_name in zip(chunk, first_names, last_names):
+            age_days = int(rng.triangular(18, 67, 38) * 365.25)
+            yield (
+                employee_id,
+                first_name,
+                last_name,
+                date.fromordinal(today_ordinal - age_days).isoformat(),
+                f"{rng.getrandbits(64):016x}",
+            )
+
+
+def application_rows(
+    rng: random.Random, employee_ids: range, count: int, first_year: int, years: int
+) -> Iterator[tuple]:
+    """
+    Leave applications over ``years`` years from ``first_year``, seasonally weighted, an employee
+    at a time.  Each employee's leave is drawn, sorted, and moved later where it would start less
+    than a day after their previous leave ends, so it never overlaps, as the API requires.  Leave
+    moved later from the end of the years may start after them, as may most of an employee's if
+    more than fits was drawn.
+    """
+    # Every start and end date, formatted once, extended if leave is moved past the last.
+    first_day = date(first_year, 1, 1).toordinal()
+    last_day = date(first_year + years - 1, 12, 28).toordinal() + LEAVE_LENGTHS[-1][1]
+    days = [date.fromordinal(ordinal).isoformat() for ordinal in range(first_day, last_day)]
+    month_starts = [
+        [date(year, month, 1).toordinal() - first_day for month in range(1, 13)]
+        for year in range(first_year, first_year + years)
+    ]
+
+    def leave() -> Iterator[tuple[int, int]]:
+        # Start days (from ``first_day``) and lengths, independent of the employee.
+        random_float = rng.random
+        for remaining in range(count, 0, -_CHUNK_SIZE):
+            size = min(remaining, _CHUNK_SIZE)
+            years_ = rng.choices(month_starts, k=size)
+            months = rng.choices(range(12), cum_weights=MONTH_WEIGHTS, k=size)
+            lengths = rng.choices(LEAVE_LENGTHS, cum_weights=LEAVE_LENGTH_WEIGHTS, k=size)
+            for year, month, (shortest, longest) in zip(years_, months, lengths):
+                yield (
+                    year[month] + int(28 * random_float()),
+                    shortest + int((longest - shortest + 1) * random_float()),
+                )
+
+    counts = [0] * len(employee_ids)
+    for remaining in range(count, 0, -_CHUNK_SIZE):
+        for index in rng.choices(range(len(employee_ids)), k=min(remaining, _CHUNK_SIZE)):
+            counts[index] += 1
+
+    draws = leave()
+    for employee_id, employee_count in zip(employee_ids, counts):
+        previous_end = -2
+        for start, length in sorted(islice(draws, employee_count)):
+            start = max(start, previous_end + 2)
+            previous_end = start + length - 1
+            while previous_end >= len(days):
+                days.append(date.fromordinal(first_day + len(days)).isoformat())
+            yield (days[start], days[previous_end], employee_id)
+
+
+def insert_statement(table: Table, columns: tuple[str, ...], dialect: Dialect) -> str:
+    """The Core insert of ``columns`` into ``table``, compiled once for the driver's executemany."""
+    compiled = insert(table).compile(dialect=dialect, column_keys=list(columns))
+    if tuple(compiled.positiontup or ()) != columns:
+        raise ValueError(f"Columns {columns} are not in {table.name}'s column order")
+    return str(compiled)
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _write(engine: Engine) -> Connection:
+    return engine.connect().execution_options(sqlite_begin="IMMEDIATE")
+
+
+@contextmanager
+def _application_period_deferred(engine: Engine) -> Iterator[None]:
+    """
+    Drop the triggers that index each application in the `application_period` R*Tree as it is
+    inserted, for the duration of the block, then index every application added meanwhile with
+    one statement and recreate them.  Inserting into the R*Tree a row at a time costs far more
+    than the applications themselves.
+
+    Applications written by anyone else in the meantime are indexed along with the generated
+    ones; until then, neither kind is found through the R*Tree.
+    """
+    with _write(engine) as connection:
+        with connection.begin():
+            triggers = connection.exec_driver_sql(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE type = 'trigger' AND name GLOB 'application_period_*'"
+            ).all()
+            for name, _ in triggers:
+                connection.exec_driver_sql(f'DROP TRIGGER "{name}"')
+            max_application_id = connection.scalar(
+                select(func.coalesce(func.max(Application.id), 0))
+            )
+    try:
+        yield
+    finally:
+        with _write(engine) as connection:
+            with connection.begin():
+                connection.execute(
+                    insert(application_period).from_select(
+                        ["id", "start_day", "end_day"],
+                        select(
+                            Application.id,
+                            cast(func.julianday(Application.leave_start_date), Integer),
+                            cast(func.julianday(Application.leave_end_date), Integer),
+                        ).where(
+                            Application.id > max_application_id,
+                            # A period entered back to front has no box, as in the triggers.
+                            Application.leave_start_date <= Application.leave_end_date,
+                        ),
+                    )
+                )
+                for _, sql in triggers:
+                    connection.exec_driver_sql(sql)
+
+
+def seed_database(
+    engine: Engine,
+    employees: int,
+    applications: int,
+    seed: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    first_year: int = 2020,
+    years: int = 5,
+    today: Optional[date] = None,
+) -> SeededEmployees:
+    """
+    Add ``employees`` employees and ``applications`` applications spread across them to the
+    migrated database behind ``engine``.  Each batch is inserted in its own write transaction.
+    """
+    if applications and not employees:
+        raise ValueError("Applications are spread across the generated employees; add some")
+
+    rng = random.Random(seed)
+    with engine.connect() as connection:
+        max_employee_id = connection.scalar(select(func.coalesce(func.max(Employee.id), 0)))
+    employee_ids = range(max_employee_id + 1, max_employee_id + employees + 1)
+
+    def insert_batches(table: Table, columns: tuple[str, ...], rows: Iterable[tuple]) -> None:
+        statement = insert_statement(table, columns, engine.dialect)
+        for batch in _batches(rows, batch_size):
+            with _write(engine) as connection:
+                with connection.begin():
+                    connection.exec_driver_sql(statement, batch)
+
+    insert_batches(
+        Employee.__table__,  # type: ignore
+        EMPLOYEE_COLUMNS,
+        employee_rows(rng, employee_ids, today or date(2024, 1, 1)),
+    )
+    if applications:
+        with _application_period_deferred(engine):
+            insert_batches(
+                Application.__table__,  # type: ignore
+                APPLICATION_COLUMNS,
+                application_rows(rng, employee_ids, applications, first_year, years),
+            )
+
+    # The applications were inserted beneath the handlers that keep the leave usage totals, so
+    # total them in one pass; the generated employees had no applications before.
+    if applications:
+        rebuild_leave_usage(engine, employee_ids)
+
+    return SeededEmployees(employee_ids, applications)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db-name", default="app", help="database to seed, as passed to init_db")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--applications", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # The database is rebuilt from the seed if lost, so it needn't be synced to disk per commit.
+    session_factory = init_db(
+        args.db_name, EngineConfig(synchronous="OFF", slow_query_threshold_ms=None)
+    )
+    engine = session_factory.get_bind()
+    session_factory.remove()
+
+    start = time.perf_counter()
+    seeded = seed_database(
+        engine, args.employees, args.applications, seed=args.seed, batch_size=args.batch_size
+    )
+    print(
+        f"Added {len(seeded.employee_ids)} employees (ids {seeded.employee_ids.start} to "
+        f"{seeded.employee_ids.stop - 1}) and {seeded.applications} applications "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
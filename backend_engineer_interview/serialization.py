@@ -0,0 +1,33 @@
+import json
+from typing import Any, Optional, TypeVar
+
+import pydantic
+from connexion.lifecycle import ConnexionResponse  # type: ignore
+
+T = TypeVar("T")
+
+
+def dump_json(adapter: pydantic.TypeAdapter[T], value: T) -> bytes:
+    """
+    Encode a value to JSON bytes in the same layout connexion's jsonifier writes (two-space indent,
+    sorted keys, ASCII only, trailing newline), straight from pydantic's serializer.
+
+    Response models declare their fields in alphabetical order for this, so only bodies with
+    non-ASCII text need re-encoding to escape it.
+    """
+    body = adapter.dump_json(value, indent=2)
+    if not body.isascii():
+        body = json.dumps(json.loads(body), indent=2, sort_keys=True).encode()
+    return body + b"\n"
+
+
+def json_response(
+    body: bytes, status_code: int = 200, headers: Optional[dict[str, Any]] = None
+) -> ConnexionResponse:
+    """A response for an already encoded JSON body, which connexion passes through untouched."""
+    return ConnexionResponse(
+        status_code=status_code,
+        content_type="application/json",
+        body=body,
+        headers=headers,
+    )
@@ -0,0 +1,93 @@
+"""
+Loads the OpenAPI specification the apps are built from.  Parsing the YAML is most of the time
+`create_app` takes, so the parsed spec is kept as JSON, in memory and in a `__pycache__` file next
+to the spec, keyed by a hash of the spec's contents: an edited spec is parsed afresh, and each
+worker process or test reuses the parse instead of repeating it.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# The C loader, when PyYAML was built with libyaml, parses several times faster.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed specs as JSON text, keyed by the SHA-256 of the spec file.  Decoding the JSON gives each
+# app its own copy to mutate, for a fraction of the cost of parsing the YAML or a deepcopy.
+_parsed: dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def spec_hash(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()
+
+
+def cache_path(spec_path: str, key: str, cache_dir: Optional[str] = None) -> str:
+    """Where the parse of the spec at ``spec_path`` with hash ``key`` is cached on disk."""
+    directory = cache_dir or os.path.join(
+        os.path.dirname(os.path.abspath(spec_path)), "__pycache__"
+    )
+    name = os.path.splitext(os.path.basename(spec_path))[0]
+    return os.path.join(directory, f"{name}.{key[:16]}.json")
+
+
+def clear_cache(spec_path: str, cache_dir: Optional[str] = None) -> None:
+    """Forget every parse of the spec at ``spec_path``, in memory and on disk."""
+    with _lock:
+        _parsed.clear()
+        for path in glob.glob(cache_path(spec_path, "*", cache_dir)):
+            os.remove(path)
+
+
+def _read_cache(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        json.loads(text)
+    except (OSError, ValueError):
+        return None
+    return text
+
+
+def _write_cache(path: str, text: str) -> None:
+    # Written to a temporary file and renamed into place, so concurrently starting workers never
+    # read a partial file.  A read-only checkout just goes without the on-disk cache.
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temporary_path, path)
+    except OSError:
+        logger.debug("Could not cache the parsed spec at %s", path, exc_info=True)
+
+
+def load_spec(path: str, cache_dir: Optional[str] = None) -> dict:
+    """
+    The spec at ``path``, parsed, for `add_api`.  Each call returns a fresh copy; the spec isn't
+    rendered as a Jinja2 template the way connexion loads spec files, as ours has no arguments.
+    """
+    with open(path, "rb") as f:
+        contents = f.read()
+    key = spec_hash(contents)
+
+    with _lock:
+        text = _parsed.get(key)
+        if text is None:
+            on_disk = cache_path(path, key, cache_dir)
+            text = _read_cache(on_disk)
+            if text is None:
+                text = json.dumps(yaml.load(contents, Loader=_YAML_LOADER))
+                _write_cache(on_disk, text)
+            _parsed[key] = text
+
+    return json.loads(text)
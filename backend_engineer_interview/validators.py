@@ -0,0 +1,151 @@
+import itertools
+import json
+import logging
+import threading
+import typing as t
+from dataclasses import dataclass
+
+from connexion.datastructures import MediaTypeDict  # type: ignore
+from connexion.exceptions import NonConformingResponseBody  # type: ignore
+from connexion.json_schema import Draft4ResponseValidator  # type: ignore
+from connexion.validators import VALIDATOR_MAP, JSONResponseBodyValidator  # type: ignore
+from jsonschema import Draft4Validator
+from starlette.types import Send
+
+logger = logging.getLogger(__name__)
+
+ResponseValidationMode = t.Literal["full", "sampled", "off"]
+
+
+@dataclass(frozen=True)
+class ResponseValidation:
+    """
+    How much of the app's response traffic is validated against `openapi.yaml`: every response
+    (``full``, for tests and development), one in ``sample_every`` responses with violations logged
+    rather than failing the response (``sampled``), or none (``off``).
+    """
+
+    mode: ResponseValidationMode = "full"
+    sample_every: int = 100
+
+    def __post_init__(self) -> None:
+        if self.mode not in ("full", "sampled", "off"):
+            raise ValueError(f"Unknown response validation mode {self.mode}")
+        if self.sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+
+
+_compiled_validators: dict[int, tuple[dict, Draft4Validator]] = {}
+_compiled_validators_lock = threading.Lock()
+
+
+def compiled_validator(schema: dict) -> Draft4Validator:
+    """
+    Get the validator for a response schema, compiling it on first use.  Connexion hands each
+    response the same schema object for a given operation, status and content type, so the key
+    is the object's identity; the entry holds a reference so the id can't be reused.
+    """
+    entry = _compiled_validators.get(id(schema))
+    if entry is None:
+        with _compiled_validators_lock:
+            entry = _compiled_validators.get(id(schema))
+            if entry is None:
+                validator = Draft4ResponseValidator(
+                    schema, format_checker=Draft4Validator.FORMAT_CHECKER
+                )
+                entry = _compiled_validators[id(schema)] = (schema, validator)
+    return entry[1]
+
+
+class CompiledJSONResponseBodyValidator(JSONResponseBodyValidator):
+    """Validates JSON responses with validators compiled once per schema, instead of per response."""
+
+    @property
+    def validator(self) -> Draft4Validator:
+        return compiled_validator(self._schema)
+
+
+class NDJSONResponseBodyValidator(CompiledJSONResponseBodyValidator):
+    """
+    Validates each line of a newline-delimited JSON response against the response schema as the
+    body streams through, instead of buffering the whole body like the JSON validator does.
+    """
+
+    def wrap_send(self, send: Send) -> Send:
+        pending = b""
+
+        def validate_line(line: bytes) -> None:
+            if not line.strip():
+                return
+            try:
+                body = json.loads(line.decode(self._encoding))
+            except ValueError as e:
+                raise NonConformingResponseBody(str(e))
+            self._validate(body)
+
+        async def send_(message: t.MutableMapping[str, t.Any]) -> None:
+            nonlocal pending
+
+            if message["type"] == "http.response.body":
+                *lines, pending = (pending + message.get("body", b"")).split(b"\n")
+                for line in lines:
+                    validate_line(line)
+                if not message.get("more_body", False):
+                    validate_line(pending)
+                    pending = b""
+
+            await send(message)
+
+        return send_
+
+
+def sampled_validator(
+    validator_cls: type[JSONResponseBodyValidator], sample: t.Callable[[], bool]
+) -> type[JSONResponseBodyValidator]:
+    """
+    A subclass of ``validator_cls`` that only validates responses for which ``sample()`` is true,
+    and logs violations instead of failing the response.
+    """
+
+    class SampledValidator(validator_cls):  # type: ignore
+        def wrap_send(self, send: Send) -> Send:
+            if not sample():
+                return send
+            return super().wrap_send(send)
+
+        def _validate(self, body: t.Any) -> None:
+            try:
+                super()._validate(body)
+            except NonConformingResponseBody as e:
+                logger.error(
+                    "Sampled response does not conform to specification: %s",
+                    e.detail,
+                    extra={"validator": "body", "path": self._scope.get("path")},
+                )
+
+    SampledValidator.__name__ = f"Sampled{validator_cls.__name__}"
+    return SampledValidator
+
+
+def response_validator_map(validation: ResponseValidation) -> dict:
+    """
+    Connexion's default response validators with compiled schemas, plus line-by-line validation
+    for NDJSON responses (which would otherwise match the buffering `*/*json` validator), sampled
+    according to ``validation``.
+    """
+    validators: dict[str, type[JSONResponseBodyValidator]] = {
+        "*/*json": CompiledJSONResponseBodyValidator,
+        "application/x-ndjson": NDJSONResponseBodyValidator,
+    }
+    if validation.mode == "sampled":
+        counter = itertools.count()
+
+        def sample() -> bool:
+            return next(counter) % validation.sample_every == 0
+
+        validators = {
+            media_type: sampled_validator(validator_cls, sample)
+            for media_type, validator_cls in validators.items()
+        }
+
+    return {"response": MediaTypeDict({**VALIDATOR_MAP["response"], **validators})}
@@ -0,0 +1,246 @@
+"""
+Drives the API's core operations against a seeded dataset, in-process through connexion's test
+client and over HTTP through uvicorn, and reports throughput and latency percentiles.  Results are
+written as JSON so runs on different commits can be diffed with `python -m benchmarks.compare`.
+
+    python -m benchmarks.api --employees 100000 --applications 1000000 --requests 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import httpx
+import uvicorn
+
+from backend_engineer_interview.app import EngineConfig, create_app
+from backend_engineer_interview.async_app import create_async_app
+from backend_engineer_interview.validators import ResponseValidation
+from backend_engineer_interview.seed import FIRST_NAMES, LAST_NAMES
+from benchmarks.dataset import seeded_db
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    body: Optional[Any] = None
+
+
+class Operation(NamedTuple):
+    name: str
+    request: Callable[[random.Random], Request]
+
+
+def operations(employee_ids: range) -> list[Operation]:
+    """The operations the benchmark drives, each with a generator of representative requests."""
+
+    def employee_id(rng: random.Random) -> int:
+        return rng.choice(employee_ids)
+
+    def post_application(rng: random.Random) -> Request:
+        start = date(2030, 1, 1) + timedelta(days=rng.randrange(365 * 20))
+        return Request(
+            "POST",
+            "/v1/application",
+            {
+                "leave_start_date": start.isoformat(),
+                "leave_end_date": (start + timedelta(days=rng.randrange(1, 30))).isoformat(),
+                "employee_id": employee_id(rng),
+            },
+        )
+
+    def search_application(rng: random.Random) -> Request:
+        search = rng.choice(
+            [str(employee_id(rng)), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)[:4]]
+        )
+        return Request("GET", f"/v1/application?search={search}&limit=10")
+
+    return [
+        Operation("status", lambda rng: Request("GET", "/v1/status")),
+        Operation("get_employee", lambda rng: Request("GET", f"/v1/employee/{employee_id(rng)}")),
+        Operation(
+            "patch_employee",
+            lambda rng: Request(
+                "PATCH", f"/v1/employee/{employee_id(rng)}", {"first_name": rng.choice(FIRST_NAMES)}
+            ),
+        ),
+        Operation("post_application", post_application),
+        Operation("search_application", search_application),
+    ]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms": {
+            "mean": statistics.mean(latencies),
+            "p50": percentiles[49],
+            "p90": percentiles[89],
+            "p99": percentiles[98],
+            "max": max(latencies),
+        },
+    }
+
+
+def run_in_process(app: Any, requests: list[Request]) -> dict:
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for request in requests:
+        request_start = time.perf_counter()
+        response = client.request(request.method, request.path, json=request.body)
+        latencies.append(1000 * (time.perf_counter() - request_start))
+        errors += response.status_code >= 400
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+@contextmanager
+def uvicorn_server(app: Any) -> Iterator[str]:
+    """Serve ``app`` with uvicorn on a free local port for the duration of the block."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    host, port = server.servers[0].sockets[0].getsockname()[:2]
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def run_over_http(base_url: str, requests: list[Request], concurrency: int) -> dict:
+    local = threading.local()
+
+    def send(request: Request) -> tuple[float, bool]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=base_url)
+        request_start = time.perf_counter()
+        response = client.request(request.method, request.path, json=request.body)
+        return 1000 * (time.perf_counter() - request_start), response.status_code >= 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(send, requests))
+    elapsed = time.perf_counter() - start
+
+    return summarize(
+        [latency for latency, _ in results], sum(error for _, error in results), elapsed
+    )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--applications", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=1000, help="timed requests per operation")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed requests per operation")
+    parser.add_argument("--concurrency", type=int, default=8, help="HTTP client threads")
+    parser.add_argument("--apps", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument(
+        "--transports", nargs="+", choices=["in-process", "http"], default=["in-process", "http"]
+    )
+    parser.add_argument("--response-validation", choices=["full", "sampled", "off"], default="full")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    commit = git_commit()
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{commit or 'unknown'}-{int(time.time())}.json"
+    )
+
+    app_factories = {"sync": create_app, "async": create_async_app}
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        seed_start = time.perf_counter()
+        dataset = seeded_db(directory, args.employees, args.applications, args.seed)
+        print(f"Seeded dataset in {time.perf_counter() - seed_start:.1f}s")
+
+        for app_mode in args.apps:
+            for transport in args.transports:
+                # Each app gets a fresh one, so caches start cold for every run.
+                app = app_factories[app_mode](
+                    dataset.db_name,
+                    engine_config=EngineConfig(slow_query_threshold_ms=None),
+                    response_validation=ResponseValidation(args.response_validation),
+                )
+                rng = random.Random(args.seed)
+                context = uvicorn_server(app) if transport == "http" else nullcontext(None)
+                with context as base_url:
+                    for operation in operations(dataset.employee_ids):
+                        warmup = [operation.request(rng) for _ in range(args.warmup)]
+                        timed = [operation.request(rng) for _ in range(args.requests)]
+                        if base_url is None:
+                            run_in_process(app, warmup)
+                            result = run_in_process(app, timed)
+                        else:
+                            run_over_http(base_url, warmup, args.concurrency)
+                            result = run_over_http(base_url, timed, args.concurrency)
+
+                        results.append(
+                            {
+                                "app": app_mode,
+                                "transport": transport,
+                                "operation": operation.name,
+                                **result,
+                            }
+                        )
+                        latency = result["latency_ms"]
+                        print(
+                            f"{app_mode:<6}{transport:<11}{operation.name:<20}"
+                            f"{result['throughput_rps']:>9.0f} req/s"
+                            f"  p50 {latency['p50']:>7.2f}ms  p99 {latency['p99']:>7.2f}ms"
+                            f"  errors {result['errors']}"
+                        )
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "commit": commit,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "args": vars(args),
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compares two `benchmarks.api` results files, typically from runs on different commits, showing
+the change in throughput and latency for each app mode, transport and operation they share.
+
+    python -m benchmarks.compare benchmarks/results/<before>.json benchmarks/results/<after>.json
+"""
+
+import argparse
+import json
+
+
+def load(path: str) -> tuple[dict, dict]:
+    with open(path) as f:
+        run = json.load(f)
+    return run["meta"], {
+        (result["app"], result["transport"], result["operation"]): result
+        for result in run["results"]
+    }
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{100 * (after - before) / before:+.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    before_meta, before = load(args.before)
+    after_meta, after = load(args.after)
+    print(f"{before_meta['commit']} -> {after_meta['commit']}")
+    print(
+        f"{'app':<7}{'transport':<12}{'operation':<20}"
+        f"{'req/s':>10}{'change':>9}{'p50 ms':>10}{'change':>9}{'p99 ms':>10}{'change':>9}"
+    )
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        app, transport, operation = key
+        print(
+            f"{app:<7}{transport:<12}{operation:<20}"
+            f"{new['throughput_rps']:>10.0f}"
+            f"{change(old['throughput_rps'], new['throughput_rps']):>9}"
+            f"{new['latency_ms']['p50']:>10.2f}"
+            f"{change(old['latency_ms']['p50'], new['latency_ms']['p50']):>9}"
+            f"{new['latency_ms']['p99']:>10.2f}"
+            f"{change(old['latency_ms']['p99'], new['latency_ms']['p99']):>9}"
+        )
+
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"{' '.join(key)}: only in {args.before if key in before else args.after}")
+
+
+if __name__ == "__main__":
+    main()
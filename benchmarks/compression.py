@@ -0,0 +1,98 @@
+"""
+Measures the CPU cost of compressing responses against the bytes it saves, for each available
+encoding at a range of levels: a search page, an NDJSON export compressed as a stream (flushed
+after every batch of rows, as the middleware sends it) and a single employee.  Bodies are fetched
+uncompressed from the app over a seeded dataset, then compressed in process.
+
+    python -m benchmarks.compression --applications 100000 --limit 500
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from backend_engineer_interview import handlers
+from backend_engineer_interview.app import EngineConfig, create_app
+from backend_engineer_interview.compression import CODECS, Codec, CompressionConfig
+from benchmarks.dataset import seeded_db
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 6, 11], "zstd": [1, 3, 9, 19]}
+
+
+def compressed_size(codec: Codec, level: int, chunks: list[bytes]) -> int:
+    """The compressed size of a body, compressed whole if it's one chunk, else as a stream."""
+    if len(chunks) == 1:
+        return len(codec.compress(chunks[0], level))
+    compressor = codec.stream(level)
+    return sum(len(compressor.compress(chunk)) for chunk in chunks) + len(compressor.finish())
+
+
+def cpu_ms(codec: Codec, level: int, chunks: list[bytes], runs: int) -> tuple[float, int]:
+    """Median CPU milliseconds to compress the body, and its compressed size."""
+    timings = []
+    for _ in range(runs):
+        start = time.process_time()
+        size = compressed_size(codec, level, chunks)
+        timings.append(1000 * (time.process_time() - start))
+    return statistics.median(timings), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--applications", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--export-search", default="Smith", help="search term for the export")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = seeded_db(directory, args.employees, args.applications)
+        client = create_app(
+            dataset.db_name,
+            engine_config=EngineConfig(slow_query_threshold_ms=None),
+            compression=CompressionConfig(enabled=False),
+        ).test_client()
+        identity = {"Accept-Encoding": "identity"}
+        search_page = client.get(f"/v1/application?limit={args.limit}", headers=identity).content
+        export = client.get(
+            f"/v1/application/export?search={args.export_search}", headers=identity
+        ).content
+        employee = client.get(f"/v1/employee/{dataset.employee_ids[0]}", headers=identity).content
+
+    # The export as the middleware receives it, a batch of rows at a time.
+    lines = export.splitlines(keepends=True)
+    export_chunks = [
+        b"".join(lines[i : i + handlers.EXPORT_BATCH_SIZE])
+        for i in range(0, len(lines), handlers.EXPORT_BATCH_SIZE)
+    ]
+    bodies = {
+        "search page": [search_page],
+        "export (stream)": export_chunks,
+        "employee": [employee],
+    }
+
+    print(f"Medians of {args.runs} runs; encodings available: {', '.join(CODECS)}")
+    print(
+        f"{'body':<17}{'encoding':<10}{'level':>6}{'bytes':>10}{'compressed':>12}{'saved':>8}"
+        f"{'cpu ms':>9}{'MB/s':>8}{'ms per MB saved':>17}"
+    )
+    for label, chunks in bodies.items():
+        size = sum(len(chunk) for chunk in chunks)
+        for encoding, codec in CODECS.items():
+            for level in LEVELS[encoding]:
+                ms, compressed = cpu_ms(codec, level, chunks, args.runs)
+                saved = size - compressed
+                print(
+                    f"{label:<17}{encoding:<10}{level:>6}{size:>10}{compressed:>12}"
+                    f"{saved / size:>8.1%}{ms:>9.3f}"
+                    f"{size / 1e6 / (ms / 1000) if ms else float('inf'):>8.0f}"
+                    f"{ms / (saved / 1e6) if saved > 0 else float('inf'):>17.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measures the overlap check of `POST /v1/application` against an employee's history: the check's
+statement alone and the whole request, for an employee with ``--history`` earlier applications
+and for one with the few the seed gives most.  New leave comes after all existing leave, the
+common case, so neither should cost more than the other.
+
+    python -m benchmarks.conflict_check --history 10000 --requests 500
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, select
+
+from backend_engineer_interview.app import EngineConfig, create_app, init_db
+from backend_engineer_interview.handlers import conflicting_application_statement
+from backend_engineer_interview.models import Application
+from benchmarks.dataset import seeded_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--applications", type=int, default=100_000)
+    parser.add_argument("--history", type=int, default=10_000, help="applications of one employee")
+    parser.add_argument("--requests", type=int, default=500, help="checks and posts per employee")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = seeded_db(directory, args.employees, args.applications)
+        long_history, short_history = dataset.employee_ids[0], dataset.employee_ids[1]
+
+        session_factory = init_db(dataset.db_name, EngineConfig(slow_query_threshold_ms=None))
+        engine = session_factory.get_bind()
+        session_factory.remove()
+        # A day of leave every other day, ending before the seeded years.
+        first_day = date(2019, 12, 1) - timedelta(days=2 * args.history)
+        with engine.begin() as connection:  # type: ignore
+            connection.execute(
+                insert(Application),
+                [
+                    {"employee_id": long_history, "leave_start_date": day, "leave_end_date": day}
+                    for day in (first_day + timedelta(days=2 * i) for i in range(args.history))
+                ],
+            )
+            counts = {
+                employee_id: connection.scalar(
+                    select(func.count()).where(Application.employee_id == employee_id)
+                )
+                for employee_id in (long_history, short_history)
+            }
+
+        client = create_app(
+            dataset.db_name, engine_config=EngineConfig(slow_query_threshold_ms=None)
+        ).test_client()
+        print(f"{'applications':>12}{'check ms':>10}{'post p50 ms':>13}{'post p95 ms':>13}")
+        for employee_id in (short_history, long_history):
+            check_timings = []
+            with engine.connect() as connection:  # type: ignore
+                for i in range(args.requests):
+                    start = date(2031, 1, 1) + timedelta(days=i)
+                    statement = conflicting_application_statement(employee_id, start, start)
+                    began = time.perf_counter()
+                    connection.execute(statement).all()
+                    check_timings.append(1000 * (time.perf_counter() - began))
+
+            # Each post is a week after the one before, so they're all accepted.
+            post_timings = []
+            for i in range(args.requests):
+                start = date(2040, 1, 1) + timedelta(weeks=i)
+                began = time.perf_counter()
+                response = client.post(
+                    "/v1/application",
+                    json={
+                        "leave_start_date": start.isoformat(),
+                        "leave_end_date": (start + timedelta(days=4)).isoformat(),
+                        "employee_id": employee_id,
+                    },
+                )
+                post_timings.append(1000 * (time.perf_counter() - began))
+                if response.status_code != 200:
+                    raise AssertionError(f"POST returned {response.status_code}")
+
+            post_p95 = statistics.quantiles(post_timings, n=20)[-1]
+            print(
+                f"{counts[employee_id]:>12}{statistics.median(check_timings):>10.3f}"
+                f"{statistics.median(post_timings):>13.2f}{post_p95:>13.2f}"
+            )
+        engine.dispose()  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+from typing import NamedTuple
+
+from alembic import command
+from alembic.config import Config
+
+from backend_engineer_interview.app import EngineConfig, init_db
+from backend_engineer_interview.seed import seed_database
+
+
+class Dataset(NamedTuple):
+    db_name: str
+    # The ids of the generated employees; the migration's own employees have gaps between ids.
+    employee_ids: range
+
+
+def seeded_db(directory: str, employees: int, applications: int, seed: int = 0) -> Dataset:
+    """
+    Migrate a database in ``directory`` and add ``employees`` employees and ``applications``
+    applications spread across them.
+    """
+    db_name = os.path.join(directory, "bench")
+    alembic_cfg = Config("./alembic.ini")
+    alembic_cfg.set_main_option("sqlalchemy.url", f"sqlite:///{db_name}.db")
+    command.upgrade(alembic_cfg, "head")
+
+    session_factory = init_db(
+        db_name, EngineConfig(synchronous="OFF", slow_query_threshold_ms=None)
+    )
+    engine = session_factory.get_bind()
+    session_factory.remove()
+    try:
+        seeded = seed_database(engine, employees, applications, seed)  # type: ignore
+    finally:
+        engine.dispose()
+    return Dataset(db_name, seeded.employee_ids)
@@ -0,0 +1,115 @@
+"""
+Compares the R*Tree behind `GET /v1/application/overlapping` with a range scan over the
+application table's dates, for ranges of a day to a quarter over a seeded dataset.  Each query
+is the endpoint's first page with its total, and without it (``include_count=false``).  Without
+the total, the scan stops at the page's last row, so is quick while most ranges overlap many
+applications; the R*Tree's cost follows the number of overlapping applications instead.
+
+    python -m benchmarks.overlapping --employees 100000 --applications 1000000
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from backend_engineer_interview.app import EngineConfig, init_db
+from backend_engineer_interview.models import Application
+from backend_engineer_interview.search import ApplicationSearch, OverlappingApplicationSearch
+from benchmarks.dataset import seeded_db
+
+
+class RangeScanSearch(OverlappingApplicationSearch):
+    """The same search and pages, filtering on the application dates alone."""
+
+    def page_statement(self) -> Select:
+        return ApplicationSearch.page_statement(self)
+
+    def _filtered(self, statement: Select) -> Select:
+        return statement.join(Application.employee).where(
+            Application.leave_start_date <= self.end,
+            Application.leave_end_date >= self.start,
+            Application.leave_start_date <= Application.leave_end_date,
+        )
+
+    def count_statement(self) -> Select:
+        return self._filtered(select(func.count(Application.id)))
+
+
+def run(session: Session, search: OverlappingApplicationSearch) -> tuple[float, list[int]]:
+    start = time.perf_counter()
+    rows = session.execute(search.page_statement()).all()
+    if search.needs_count_statement(rows):
+        session.execute(search.count_statement()).scalar()
+    elapsed = 1000 * (time.perf_counter() - start)
+    session.expunge_all()
+    return elapsed, [row[0].id for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--applications", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50, help="ranges per length")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        seed_start = time.perf_counter()
+        dataset = seeded_db(directory, args.employees, args.applications, args.seed)
+        print(f"Seeded dataset in {time.perf_counter() - seed_start:.1f}s")
+
+        session_factory = init_db(dataset.db_name, EngineConfig(slow_query_threshold_ms=None))
+        session = session_factory()
+        print(
+            f"{'range':<12}{'count':>6}{'r*tree ms':>11}{'scan ms':>10}{'speedup':>9}"
+            "  (medians, first page of 10)"
+        )
+        # Ranges within the seeded years, and past them, where no applications overlap.
+        for label, first_day, days in [
+            ("1 day", date(2020, 1, 1), 1),
+            ("7 days", date(2020, 1, 1), 7),
+            ("30 days", date(2020, 1, 1), 30),
+            ("90 days", date(2020, 1, 1), 90),
+            ("30, empty", date(2031, 1, 1), 30),
+        ]:
+            for include_count in ["true", "false"]:
+                timings: dict[type, list[float]] = {
+                    OverlappingApplicationSearch: [],
+                    RangeScanSearch: [],
+                }
+                for _ in range(args.queries):
+                    start = first_day + timedelta(days=rng.randrange(5 * 365 - days))
+                    params = {
+                        "from": start.isoformat(),
+                        "to": (start + timedelta(days=days - 1)).isoformat(),
+                        "include_count": include_count,
+                    }
+                    results = []
+                    for search_class, class_timings in timings.items():
+                        elapsed, ids = run(session, search_class(params))
+                        class_timings.append(elapsed)
+                        results.append(ids)
+                    if results[0] != results[1]:
+                        raise AssertionError(f"Searches disagree for {params}")
+
+                rtree = statistics.median(timings[OverlappingApplicationSearch])
+                scan = statistics.median(timings[RangeScanSearch])
+                print(
+                    f"{label:<12}{'yes' if include_count == 'true' else 'no':>6}"
+                    f"{rtree:>11.2f}{scan:>10.2f}{scan / rtree:>8.1f}x"
+                )
+        session.close()
+        session_factory.get_bind().dispose()  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
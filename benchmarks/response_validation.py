@@ -0,0 +1,70 @@
+"""
+Measures the per-request cost of each response validation policy by serving the same search page
+through apps that differ only in `ResponseValidation`.
+
+    python -m benchmarks.response_validation --applications 5000 --limit 100 --requests 200
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from backend_engineer_interview.app import create_app
+from backend_engineer_interview.validators import ResponseValidation
+from benchmarks.dataset import seeded_db
+
+
+def time_requests(db_name: str, validation: ResponseValidation, path: str, requests: int) -> list:
+    client = create_app(db_name, response_validation=validation).test_client()
+    for _ in range(10):
+        client.get(path)
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        timings.append(1000 * (time.perf_counter() - start))
+        assert response.status_code == 200
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--applications", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sample-every", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    policies = [
+        ResponseValidation("off"),
+        ResponseValidation("sampled", sample_every=args.sample_every),
+        ResponseValidation("full"),
+    ]
+    # The page's total is cached after the first request, so every timed request does the same work.
+    path = f"/v1/application?limit={args.limit}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = seeded_db(directory, args.employees, args.applications).db_name
+        results = {
+            policy: time_requests(db_name, policy, path, args.requests) for policy in policies
+        }
+
+    baseline = statistics.mean(results[policies[0]])
+    print(f"GET {path} over {args.applications} applications, {args.requests} requests")
+    print(f"{'policy':<16}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'overhead ms':>14}")
+    for policy, timings in results.items():
+        label = policy.mode + (f"/{policy.sample_every}" if policy.mode == "sampled" else "")
+        mean = statistics.mean(timings)
+        print(
+            f"{label:<16}{mean:>10.3f}{statistics.median(timings):>10.3f}"
+            f"{statistics.quantiles(timings, n=20)[-1]:>10.3f}{mean - baseline:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures what selecting fields with `fields=` saves on search pages: the time to run the page
+statement, assemble the page and serialize the response, with every field (ORM entities with their
+employee) and with a few selected fields (plain rows, joining the employee only for its fields).
+Pages are fetched without their total, which costs the same either way.
+
+    python -m benchmarks.search_fields --applications 100000 --limit 500
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from typing import Optional
+
+from sqlalchemy.orm import scoped_session
+
+from backend_engineer_interview.app import EngineConfig, init_db
+from backend_engineer_interview.handlers import search_response
+from backend_engineer_interview.search import ApplicationSearch
+from benchmarks.dataset import seeded_db
+
+SELECTIONS: list[Optional[str]] = [
+    None,
+    "id,leave_start_date,leave_end_date",
+    "id,leave_start_date,leave_end_date,employee.id",
+    "id,leave_start_date,leave_end_date,employee.first_name,employee.last_name",
+]
+
+
+def time_page(
+    session_factory: scoped_session, args: dict[str, str], runs: int
+) -> tuple[dict[str, float], int]:
+    """Median milliseconds per stage of serving the page, and the size of its body."""
+    timings: dict[str, list[float]] = {"query": [], "page": [], "serialize": []}
+    for _ in range(runs):
+        session = session_factory()
+        application_search = ApplicationSearch(args)
+        start = time.perf_counter()
+        rows = session.execute(application_search.page_statement()).all()
+        queried = time.perf_counter()
+        page = application_search.page(rows)
+        paged = time.perf_counter()
+        body = search_response(page).body
+        serialized = time.perf_counter()
+        session_factory.remove()
+
+        timings["query"].append(1000 * (queried - start))
+        timings["page"].append(1000 * (paged - queried))
+        timings["serialize"].append(1000 * (serialized - paged))
+    return {stage: statistics.median(values) for stage, values in timings.items()}, len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--applications", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = seeded_db(directory, args.employees, args.applications).db_name
+        session_factory = init_db(db_name, EngineConfig(slow_query_threshold_ms=None))
+
+        print(f"Pages of {args.limit}, medians of {args.runs} runs")
+        print(
+            f"{'page':<8}{'fields':<72}{'query ms':>10}{'page ms':>9}{'json ms':>9}"
+            f"{'total ms':>10}{'bytes':>8}"
+        )
+        for label, search in [("first", ""), ("search", "Smith")]:
+            for fields in SELECTIONS:
+                page_args = {"search": search, "limit": str(args.limit), "include_count": "false"}
+                if fields:
+                    page_args["fields"] = fields
+                # Warm the statement cache and the selection's response model.
+                time_page(session_factory, page_args, 3)
+                stages, size = time_page(session_factory, page_args, args.runs)
+                print(
+                    f"{label:<8}{fields or '(all)':<72}{stages['query']:>10.2f}"
+                    f"{stages['page']:>9.2f}{stages['serialize']:>9.2f}"
+                    f"{sum(stages.values()):>10.2f}{size:>8}"
+                )
+        session_factory.get_bind().dispose()  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures how long a fresh process takes to import the app module and to create an app, reported
+separately for the sync and async apps, with the parsed-spec cache on disk cold (no cached parse)
+and warm.  Each sample is a new interpreter, as a new worker would be.
+
+    python -m benchmarks.startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from backend_engineer_interview.app import openapi_spec_path
+from backend_engineer_interview.spec import clear_cache
+
+# Run in the child: times the import and two app creations, the second reusing the in-memory
+# parse, and prints them as JSON.
+CHILD = """
+import json, logging, sys, time, warnings
+warnings.simplefilter("ignore")
+logging.disable(logging.INFO)
+module, factory, db_name = sys.argv[1:]
+start = time.perf_counter()
+imported = __import__(module, fromlist=[factory])
+import_ms = 1000 * (time.perf_counter() - start)
+create_ms = []
+for _ in range(2):
+    start = time.perf_counter()
+    getattr(imported, factory)(db_name)
+    create_ms.append(1000 * (time.perf_counter() - start))
+print(json.dumps({"import_ms": import_ms, "create_ms": create_ms[0], "recreate_ms": create_ms[1]}))
+"""
+
+APPS = {
+    "sync": ("backend_engineer_interview.app", "create_app"),
+    "async": ("backend_engineer_interview.async_app", "create_async_app"),
+}
+
+
+def sample(app_mode: str, db_name: str) -> dict:
+    module, factory = APPS[app_mode]
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, module, factory, db_name],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--runs", type=int, default=5, help="processes per app mode and cache state"
+    )
+    parser.add_argument("--apps", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    args = parser.parse_args()
+
+    print(
+        f"{'app':<7}{'spec cache':<12}"
+        f"{'import ms':>11}{'create_app ms':>15}{'again ms':>10}  (medians of {args.runs})"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = os.path.join(directory, "startup")
+        for app_mode in args.apps:
+            for cache_state in ["cold", "warm"]:
+                samples = []
+                for _ in range(args.runs):
+                    if cache_state == "cold":
+                        clear_cache(openapi_spec_path())
+                    samples.append(sample(app_mode, db_name))
+
+                def median(key: str) -> float:
+                    return statistics.median(sample[key] for sample in samples)
+
+                print(
+                    f"{app_mode:<7}{cache_state:<12}{median('import_ms'):>11.1f}"
+                    f"{median('create_ms'):>15.1f}{median('recreate_ms'):>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,89 @@
 import os
+import sqlite3
+from typing import Iterator
 import pytest
 from alembic.config import Config
 from alembic import command
-from backend_engineer_interview.app import create_app
+from backend_engineer_interview.app import EngineConfig, configure_sqlite_engine, create_app
+from backend_engineer_interview.async_app import create_async_app
 from connexion.apps.abstract import TestClient  # type: ignore
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
 
 
-@pytest.fixture
-def test_client() -> TestClient:
-    if os.path.exists("test.db"):
-        os.remove("test.db")
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """A database migrated and seeded once per session, which each test gets a copy of."""
+    path = str(tmp_path_factory.mktemp("template") / "template.db")
     alembic_cfg = Config("./alembic.ini")
-    alembic_cfg.set_main_option("sqlalchemy.url", "sqlite:///test.db")
+    alembic_cfg.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
     command.upgrade(alembic_cfg, "head")
-    return create_app("test").test_client()
+    return path
+
+
+def copy_database(source_path: str, target: sqlite3.Connection) -> None:
+    source = sqlite3.connect(source_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+
+
+@pytest.fixture
+def migrated_db(template_db: str) -> None:
+    """A freshly migrated and seeded test.db, copied from the session's template."""
+    for path in ["test.db", "test.db-wal", "test.db-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+    target = sqlite3.connect("test.db")
+    try:
+        copy_database(template_db, target)
+    finally:
+        target.close()
+
+
+@pytest.fixture
+def memory_db_engine(template_db: str) -> Iterator[Engine]:
+    """
+    An engine over a private in-memory copy of the template, for tests that don't need the
+    database on disk.  A single connection serves every thread.
+    """
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    configure_sqlite_engine(engine, EngineConfig(journal_mode="MEMORY"))
+    with engine.connect() as connection:
+        copy_database(template_db, connection.connection.dbapi_connection)  # type: ignore
+    yield engine
+    engine.dispose()
+
+
+# Requests under test fail if they issue any statement more often than this (e.g. N+1 lazy loads).
+MAX_STATEMENT_REPEATS = 1
+
+
+@pytest.fixture(params=["sync", "async"])
+def test_client(request: pytest.FixtureRequest, migrated_db: None) -> TestClient:
+    """A client for the sync app and, unless the test is marked `sync_only`, the async app."""
+    engine_config = EngineConfig(max_statement_repeats=MAX_STATEMENT_REPEATS)
+    if request.param == "sync":
+        return create_app("test", engine_config=engine_config).test_client()
+
+    if request.node.get_closest_marker("sync_only"):
+        pytest.skip("no async handler for this operation")
+    return create_async_app("test", engine_config=engine_config).test_client()
+
+
+@pytest.fixture
+def sql_statements() -> Iterator[list[str]]:
+    """Collect the SQL statements, other than transaction control, run while the test runs."""
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:  # type: ignore
+        if not statement.startswith(("BEGIN", "COMMIT", "ROLLBACK")):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", record)
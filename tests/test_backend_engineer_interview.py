@@ -1,6 +1,48 @@
-from typing import Self
-from backend_engineer_interview import __version__
+import asyncio
+import gzip
+import json
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Optional, Self
+import pytest
+from alembic import command
+from alembic.config import Config
+from backend_engineer_interview import (
+    __version__,
+    async_handlers,
+    handlers,
+    leave_usage,
+    seed,
+    spec,
+)
+from backend_engineer_interview.app import EngineConfig, create_app, init_db, openapi_spec
+from backend_engineer_interview.async_app import create_async_app, create_async_sqlite_engine
+from backend_engineer_interview.cache import TTLCache
+from backend_engineer_interview.compression import (
+    CompressionConfig,
+    CompressionMiddleware,
+    choose_encoding,
+)
+from backend_engineer_interview.metrics import (
+    RepeatedStatementError,
+    RequestMetrics,
+    RequestStats,
+    query_plan,
+    request_stats,
+)
+from backend_engineer_interview.models import Application, Employee
+from backend_engineer_interview.search import ApplicationSearch
+from backend_engineer_interview.validators import ResponseValidation, compiled_validator
 from connexion.apps.abstract import TestClient  # type: ignore
+from sqlalchemy import Engine, Select, event, insert, text
+from sqlalchemy.orm import Session
 
 
 class TestGetEmployee:
@@ -20,6 +62,81 @@ class TestGetEmployee:
         assert response.json()["message"] == "No such employee"
 
 
+class TestEmployeeCache:
+    def test_get_employee_revalidates_with_etag_without_db(
+        self: Self, test_client: TestClient, sql_statements: list[str]
+    ) -> None:
+        response = test_client.get("/v1/employee/1")
+        etag = response.headers["ETag"]
+        assert etag.startswith('"')
+
+        sql_statements.clear()
+        cached_response = test_client.get("/v1/employee/1")
+        assert cached_response.json() == response.json()
+        assert cached_response.headers["ETag"] == etag
+
+        not_modified = test_client.get("/v1/employee/1", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+        assert not any(statement.startswith("SELECT employee") for statement in sql_statements)
+
+    def test_get_employee_read_before_a_patch_is_not_cached(
+        self: Self,
+        test_client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+        sql_statements: list[str],
+    ) -> None:
+        cache_employee = handlers.cache_employee
+
+        def racing_patch(get_employee_cache):  # type: ignore
+            def cache_employee_after_patch(employee: Employee) -> handlers.CachedEmployee:
+                # A patch commits, and invalidates the employee, after this read.
+                get_employee_cache().invalidate(employee.id)
+                return cache_employee(employee)
+
+            return cache_employee_after_patch
+
+        for module in [handlers, async_handlers]:
+            monkeypatch.setattr(module, "cache_employee", racing_patch(module.get_employee_cache))
+
+        test_client.get("/v1/employee/1")
+        sql_statements.clear()
+        test_client.get("/v1/employee/1")
+        assert any(statement.startswith("SELECT employee") for statement in sql_statements)
+
+    def test_patch_employee_invalidates_cached_employee(
+        self: Self, test_client: TestClient
+    ) -> None:
+        etag = test_client.get("/v1/employee/2").headers["ETag"]
+
+        test_client.patch("/v1/employee/2", json={"first_name": "Ringo"})
+
+        response = test_client.get("/v1/employee/2", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["first_name"] == "Ringo"
+        assert response.headers["ETag"] != etag
+
+    @pytest.mark.sync_only
+    def test_patch_employees_invalidates_cached_employee(
+        self: Self, test_client: TestClient
+    ) -> None:
+        test_client.get("/v1/employee/2")
+        test_client.patch("/v1/employee", json=[{"id": 2, "last_name": "Starr"}])
+        assert test_client.get("/v1/employee/2").json()["last_name"] == "Starr"
+
+    def test_get_employee_etag_without_cache(
+        self: Self, migrated_db: None, sql_statements: list[str]
+    ) -> None:
+        client = create_app("test", employee_cache_enabled=False).test_client()
+        etag = client.get("/v1/employee/1").headers["ETag"]
+
+        sql_statements.clear()
+        response = client.get("/v1/employee/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert len(sql_statements) == 1
+
+
 class TestPatchEmployee:
     def test_patch_employee_valid(self: Self, test_client: TestClient) -> None:
         current_response = test_client.get("/v1/employee/2")
@@ -29,6 +146,7 @@ class TestPatchEmployee:
             "/v1/employee/2", json={"first_name": "Ringo", "last_name": "Starr"}
         )
         assert patch_response.status_code == 204
+        assert patch_response.content == b""
         updated_response = test_client.get("/v1/employee/2")
         assert updated_response.json()["first_name"] == "Ringo"
         assert updated_response.json()["last_name"] == "Starr"
@@ -45,24 +163,253 @@ class TestPatchEmployee:
         assert patch_response.status_code == 400
         assert patch_response.json()["message"] == "last_name cannot be blank"
 
+    def test_patch_employee_single_name(self: Self, test_client: TestClient) -> None:
+        patch_response = test_client.patch("/v1/employee/2", json={"first_name": "Ringo"})
+        assert patch_response.status_code == 204
+        updated_response = test_client.get("/v1/employee/2")
+        assert updated_response.json()["first_name"] == "Ringo"
+        assert updated_response.json()["last_name"] == "Star"
+
+    def test_patch_employee_blank_first_name(self: Self, test_client: TestClient) -> None:
+        patch_response = test_client.patch(
+            "/v1/employee/2", json={"first_name": "", "last_name": "Starr"}
+        )
+        assert patch_response.status_code == 400
+        assert patch_response.json()["message"] == "first_name cannot be blank"
+
+
+@pytest.mark.sync_only
+class TestPatchEmployees:
+    def test_patch_employees_reports_per_id_status(self: Self, test_client: TestClient) -> None:
+        response = test_client.patch(
+            "/v1/employee",
+            json=[
+                {"id": 2, "first_name": "Ringo", "last_name": "Starr"},
+                {"id": 10, "last_name": "Starkey"},
+                {"id": 99, "first_name": "Pete"},
+                {"id": 1, "last_name": ""},
+            ],
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {"id": 2, "status": 204},
+            {"id": 10, "status": 204},
+            {"id": 99, "status": 404, "message": "No such employee"},
+            {"id": 1, "status": 400, "message": "last_name cannot be blank"},
+        ]
+        assert test_client.get("/v1/employee/2").json()["last_name"] == "Starr"
+        assert test_client.get("/v1/employee/10").json()["first_name"] == "Rino"
+        assert test_client.get("/v1/employee/10").json()["last_name"] == "Starkey"
+        assert test_client.get("/v1/employee/1").json()["last_name"] == "Lennon"
+
+    def test_patch_employees_invalidates_name_counts(self: Self, test_client: TestClient) -> None:
+        assert test_client.get("/v1/application?search=Starr").json()["count"] == 0
+
+        test_client.patch("/v1/employee", json=[{"id": 2, "last_name": "Starr"}])
+
+        assert test_client.get("/v1/application?search=Starr").json()["count"] == 1
+
+
+def add_overlapping_leave() -> None:
+    """
+    Applications 4 and 5 for employee 1, the second inside the first, as data written before
+    overlaps were refused can hold: added to test.db before the migration that flags them.
+    """
+    alembic_cfg = Config("./alembic.ini")
+    alembic_cfg.set_main_option("sqlalchemy.url", "sqlite:///test.db")
+    command.downgrade(alembic_cfg, "d7e3f1a5c9b2")
+    connection = sqlite3.connect("test.db")
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT INTO application (id, leave_start_date, leave_end_date, employee_id) "
+                "VALUES (?, ?, ?, 1)",
+                [(4, "2030-01-01", "2030-04-10"), (5, "2030-01-10", "2030-01-12")],
+            )
+    finally:
+        connection.close()
+    command.upgrade(alembic_cfg, "head")
+
 
 class TestPostApplication:
     def test_post_application_valid(self: Self, test_client: TestClient) -> None:
         application_response = test_client.post(
             "/v1/application",
             json={
-                "leave_start_date": "2021-01-01",
-                "leave_end_date": "2021-02-01",
+                "leave_start_date": "2021-06-01",
+                "leave_end_date": "2021-07-01",
                 "employee_id": 1,
             },
         )
         assert application_response.status_code == 200
         application = application_response.json()
-        assert application["leave_start_date"] == "2021-01-01"
-        assert application["leave_end_date"] == "2021-02-01"
+        assert application["leave_start_date"] == "2021-06-01"
+        assert application["leave_end_date"] == "2021-07-01"
         assert application["employee"]["first_name"] == "John"
         assert application["id"] is not None
 
+    def test_post_application_loads_employee_once(
+        self: Self, test_client: TestClient, sql_statements: list[str]
+    ) -> None:
+        application_response = test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2021-05-01",
+                "leave_end_date": "2021-05-08",
+                "employee_id": 2,
+            },
+        )
+        assert application_response.status_code == 200
+        assert application_response.json()["employee"]["last_name"] == "Star"
+        # The employee is loaded once; the only other read is the overlap check's index probe.
+        selects = [s for s in sql_statements if s.startswith("SELECT")]
+        assert len([s for s in selects if "FROM employee" in s]) == 1
+        assert len(selects) == 2
+        assert not any("secret" in statement for statement in sql_statements)
+
+    @pytest.mark.parametrize(
+        "start,end",
+        [
+            ("2021-01-01", "2021-02-01"),
+            # Leave includes its first and last days, so touching counts as overlapping.
+            ("2021-02-01", "2021-02-10"),
+            ("2020-12-01", "2021-01-01"),
+            ("2021-01-10", "2021-01-20"),
+            ("2020-06-01", "2021-06-01"),
+        ],
+    )
+    def test_post_application_overlapping_existing_leave(
+        self: Self, test_client: TestClient, start: str, end: str
+    ) -> None:
+        application_response = test_client.post(
+            "/v1/application",
+            json={"leave_start_date": start, "leave_end_date": end, "employee_id": 1},
+        )
+
+        assert application_response.status_code == 409
+        assert application_response.json()["message"] == "Leave overlaps application 1"
+
+    def test_post_application_overlapping_leave_that_overlaps_other_leave(
+        self: Self, test_client: TestClient
+    ) -> None:
+        add_overlapping_leave()
+
+        # Application 5 starts last, and ends before the new leave; 4 still overlaps it.
+        application_response = test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2030-02-01",
+                "leave_end_date": "2030-02-05",
+                "employee_id": 1,
+            },
+        )
+
+        assert application_response.status_code == 409
+        assert application_response.json()["message"] == "Leave overlaps application 4"
+
+    def test_overlapping_leave_is_flagged(self: Self, migrated_db: None) -> None:
+        add_overlapping_leave()
+
+        connection = sqlite3.connect("test.db")
+        try:
+            # Only the application starting inside earlier leave.
+            assert connection.execute(
+                "SELECT application_id FROM application_overlap"
+            ).fetchall() == [(5,)]
+        finally:
+            connection.close()
+
+    def test_conflict_check_cost_is_independent_of_history(
+        self: Self, memory_db_engine: Engine
+    ) -> None:
+        # Ten thousand days of earlier leave for employee 1, a day apart; employee 2 has one.
+        with memory_db_engine.begin() as connection:
+            connection.execute(
+                insert(Application),
+                [
+                    {"employee_id": 1, "leave_start_date": day, "leave_end_date": day}
+                    for day in (date(1900, 1, 1) + timedelta(days=2 * i) for i in range(10_000))
+                ],
+            )
+
+        def vm_steps(statement: Select) -> int:
+            """SQLite virtual machine instructions run for ``statement``: its cost, untimed."""
+            steps = 0
+
+            def count() -> int:
+                nonlocal steps
+                steps += 1
+                return 0
+
+            with memory_db_engine.connect() as connection:
+                dbapi_connection = connection.connection.dbapi_connection
+                dbapi_connection.set_progress_handler(count, 1)  # type: ignore
+                try:
+                    connection.execute(statement).all()
+                finally:
+                    dbapi_connection.set_progress_handler(None, 1)  # type: ignore
+            return steps
+
+        start, end = date(2030, 1, 1), date(2030, 1, 8)
+        assert vm_steps(handlers.conflicting_application_statement(1, start, end)) == vm_steps(
+            handlers.conflicting_application_statement(2, start, end)
+        )
+        assert vm_steps(
+            handlers.conflicting_applications_statement([(0, 1, start, end)])
+        ) == vm_steps(handlers.conflicting_applications_statement([(0, 2, start, end)]))
+
+    def test_post_application_next_to_existing_leave(self: Self, test_client: TestClient) -> None:
+        for start, end in [("2021-02-02", "2021-02-10"), ("2020-12-01", "2020-12-31")]:
+            application_response = test_client.post(
+                "/v1/application",
+                json={"leave_start_date": start, "leave_end_date": end, "employee_id": 1},
+            )
+            assert application_response.status_code == 200
+
+        # The same dates are free for another employee.
+        application_response = test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2021-01-01",
+                "leave_end_date": "2021-02-01",
+                "employee_id": 10,
+            },
+        )
+        assert application_response.status_code == 200
+
+    def test_post_application_overlap_check_holds_under_concurrency(
+        self: Self, migrated_db: None
+    ) -> None:
+        client = create_app("test").test_client()
+        # Connexion builds its middleware stack on the first request; not concurrently.
+        client.get("/v1/status")
+        body = {"leave_start_date": "2022-01-01", "leave_end_date": "2022-01-31", "employee_id": 1}
+
+        def post(_: int) -> int:
+            return client.post("/v1/application", json=body).status_code
+
+        with ThreadPoolExecutor(8) as executor:
+            statuses = list(executor.map(post, range(8)))
+
+        assert sorted(statuses) == [200] + [409] * 7
+
+    def test_post_application_end_before_start(self: Self, test_client: TestClient) -> None:
+        application_response = test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2022-01-10",
+                "leave_end_date": "2022-01-09",
+                "employee_id": 1,
+            },
+        )
+
+        assert application_response.status_code == 400
+        assert (
+            application_response.json()["message"]
+            == "leave_end_date cannot be before leave_start_date"
+        )
+
     def test_post_application_invalid(self: Self, test_client: TestClient) -> None:
         application_response = test_client.post(
             "/v1/application",
@@ -119,6 +466,163 @@ class TestPostApplication:
         assert application_response.json()["message"] == "leave_end_date cannot be blank"
 
 
+@pytest.mark.sync_only
+class TestPostApplicationBatch:
+    def test_post_application_batch_reports_per_item_results(
+        self: Self, test_client: TestClient
+    ) -> None:
+        response = test_client.post(
+            "/v1/application/batch",
+            json=[
+                {
+                    "leave_start_date": "2021-05-01",
+                    "leave_end_date": "2021-05-08",
+                    "employee_id": 1,
+                },
+                {
+                    "leave_start_date": "2021-05-01",
+                    "leave_end_date": "2021-05-08",
+                    "employee_id": 99,
+                },
+                {"leave_start_date": "", "leave_end_date": "2021-05-08", "employee_id": 1},
+                {"employee_id": 1},
+                {
+                    "leave_start_date": "2021-06-01",
+                    "leave_end_date": "2021-06-08",
+                    "employee_id": 2,
+                },
+            ],
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {"status": 200, "id": 4},
+            {"status": 404, "message": "No such employee"},
+            {"status": 400, "message": "leave_start_date cannot be blank"},
+            {"status": 400, "message": "leave_start_date is missing;leave_end_date is missing"},
+            {"status": 200, "id": 5},
+        ]
+        assert test_client.get("/v1/application?search=Lennon").json()["count"] == 2
+        assert test_client.get("/v1/application?search=2").json()["count"] == 2
+
+    def test_post_application_batch_refuses_overlapping_leave(
+        self: Self, test_client: TestClient
+    ) -> None:
+        response = test_client.post(
+            "/v1/application/batch",
+            json=[
+                {
+                    "leave_start_date": "2021-01-20",
+                    "leave_end_date": "2021-02-05",
+                    "employee_id": 1,
+                },
+                {
+                    "leave_start_date": "2021-05-01",
+                    "leave_end_date": "2021-05-08",
+                    "employee_id": 1,
+                },
+                {
+                    "leave_start_date": "2021-05-08",
+                    "leave_end_date": "2021-05-09",
+                    "employee_id": 1,
+                },
+                {
+                    "leave_start_date": "2021-05-08",
+                    "leave_end_date": "2021-05-09",
+                    "employee_id": 2,
+                },
+                {
+                    "leave_start_date": "2021-05-09",
+                    "leave_end_date": "2021-05-08",
+                    "employee_id": 2,
+                },
+            ],
+        )
+
+        assert response.json()["results"] == [
+            {"status": 409, "message": "Leave overlaps application 1"},
+            {"status": 200, "id": 4},
+            {"status": 409, "message": "Leave overlaps an earlier item"},
+            {"status": 200, "id": 5},
+            {"status": 400, "message": "leave_end_date cannot be before leave_start_date"},
+        ]
+
+    def test_post_application_batch_overlapping_leave_that_overlaps_other_leave(
+        self: Self, test_client: TestClient
+    ) -> None:
+        add_overlapping_leave()
+
+        response = test_client.post(
+            "/v1/application/batch",
+            json=[
+                {"leave_start_date": "2030-02-01", "leave_end_date": "2030-02-05", "employee_id": 1}
+            ],
+        )
+
+        assert response.json()["results"] == [
+            {"status": 409, "message": "Leave overlaps application 4"}
+        ]
+
+    def test_post_application_batch_checks_conflicts_in_batches(
+        self: Self,
+        migrated_db: None,
+        monkeypatch: pytest.MonkeyPatch,
+        sql_statements: list[str],
+    ) -> None:
+        monkeypatch.setattr(handlers, "CONFLICT_CHECK_BATCH_SIZE", 2)
+        # Without the strict statement count: each batch repeats the same statements.
+        client = create_app("test").test_client()
+
+        response = client.post(
+            "/v1/application/batch",
+            json=[
+                {"leave_start_date": start, "leave_end_date": end, "employee_id": employee_id}
+                for start, end, employee_id in [
+                    ("2021-06-01", "2021-06-08", 2),
+                    ("2021-01-20", "2021-02-05", 1),
+                    ("2021-07-01", "2021-07-08", 10),
+                    ("2021-03-01", "2021-03-05", 2),
+                    ("2021-06-05", "2021-06-10", 2),
+                ]
+            ],
+        )
+
+        assert response.json()["results"] == [
+            {"status": 200, "id": 4},
+            {"status": 409, "message": "Leave overlaps application 1"},
+            {"status": 200, "id": 5},
+            {"status": 409, "message": "Leave overlaps application 2"},
+            {"status": 409, "message": "Leave overlaps an earlier item"},
+        ]
+        employee_lookups = [s for s in sql_statements if s.startswith("SELECT employee.id")]
+        probes = [s for s in sql_statements if s.startswith("WITH probe")]
+        assert (len(employee_lookups), len(probes)) == (2, 3)
+
+    def test_post_application_batch_statement_count_independent_of_size(
+        self: Self, test_client: TestClient, sql_statements: list[str]
+    ) -> None:
+        def applications(employee_ids: list[int], first_day: date) -> list[dict]:
+            # A week's leave each, a week apart.
+            return [
+                {
+                    "leave_start_date": (first_day + timedelta(weeks=index)).isoformat(),
+                    "leave_end_date": (first_day + timedelta(weeks=index, days=4)).isoformat(),
+                    "employee_id": employee_id,
+                }
+                for index, employee_id in enumerate(employee_ids)
+            ]
+
+        test_client.post("/v1/application/batch", json=applications([1, 1], date(2030, 1, 7)))
+        small_batch_statements = len(sql_statements)
+
+        sql_statements.clear()
+        response = test_client.post(
+            "/v1/application/batch", json=applications([1, 2, 10] * 20, date(2031, 1, 6))
+        )
+        assert [result["status"] for result in response.json()["results"]] == [200] * 60
+        assert len(sql_statements) == small_batch_statements
+
+
 class TestSearchApplications:
     def test_search_applications_returns_all_applications_without_search_value(
         self: Self, test_client: TestClient
@@ -159,6 +663,22 @@ class TestSearchApplications:
         assert len(applications) == 1
         assert applications[0]["employee"]["last_name"] == "Lennon"
 
+    def test_search_applications_matches_name_substring(
+        self: Self, test_client: TestClient
+    ) -> None:
+        response = test_client.get("/v1/application?search=enno")
+        assert [a["id"] for a in response.json()["applications"]] == [1]
+
+        short_response = test_client.get("/v1/application?search=sT")
+        assert [a["id"] for a in short_response.json()["applications"]] == [2, 3]
+
+    def test_search_applications_reflects_patched_name(self: Self, test_client: TestClient) -> None:
+        test_client.patch("/v1/employee/1", json={"first_name": "Julian", "last_name": "Lennon"})
+
+        assert len(test_client.get("/v1/application?search=John").json()["applications"]) == 0
+        response = test_client.get("/v1/application?search=julia")
+        assert [a["id"] for a in response.json()["applications"]] == [1]
+
     def test_search_applications_returns_empty_list_when_no_results(
         self: Self, test_client: TestClient
     ) -> None:
@@ -192,6 +712,1222 @@ class TestSearchApplications:
         assert len(prev_applications) == 1
         assert prev_applications[0]["id"] == 1
 
+    def test_search_applications_cursor_pagination(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/application?search=Star&limit=1")
+        assert response.status_code == 200
+        assert [a["id"] for a in response.json()["applications"]] == [2]
+        assert response.json()["prev"] == ""
+
+        next_response = test_client.get(response.json()["next"])
+        assert next_response.status_code == 200
+        assert [a["id"] for a in next_response.json()["applications"]] == [3]
+        assert next_response.json()["count"] == 2
+        assert next_response.json()["next"] == ""
+
+        prev_response = test_client.get(next_response.json()["prev"])
+        assert prev_response.status_code == 200
+        assert [a["id"] for a in prev_response.json()["applications"]] == [2]
+        assert prev_response.json()["prev"] == ""
+        assert prev_response.json()["next"] != ""
+
+    def test_search_applications_statement_count_independent_of_limit(
+        self: Self, test_client: TestClient, sql_statements: list[str]
+    ) -> None:
+        test_client.get("/v1/application?limit=1")
+        single_row_statements = len(sql_statements)
+
+        sql_statements.clear()
+        response = test_client.get("/v1/application?limit=3")
+        assert len(response.json()["applications"]) == 3
+        assert len(sql_statements) == single_row_statements
+        assert not any("secret" in statement for statement in sql_statements)
+
+    def test_search_applications_counts_in_page_query(
+        self: Self, test_client: TestClient, sql_statements: list[str]
+    ) -> None:
+        response = test_client.get("/v1/application?search=Star&limit=1")
+        assert response.json()["count"] == 2
+        assert len(sql_statements) == 1
+
+        sql_statements.clear()
+        next_response = test_client.get(response.json()["next"])
+        assert next_response.json()["count"] == 2
+        assert len(sql_statements) == 1
+
+    def test_search_applications_without_count(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/application?limit=2&include_count=false")
+        assert response.status_code == 200
+        assert response.json()["count"] is None
+        assert [a["id"] for a in response.json()["applications"]] == [1, 2]
+        assert "include_count=false" in response.json()["next"]
+
+        next_response = test_client.get(response.json()["next"])
+        assert next_response.json()["count"] is None
+        assert [a["id"] for a in next_response.json()["applications"]] == [3]
+        assert next_response.json()["next"] == ""
+
+    def test_search_applications_invalid_cursor(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/application?cursor=not-a-cursor")
+        assert response.status_code == 400
+        assert response.json()["message"] == "cursor not valid"
+
+    def test_search_applications_cursor_search_mismatch(
+        self: Self, test_client: TestClient
+    ) -> None:
+        response = test_client.get("/v1/application?search=Star&limit=1")
+        next_url = response.json()["next"]
+
+        mismatch_response = test_client.get(f"{next_url}&search=Lennon")
+        assert mismatch_response.status_code == 400
+        assert mismatch_response.json()["message"] == "cursor does not match search"
+
+    def test_search_applications_selected_fields(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/application?fields=leave_start_date,id&limit=2")
+        assert response.status_code == 200
+        assert response.json()["applications"] == [
+            {"id": 1, "leave_start_date": "2021-01-01"},
+            {"id": 2, "leave_start_date": "2021-02-01"},
+        ]
+        assert response.json()["count"] == 3
+
+        # Pages linked from a page select the same fields.
+        next_response = test_client.get(response.json()["next"])
+        assert next_response.json()["applications"] == [{"id": 3, "leave_start_date": "2021-03-01"}]
+        prev_response = test_client.get(next_response.json()["prev"])
+        assert prev_response.json()["applications"] == [
+            {"id": 1, "leave_start_date": "2021-01-01"},
+            {"id": 2, "leave_start_date": "2021-02-01"},
+        ]
+
+    def test_search_applications_selected_employee_fields(
+        self: Self, test_client: TestClient
+    ) -> None:
+        response = test_client.get(
+            "/v1/application?search=Star&fields=leave_end_date,employee.first_name,employee.id"
+        )
+        assert response.json()["applications"] == [
+            {"employee": {"first_name": "Rino", "id": 2}, "leave_end_date": "2021-03-01"},
+            {"employee": {"first_name": "Rino", "id": 10}, "leave_end_date": "2021-04-01"},
+        ]
+
+        all_fields = test_client.get("/v1/application?search=Lennon")
+        selected = test_client.get(
+            "/v1/application?search=Lennon&fields=id,leave_start_date,leave_end_date,employee"
+        )
+        assert selected.content == all_fields.content
+
+    @pytest.mark.parametrize(
+        "fields,joins_employee",
+        [
+            ("id,leave_end_date", False),
+            ("id,employee.id", False),
+            ("id,employee.last_name", True),
+        ],
+    )
+    def test_search_applications_joins_employee_only_for_its_fields(
+        self: Self,
+        test_client: TestClient,
+        sql_statements: list[str],
+        fields: str,
+        joins_employee: bool,
+    ) -> None:
+        for search in ["", "1", "Lennon", "en"]:
+            sql_statements.clear()
+            response = test_client.get(f"/v1/application?search={search}&fields={fields}")
+            assert response.status_code == 200
+            assert [a["id"] for a in response.json()["applications"]] == {
+                "": [1, 2, 3],
+                "1": [1],
+                "Lennon": [1],
+                "en": [1],
+            }[search]
+            assert all(
+                ("JOIN employee" in statement) == joins_employee for statement in sql_statements
+            )
+
+    @pytest.mark.parametrize(
+        "fields,message",
+        [
+            ("id,secret", "unknown field: secret"),
+            ("employee.secret", "unknown field: employee.secret"),
+            (",", "fields cannot be empty"),
+        ],
+    )
+    def test_search_applications_invalid_fields(
+        self: Self, test_client: TestClient, fields: str, message: str
+    ) -> None:
+        response = test_client.get(f"/v1/application?fields={fields}")
+        assert response.status_code == 400
+        assert response.json()["message"] == message
+
+
+class TestOverlappingApplications:
+    @pytest.mark.parametrize(
+        "start,end,ids",
+        [
+            # Ranges are inclusive at both ends, as are the applications' own dates.
+            ("2021-02-01", "2021-02-01", [1, 2]),
+            ("2021-03-02", "2021-12-31", [3]),
+            ("2020-12-01", "2021-01-01", [1]),
+            ("2020-01-01", "2020-12-31", []),
+        ],
+    )
+    def test_overlapping_applications(
+        self: Self, test_client: TestClient, start: str, end: str, ids: list[int]
+    ) -> None:
+        response = test_client.get(f"/v1/application/overlapping?from={start}&to={end}")
+
+        assert response.status_code == 200
+        assert [a["id"] for a in response.json()["applications"]] == ids
+        assert response.json()["count"] == len(ids)
+
+    @pytest.mark.parametrize(
+        "path,query",
+        [("/application", ""), ("/application/overlapping", "from=2021-01-01&to=2021-12-31")],
+    )
+    def test_search_items_documented(
+        self: Self, test_client: TestClient, path: str, query: str
+    ) -> None:
+        spec = openapi_spec()
+        schema = spec["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]
+        items = schema["schema"]["properties"]["applications"]["items"]
+        item_schema = spec["components"]["schemas"][items["$ref"].rsplit("/", 1)[-1]]
+
+        item = test_client.get(f"/v1{path}?{query}").json()["applications"][0]
+        assert set(item) == set(item_schema["properties"])
+        assert set(item["employee"]) == set(item_schema["properties"]["employee"]["properties"])
+
+    def test_overlapping_applications_cursor_pagination(
+        self: Self, test_client: TestClient
+    ) -> None:
+        response = test_client.get(
+            "/v1/application/overlapping?from=2021-01-15&to=2021-03-15&limit=1"
+        )
+        assert [a["id"] for a in response.json()["applications"]] == [1]
+        assert response.json()["count"] == 3
+
+        next_response = test_client.get(response.json()["next"])
+        assert [a["id"] for a in next_response.json()["applications"]] == [2]
+        assert next_response.json()["count"] == 3
+
+        prev_response = test_client.get(next_response.json()["prev"])
+        assert [a["id"] for a in prev_response.json()["applications"]] == [1]
+        assert prev_response.json()["prev"] == ""
+
+        # Past the end, the previous page is linked by offset, with the range as parameters.
+        past_end_response = test_client.get(
+            "/v1/application/overlapping?from=2021-01-15&to=2021-03-15&limit=1&offset=5"
+        )
+        assert past_end_response.json()["applications"] == []
+        assert past_end_response.json()["prev"] == (
+            "/v1/application/overlapping?from=2021-01-15&to=2021-03-15&offset=4&limit=1"
+        )
+
+    def test_overlapping_applications_selected_fields(self: Self, test_client: TestClient) -> None:
+        response = test_client.get(
+            "/v1/application/overlapping?from=2021-01-15&to=2021-03-15&limit=2"
+            "&fields=id,employee.id"
+        )
+        assert response.json()["applications"] == [
+            {"employee": {"id": 1}, "id": 1},
+            {"employee": {"id": 2}, "id": 2},
+        ]
+        assert response.json()["count"] == 3
+
+        next_response = test_client.get(response.json()["next"])
+        assert next_response.json()["applications"] == [{"employee": {"id": 10}, "id": 3}]
+
+    def test_overlapping_applications_follow_writes(self: Self, test_client: TestClient) -> None:
+        test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2022-06-01",
+                "leave_end_date": "2022-06-10",
+                "employee_id": 1,
+            },
+        )
+        session = init_db("test")()
+        try:
+            session.execute(
+                text(
+                    "UPDATE application SET leave_start_date = '2022-06-20', "
+                    "leave_end_date = '2022-06-25' WHERE id = 1"
+                )
+            )
+            session.execute(text("DELETE FROM application WHERE id = 2"))
+            # Entered back to front, so covering no days.
+            session.execute(
+                text("INSERT INTO application VALUES (5, '2022-06-30', '2022-06-28', 2)")
+            )
+            session.commit()
+        finally:
+            session.close()
+
+        def overlapping(start: str, end: str) -> list[int]:
+            response = test_client.get(f"/v1/application/overlapping?from={start}&to={end}")
+            return [a["id"] for a in response.json()["applications"]]
+
+        assert overlapping("2022-06-05", "2022-06-05") == [4]
+        assert overlapping("2022-06-01", "2022-06-30") == [1, 4]
+        assert overlapping("2022-06-29", "2022-06-29") == []
+        assert overlapping("2021-02-15", "2021-02-15") == []
+
+    @pytest.mark.parametrize(
+        "query,message",
+        [
+            ("", "from and to are required"),
+            ("?from=2021-02-01", "from and to must be dates"),
+            ("?from=2021-02-01&to=2021-01-01", "from cannot be after to"),
+        ],
+    )
+    def test_overlapping_applications_invalid_range(
+        self: Self, test_client: TestClient, query: str, message: str
+    ) -> None:
+        response = test_client.get(f"/v1/application/overlapping{query}")
+        assert response.status_code == 400
+        assert response.json()["message"] == message
+
+
+class TestLeaveUsage:
+    def test_month_days(self: Self) -> None:
+        assert list(leave_usage.month_days(date(2020, 1, 30), date(2020, 3, 2))) == [
+            ("2020-01", 2),
+            ("2020-02", 29),
+            ("2020-03", 2),
+        ]
+        assert list(leave_usage.month_days(date(2021, 12, 31), date(2021, 12, 31))) == [
+            ("2021-12", 1)
+        ]
+
+    def test_leave_summary(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/employee/1/leave-summary")
+        assert response.status_code == 200
+        assert response.json() == {
+            "employee_id": 1,
+            "months": [{"month": "2021-01", "days": 31}, {"month": "2021-02", "days": 1}],
+            "total_days": 32,
+        }
+
+    def test_leave_summary_without_leave(self: Self, test_client: TestClient) -> None:
+        connection = sqlite3.connect("test.db")
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT INTO employee (id, first_name, last_name, date_of_birth, secret) "
+                    "VALUES (3, 'Yoko', 'Ono', '1933-02-18', 'x')"
+                )
+        finally:
+            connection.close()
+
+        response = test_client.get("/v1/employee/3/leave-summary")
+        assert response.status_code == 200
+        assert response.json() == {"employee_id": 3, "months": [], "total_days": 0}
+
+    def test_leave_summary_no_such_employee(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/employee/999/leave-summary")
+        assert response.status_code == 404
+
+    def test_post_application_adds_to_summary(self: Self, test_client: TestClient) -> None:
+        response = test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2021-02-20",
+                "leave_end_date": "2021-03-03",
+                "employee_id": 1,
+            },
+        )
+        assert response.status_code == 200
+
+        assert test_client.get("/v1/employee/1/leave-summary").json()["months"] == [
+            {"month": "2021-01", "days": 31},
+            {"month": "2021-02", "days": 10},
+            {"month": "2021-03", "days": 3},
+        ]
+
+    def test_refused_application_adds_nothing(self: Self, test_client: TestClient) -> None:
+        response = test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2021-01-20",
+                "leave_end_date": "2021-03-03",
+                "employee_id": 1,
+            },
+        )
+        assert response.status_code == 409
+        assert test_client.get("/v1/employee/1/leave-summary").json()["total_days"] == 32
+
+    @pytest.mark.sync_only
+    def test_batch_adds_to_summary(self: Self, test_client: TestClient) -> None:
+        response = test_client.post(
+            "/v1/application/batch",
+            json=[
+                {
+                    "leave_start_date": "2022-05-01",
+                    "leave_end_date": "2022-05-10",
+                    "employee_id": 10,
+                },
+                {
+                    "leave_start_date": "2022-05-20",
+                    "leave_end_date": "2022-06-01",
+                    "employee_id": 10,
+                },
+                {
+                    "leave_start_date": "2022-05-05",
+                    "leave_end_date": "2022-05-06",
+                    "employee_id": 10,
+                },
+            ],
+        )
+        assert [result["status"] for result in response.json()["results"]] == [200, 200, 409]
+
+        assert test_client.get("/v1/employee/10/leave-summary").json() == {
+            "employee_id": 10,
+            "months": [
+                {"month": "2021-03", "days": 31},
+                {"month": "2021-04", "days": 1},
+                {"month": "2022-05", "days": 22},
+                {"month": "2022-06", "days": 1},
+            ],
+            "total_days": 55,
+        }
+
+    def test_leave_usage_for_month(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/leave-usage/2021-02")
+        assert response.status_code == 200
+        assert response.json() == {
+            "month": "2021-02",
+            "employees": [{"employee_id": 1, "days": 1}, {"employee_id": 2, "days": 28}],
+            "employee_count": 2,
+            "total_days": 29,
+            "next": None,
+        }
+
+    def test_leave_usage_pages(self: Self, test_client: TestClient) -> None:
+        first = test_client.get("/v1/leave-usage/2021-02?limit=1").json()
+        assert first["employees"] == [{"employee_id": 1, "days": 1}]
+        assert first["total_days"] == 29
+        assert first["next"] == "/v1/leave-usage/2021-02?after=1&limit=1"
+
+        second = test_client.get(first["next"]).json()
+        assert second["employees"] == [{"employee_id": 2, "days": 28}]
+        assert second["next"] is None
+
+    @pytest.mark.parametrize("path", ["/v1/leave-usage/2021-13", "/v1/leave-usage/2021-02?limit=0"])
+    def test_leave_usage_invalid(self: Self, test_client: TestClient, path: str) -> None:
+        assert test_client.get(path).status_code == 400
+
+    def test_migration_totals_existing_applications(self: Self, memory_db_engine: Engine) -> None:
+        with memory_db_engine.connect() as connection:
+            assert list(leave_usage.stored_usage(connection))
+            assert not list(leave_usage.usage_differences(connection))
+
+    def test_rebuild_repairs_table(self: Self, memory_db_engine: Engine) -> None:
+        with memory_db_engine.begin() as connection:
+            connection.execute(text("UPDATE leave_usage SET days = 5 WHERE employee_id = 1"))
+            connection.execute(text("DELETE FROM leave_usage WHERE employee_id = 2"))
+            connection.execute(text("INSERT INTO leave_usage VALUES (10, '2021-01', 4)"))
+
+        with memory_db_engine.connect() as connection:
+            assert list(leave_usage.usage_differences(connection)) == [
+                (1, "2021-01", 5, 31),
+                (1, "2021-02", 5, 1),
+                (2, "2021-02", None, 28),
+                (2, "2021-03", None, 1),
+                (10, "2021-01", 4, None),
+            ]
+            assert list(leave_usage.usage_differences(connection, range(3, 11))) == [
+                (10, "2021-01", 4, None)
+            ]
+
+        assert leave_usage.rebuild_leave_usage(memory_db_engine) == 6
+        with memory_db_engine.connect() as connection:
+            assert not list(leave_usage.usage_differences(connection))
+
+
+@pytest.mark.sync_only
+class TestExportApplications:
+    def test_export_applications_streams_ndjson(
+        self: Self, test_client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(handlers, "EXPORT_BATCH_SIZE", 1)
+
+        response = test_client.get("/v1/application/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        applications = [json.loads(line) for line in response.text.splitlines()]
+        assert [a["id"] for a in applications] == [1, 2, 3]
+        assert applications[0] == {
+            "employee": {
+                "date_of_birth": "1940-10-04",
+                "first_name": "John",
+                "id": 1,
+                "last_name": "Lennon",
+            },
+            "id": 1,
+            "leave_end_date": "2021-02-01",
+            "leave_start_date": "2021-01-01",
+        }
+        # Each line is a search item, keys in the same order, only without indentation.
+        search_items = test_client.get("/v1/application").json()["applications"]
+        assert response.text.splitlines() == [
+            json.dumps(item, separators=(",", ":")) for item in search_items
+        ]
+
+    def test_export_applications_with_search(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/application/export?search=star")
+
+        assert response.status_code == 200
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == [2, 3]
+
+
+class TestCompression:
+    @staticmethod
+    def respond(
+        middleware: CompressionMiddleware, path: str = "/", accept_encoding: str = "gzip"
+    ) -> list[dict]:
+        """The messages ``middleware`` sends for a GET of ``path``."""
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "headers": [(b"accept-encoding", accept_encoding.encode())],
+        }
+        messages: list[dict] = []
+
+        async def receive() -> dict:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        asyncio.run(middleware(scope, receive, send))
+        return messages
+
+    @staticmethod
+    def app(chunks: list[bytes], headers: Optional[dict[str, str]] = None):  # type: ignore
+        """An ASGI app sending ``chunks`` of JSON, as a stream unless ``headers`` say otherwise."""
+
+        async def app(scope, receive, send) -> None:  # type: ignore
+            response_headers = {"content-type": "application/json", **(headers or {})}
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(k.encode(), v.encode()) for k, v in response_headers.items()],
+                }
+            )
+            for chunk in chunks:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        return app
+
+    @pytest.mark.parametrize(
+        "accept_encoding, expected",
+        [
+            ("gzip, deflate", "gzip"),
+            ("gzip;q=0.5, br", "br"),
+            ("zstd, br, gzip", "zstd"),
+            ("br;q=0.9, gzip;q=0.9, zstd;q=0.9", "zstd"),
+            ("*", "zstd"),
+            ("*, zstd;q=0", "br"),
+            ("gzip;q=0, identity", None),
+            ("deflate", None),
+            ("", None),
+        ],
+    )
+    def test_choose_encoding(self: Self, accept_encoding: str, expected: Optional[str]) -> None:
+        assert choose_encoding(accept_encoding, ["zstd", "br", "gzip"]) == expected
+
+    def test_invalid_config(self: Self) -> None:
+        with pytest.raises(ValueError):
+            CompressionConfig(encodings=("deflate",))
+        with pytest.raises(ValueError):
+            CompressionConfig(minimum_size=-1)
+
+    def test_compresses_large_responses(self: Self, test_client: TestClient) -> None:
+        identity = test_client.get("/v1/application", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in identity.headers
+        assert identity.headers["Vary"] == "Accept-Encoding"
+
+        response = test_client.get("/v1/application", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert int(response.headers["Content-Length"]) < len(identity.content)
+        assert response.content == identity.content
+
+    def test_small_responses_sent_uncompressed(self: Self, test_client: TestClient) -> None:
+        response = test_client.get("/v1/employee/1", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.headers["ETag"].startswith('"')
+
+    def test_compressed_employee_revalidates(self: Self, migrated_db: None) -> None:
+        client = create_app("test", compression=CompressionConfig(minimum_size=0)).test_client()
+        response = client.get("/v1/employee/1", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.json()["id"] == 1
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        not_modified = client.get(
+            "/v1/employee/1", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+        assert "Content-Encoding" not in not_modified.headers
+
+    def test_compression_disabled(self: Self, migrated_db: None) -> None:
+        client = create_app("test", compression=CompressionConfig(enabled=False)).test_client()
+        response = client.get("/v1/application", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert "Vary" not in response.headers
+
+    def test_variants_with_etag_compressed_once(self: Self) -> None:
+        body = json.dumps({"applications": list(range(500))}).encode()
+        variants: TTLCache[tuple[str, str, str], bytes] = TTLCache(maxsize=16, ttl=60)
+        headers = {"content-length": str(len(body)), "etag": '"v1"'}
+        middleware = CompressionMiddleware(
+            self.app([body], headers), CompressionConfig(), variants=variants
+        )
+
+        first = self.respond(middleware, "/v1/employee/1")
+        second = self.respond(middleware, "/v1/employee/1")
+
+        assert first[1]["body"] == second[1]["body"]
+        assert gzip.decompress(second[1]["body"]) == body
+        assert dict(second[0]["headers"])[b"etag"] == b'W/"v1"'
+        assert variants.stats()["hits"] == 1
+        assert variants.stats()["misses"] == 1
+
+    def test_streams_compressed_chunks(self: Self) -> None:
+        rows = [json.dumps({"id": i, "name": "x" * 40}).encode() + b"\n" for i in range(100)]
+        middleware = CompressionMiddleware(self.app(rows), CompressionConfig(minimum_size=512))
+
+        messages = self.respond(middleware)
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        # Each chunk decodes to whole rows on arrival, rather than waiting for the end.
+        decompressor = zlib.decompressobj(31)
+        received = b""
+        for message in messages[1:-1]:
+            assert message["more_body"]
+            received += decompressor.decompress(message["body"])
+            assert received.endswith(b"\n")
+        received += decompressor.decompress(messages[-1]["body"])
+        assert not messages[-1]["more_body"]
+        assert received == b"".join(rows)
+        assert len(messages) > 80
+
+    def test_short_streams_sent_uncompressed(self: Self) -> None:
+        middleware = CompressionMiddleware(self.app([b"[", b"]"]), CompressionConfig())
+        messages = self.respond(middleware)
+        assert b"content-encoding" not in dict(messages[0]["headers"])
+        assert b"".join(message["body"] for message in messages[1:]) == b"[]"
+
+    def test_export_streamed_compressed(
+        self: Self, migrated_db: None, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(handlers, "EXPORT_BATCH_SIZE", 1)
+        # The test database's export is a few hundred bytes.
+        client = create_app("test", compression=CompressionConfig(minimum_size=64)).test_client()
+        identity = client.get("/v1/application/export", headers={"Accept-Encoding": "identity"})
+        response = client.get("/v1/application/export", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert response.headers["Content-Type"] == "application/x-ndjson"
+        assert response.content == identity.content
+
+
+class TestSearchCountCache:
+    def test_ttl_cache_evicts_least_recently_used(self: Self) -> None:
+        cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+    def test_ttl_cache_expires_entries(self: Self) -> None:
+        now = [0.0]
+        cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        now[0] = 9.9
+        assert cache.get("a") == 1
+        now[0] = 10.0
+        assert cache.get("a") is None
+
+    def test_ttl_cache_drops_values_read_before_an_invalidation(self: Self) -> None:
+        cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+        generation = cache.generation
+        cache.invalidate("a")
+        cache.set("a", 1, generation=generation)
+        assert cache.get("a") is None
+
+        cache.set("a", 2, generation=cache.generation)
+        assert cache.get("a") == 2
+
+    def test_search_count_read_before_a_write_is_not_cached(
+        self: Self, memory_db_engine: Engine
+    ) -> None:
+        count_cache: TTLCache[str, int] = TTLCache(maxsize=16, ttl=60)
+        application_search = ApplicationSearch({"search": "star"}, count_cache)
+        with Session(memory_db_engine) as session:
+            rows = session.execute(application_search.page_statement()).all()
+        # A write commits, and invalidates the total, after the search read its snapshot.
+        count_cache.invalidate_where(lambda key: True)
+
+        assert application_search.page(rows).count == 2
+        assert count_cache.get("star") is None
+
+    def test_search_count_is_served_from_cache(
+        self: Self, test_client: TestClient, sql_statements: list[str]
+    ) -> None:
+        test_client.get("/v1/application?search=star")
+        sql_statements.clear()
+
+        response = test_client.get("/v1/application?search=STAR")
+        assert response.json()["count"] == 2
+        assert not any("count(" in statement for statement in sql_statements)
+
+        stats = test_client.get("/v1/status").json()["count_cache"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_post_application_invalidates_affected_counts(
+        self: Self, test_client: TestClient
+    ) -> None:
+        for search in ["", "Star", "Lennon", "2"]:
+            test_client.get(f"/v1/application?search={search}")
+
+        test_client.post(
+            "/v1/application",
+            json={
+                "leave_start_date": "2021-06-01",
+                "leave_end_date": "2021-06-08",
+                "employee_id": 2,
+            },
+        )
+
+        assert test_client.get("/v1/application").json()["count"] == 4
+        assert test_client.get("/v1/application?search=Star").json()["count"] == 3
+        assert test_client.get("/v1/application?search=2").json()["count"] == 2
+        assert test_client.get("/v1/application?search=Lennon").json()["count"] == 1
+        # Only the unaffected "Lennon" entry survived the insert.
+        assert test_client.get("/v1/status").json()["count_cache"]["hits"] == 1
+
+    def test_patch_employee_invalidates_name_counts(self: Self, test_client: TestClient) -> None:
+        assert test_client.get("/v1/application?search=Ringo").json()["count"] == 0
+
+        test_client.patch("/v1/employee/2", json={"first_name": "Ringo", "last_name": "Starr"})
+
+        assert test_client.get("/v1/application?search=Ringo").json()["count"] == 1
+
+    def test_short_search_counts_fold_only_ascii_case(self: Self, test_client: TestClient) -> None:
+        # Terms too short for the trigram index are matched by LIKE, which folds only ASCII.
+        assert test_client.get("/v1/application?search=É").json()["count"] == 0
+
+        test_client.patch("/v1/employee/2", json={"first_name": "Émile"})
+
+        upper = test_client.get("/v1/application?search=É").json()
+        assert upper["count"] == len(upper["applications"]) == 1
+        lower = test_client.get("/v1/application?search=é").json()
+        assert lower["count"] == len(lower["applications"]) == 0
+        assert test_client.get("/v1/application?search=émi").json()["count"] == 1
+        assert test_client.get("/v1/application?search=ÉMI").json()["count"] == 1
+
+
+class TestMetrics:
+    def test_metrics_per_operation_and_status(self: Self, test_client: TestClient) -> None:
+        test_client.get("/v1/employee/1")
+        test_client.get("/v1/employee/1")
+        test_client.get("/v1/employee/999")
+
+        response = test_client.get("/v1/metrics")
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+
+        samples = {
+            line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in response.text.splitlines()
+            if not line.startswith("#")
+        }
+        get_employee = 'operation_id="backend_engineer_interview.handlers.get_employee"'
+        assert samples[f'http_request_duration_seconds_count{{{get_employee},status="200"}}'] == 2
+        assert samples[f'http_request_duration_seconds_count{{{get_employee},status="404"}}'] == 1
+        assert samples[f'http_request_db_duration_seconds_sum{{{get_employee},status="404"}}'] > 0
+        assert samples[f"http_requests_in_flight{{{get_employee}}}"] == 0
+        assert (
+            samples[
+                'http_requests_in_flight{operation_id="backend_engineer_interview.handlers.metrics"}'
+            ]
+            == 1
+        )
+
+    def test_histogram_buckets_are_cumulative(self: Self) -> None:
+        metrics = RequestMetrics(buckets=(0.01, 0.1))
+        for total_time in [0.005, 0.05, 0.5]:
+            metrics.start("op")
+            metrics.finish("op", 200, total_time, 0.0)
+
+        lines = metrics.render().splitlines()
+        labels = 'operation_id="op",status="200"'
+        assert f'http_request_duration_seconds_bucket{{{labels},le="0.01"}} 1' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+        assert f"http_request_db_duration_seconds_count{{{labels}}} 3" in lines
+
+
+class TestStatementInstrumentation:
+    @pytest.fixture
+    def stats(self: Self) -> Iterator[RequestStats]:
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        yield stats
+        request_stats.reset(token)
+
+    def test_access_log_includes_statement_count(
+        self: Self, test_client: TestClient, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        with caplog.at_level("INFO", logger="backend_engineer_interview.app"):
+            test_client.get("/v1/application")
+
+        [access_log] = [r for r in caplog.records if r.name == "backend_engineer_interview.app"]
+        assert access_log.statement_count == 1
+        assert access_log.db_time_ms > 0
+
+    def test_slow_statements_logged_with_query_plan(
+        self: Self, migrated_db: None, stats: RequestStats, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        session = init_db("test", EngineConfig(slow_query_threshold_ms=0))
+        with caplog.at_level("WARNING", logger="backend_engineer_interview.metrics"):
+            session.execute(text("SELECT * FROM application WHERE employee_id = 1")).all()
+
+        [slow_log] = [r for r in caplog.records if "SELECT * FROM application" in r.getMessage()]
+        assert any("application" in step for step in slow_log.query_plan)
+        assert stats.statements == 1
+
+    def test_strict_mode_fails_repeated_statements(
+        self: Self, migrated_db: None, stats: RequestStats
+    ) -> None:
+        session = init_db("test", EngineConfig(max_statement_repeats=2))
+        for employee_id in [1, 2]:
+            session.get(Employee, employee_id)
+
+        with pytest.raises(RepeatedStatementError):
+            session.get(Employee, 3)
+
+
+class TestSerialization:
+    @staticmethod
+    def jsonified(response_json: object) -> bytes:
+        # How connexion's jsonifier encodes a handler's dict body.
+        return (json.dumps(response_json, indent=2, sort_keys=True) + "\n").encode()
+
+    def test_responses_match_jsonifier_encoding(self: Self, test_client: TestClient) -> None:
+        test_client.patch("/v1/employee/2", json={"first_name": "Ringö"})
+
+        responses = [
+            test_client.get("/v1/employee/2"),
+            test_client.get("/v1/application?search=Ring"),
+            test_client.get("/v1/application?search=nobody"),
+            test_client.post(
+                "/v1/application",
+                json={
+                    "leave_start_date": "2022-01-01",
+                    "leave_end_date": "2022-01-05",
+                    "employee_id": 2,
+                },
+            ),
+        ]
+
+        for response in responses:
+            assert response.status_code == 200
+            assert response.headers["Content-Type"] == "application/json"
+            assert response.content == self.jsonified(response.json())
+        assert b"\\u00f6" in responses[0].content
+
+
+class TestResponseValidation:
+    @pytest.fixture
+    def nonconforming_search(self: Self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(handlers, "search_response", lambda page: {"applications": "none"})
+
+    def test_full_validation_fails_nonconforming_response(
+        self: Self, migrated_db: None, nonconforming_search: None
+    ) -> None:
+        client = create_app("test").test_client()
+        assert client.get("/v1/application").status_code == 500
+
+    def test_sampled_validation_logs_nonconforming_response(
+        self: Self, migrated_db: None, nonconforming_search: None, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        client = create_app(
+            "test", response_validation=ResponseValidation("sampled", sample_every=2)
+        ).test_client()
+
+        with caplog.at_level("ERROR", logger="backend_engineer_interview.validators"):
+            responses = [client.get("/v1/application") for _ in range(4)]
+
+        assert [response.status_code for response in responses] == [200] * 4
+        violations = [
+            r for r in caplog.records if r.name == "backend_engineer_interview.validators"
+        ]
+        assert len(violations) == 2
+
+    def test_validation_off(
+        self: Self, migrated_db: None, nonconforming_search: None, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        client = create_app("test", response_validation=ResponseValidation("off")).test_client()
+
+        with caplog.at_level("ERROR", logger="backend_engineer_interview.validators"):
+            assert client.get("/v1/application").status_code == 200
+        assert not caplog.records
+
+    def test_validators_compiled_once_per_schema(self: Self) -> None:
+        schema = {"type": "object"}
+        assert compiled_validator(schema) is compiled_validator(schema)
+        assert compiled_validator(schema) is not compiled_validator({"type": "object"})
+
+    def test_invalid_policy(self: Self) -> None:
+        with pytest.raises(ValueError):
+            ResponseValidation("sometimes")  # type: ignore
+
+
+class TestAsyncApp:
+    def test_responses_match_sync_app(self: Self, migrated_db: None) -> None:
+        sync_client = create_app("test").test_client()
+        async_client = create_async_app("test").test_client()
+
+        for path in [
+            "/v1/employee/1",
+            "/v1/employee/999",
+            "/v1/application?search=John&limit=1",
+            "/v1/application?search=Lennon&include_count=false",
+            "/v1/application?cursor=not-a-cursor",
+            "/v1/application/overlapping?from=2021-01-15&to=2021-02-15&limit=1",
+            "/v1/employee/1/leave-summary",
+            "/v1/leave-usage/2021-02?limit=1",
+            "/v1/application?search=Star&limit=1&fields=id,employee.first_name",
+        ]:
+            sync_response = sync_client.get(path)
+            async_response = async_client.get(path)
+            assert async_response.status_code == sync_response.status_code
+            assert async_response.content == sync_response.content
+            assert async_response.headers.get("ETag") == sync_response.headers.get("ETag")
+
+    def test_operation_without_async_handler(self: Self, migrated_db: None) -> None:
+        response = create_async_app("test").test_client().get("/v1/application/export")
+        assert response.status_code == 501
+
+
+class TestEngineConfig:
+    def test_reads_proceed_while_write_transaction_open(
+        self: Self, test_client: TestClient
+    ) -> None:
+        # The first request connects, switching the database to WAL.
+        assert test_client.get("/v1/status").status_code == 200
+
+        writer = sqlite3.connect("test.db", isolation_level=None, timeout=0)
+        try:
+            assert writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            # EXCLUSIVE would lock readers out of a rollback-journal database.
+            writer.execute("BEGIN EXCLUSIVE")
+            writer.execute(
+                "INSERT INTO application (leave_start_date, leave_end_date, employee_id) "
+                "VALUES ('2021-06-01', '2021-06-08', 1)"
+            )
+
+            response = test_client.get("/v1/application")
+            assert response.status_code == 200
+            assert response.json()["count"] == 3
+            assert test_client.get("/v1/employee/1").status_code == 200
+        finally:
+            if writer.in_transaction:
+                writer.execute("ROLLBACK")
+            writer.close()
+
+    def test_engine_config_pragmas(self: Self, migrated_db: None) -> None:
+        session_factory = init_db(
+            "test", EngineConfig(synchronous="FULL", busy_timeout_ms=1234, pool_size=2)
+        )
+        session = session_factory()
+        try:
+            assert session.execute(text("PRAGMA synchronous")).scalar() == 2
+            assert session.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+            assert session.get_bind().pool.size() == 2  # type: ignore
+        finally:
+            session_factory.remove()
+
 
 def test_version() -> None:
     assert __version__ == "0.1.0"
+
+
+class TestDatabaseBinding:
+    def test_app_over_existing_engine(self: Self, memory_db_engine: Engine) -> None:
+        client = create_app(memory_db_engine).test_client()
+
+        assert client.patch("/v1/employee/1", json={"first_name": "Julian"}).status_code == 204
+        assert client.get("/v1/employee/1").json()["first_name"] == "Julian"
+        assert client.get("/v1/application?search=Julian").json()["count"] == 1
+
+    def test_app_over_connection_leaves_rollback_to_its_owner(
+        self: Self, memory_db_engine: Engine
+    ) -> None:
+        with memory_db_engine.connect() as connection:
+            transaction = connection.begin()
+            client = create_app(connection).test_client()
+            client.patch("/v1/employee/1", json={"first_name": "Julian"})
+            response = client.post(
+                "/v1/application",
+                json={
+                    "leave_start_date": "2030-01-01",
+                    "leave_end_date": "2030-01-08",
+                    "employee_id": 1,
+                },
+            )
+            assert response.status_code == 200
+            assert client.get("/v1/employee/1").json()["first_name"] == "Julian"
+            transaction.rollback()
+
+        client = create_app(memory_db_engine).test_client()
+        assert client.get("/v1/employee/1").json()["first_name"] == "John"
+        assert client.get("/v1/application").json()["count"] == 3
+
+    def test_async_app_over_existing_engine(self: Self, migrated_db: None) -> None:
+        client = create_async_app(create_async_sqlite_engine("test")).test_client()
+        assert client.get("/v1/employee/1").json()["first_name"] == "John"
+
+
+class TestSeed:
+    def test_seed_database(self: Self, migrated_db: None) -> None:
+        engine = init_db("test").get_bind()
+        seeded = seed.seed_database(engine, employees=50, applications=500, batch_size=64)  # type: ignore
+        assert len(seeded.employee_ids) == 50
+
+        connection = sqlite3.connect("test.db")
+        try:
+            assert connection.execute(
+                "SELECT count(*) FROM employee WHERE id BETWEEN ? AND ?",
+                (seeded.employee_ids.start, seeded.employee_ids[-1]),
+            ).fetchone() == (50,)
+            assert connection.execute(
+                "SELECT count(*), max(employee_id), sum(leave_end_date < leave_start_date) "
+                "FROM application WHERE employee_id >= ?",
+                (seeded.employee_ids.start,),
+            ).fetchone() == (500, seeded.employee_ids[-1], 0)
+            # The seeded applications are totalled, and no one else's totals are touched.
+            assert connection.execute(
+                "SELECT sum(days) > 500 FROM leave_usage WHERE employee_id >= ?",
+                (seeded.employee_ids.start,),
+            ).fetchone() == (1,)
+            # Their leave is indexed after the load, and the R*Tree's triggers are back.
+            assert connection.execute(
+                "SELECT (SELECT count(*) FROM application_period), "
+                "(SELECT count(*) FROM application), "
+                "(SELECT count(*) FROM sqlite_master "
+                "WHERE type = 'trigger' AND name GLOB 'application_period_*')"
+            ).fetchone() == (503, 503, 3)
+            (first_name,) = connection.execute(
+                "SELECT first_name FROM employee WHERE id = ?", (seeded.employee_ids.start,)
+            ).fetchone()
+        finally:
+            connection.close()
+        with engine.connect() as engine_connection:
+            assert not list(leave_usage.usage_differences(engine_connection))
+
+        # Generated employees are searchable and their applications serialize through the API.
+        response = create_app("test").test_client().get(f"/v1/application?search={first_name}")
+        assert response.status_code == 200
+        assert response.json()["count"] > 0
+
+    def test_rows_are_deterministic(self: Self) -> None:
+        def rows(seed_value: int) -> list[tuple]:
+            rng = random.Random(seed_value)
+            employees = list(seed.employee_rows(rng, range(1, 101), date(2024, 1, 1)))
+            return employees + list(seed.application_rows(rng, range(1, 101), 1000, 2020, 5))
+
+        assert rows(1) == rows(1)
+        assert rows(1) != rows(2)
+
+    def test_application_dates(self: Self) -> None:
+        previous_ends: dict[int, str] = {}
+        moved_past = 0
+        for start, end, employee_id in seed.application_rows(
+            random.Random(0), range(10, 110), 1000, 2020, 2
+        ):
+            assert "2020-01-01" <= start
+            moved_past += start > "2021-12-31"
+            assert 0 <= (date.fromisoformat(end) - date.fromisoformat(start)).days < 180
+            assert 10 <= employee_id < 110
+            # An employee's leave comes in order, never overlapping, with a day or more between.
+            if employee_id in previous_ends:
+                previous_end = date.fromisoformat(previous_ends[employee_id])
+                assert (date.fromisoformat(start) - previous_end).days >= 2
+            previous_ends[employee_id] = end
+        # Only leave moved later, behind earlier leave at the end of the years, starts after them.
+        assert moved_past < 10
+
+    def test_dense_leave_runs_past_the_years(self: Self) -> None:
+        rows = list(seed.application_rows(random.Random(0), range(1, 2), 200, 2020, 1))
+        assert len(rows) == 200
+        assert all(end < next_start for (_, end, _), (next_start, _, _) in zip(rows, rows[1:]))
+        assert rows[-1][0] > "2020-12-31"
+
+
+class TestQueryPlans:
+    @pytest.fixture
+    def query_plans(self: Self) -> Iterator[list[tuple[str, list[str]]]]:
+        """Collect each statement run while the test runs, with SQLite's plan for it."""
+        plans: list[tuple[str, list[str]]] = []
+
+        def explain(conn, cursor, statement, parameters, context, executemany) -> None:  # type: ignore
+            if not executemany:
+                plans.append((statement, query_plan(conn, statement, parameters) or []))
+
+        event.listen(Engine, "after_cursor_execute", explain)
+        yield plans
+        event.remove(Engine, "after_cursor_execute", explain)
+
+    @pytest.mark.parametrize(
+        "method,path,body,allowed_scans",
+        [
+            ("GET", "/v1/employee/1", None, set()),
+            ("PATCH", "/v1/employee/1", {"first_name": "Julian"}, set()),
+            ("PATCH", "/v1/employee", [{"id": 1, "first_name": "Julian"}], set()),
+            (
+                "POST",
+                "/v1/application",
+                {
+                    "leave_start_date": "2030-01-01",
+                    "leave_end_date": "2030-01-08",
+                    "employee_id": 1,
+                },
+                set(),
+            ),
+            (
+                "POST",
+                "/v1/application/batch",
+                [
+                    {
+                        "leave_start_date": "2030-01-01",
+                        "leave_end_date": "2030-01-08",
+                        "employee_id": 1,
+                    }
+                ],
+                # The items are checked for overlaps by scanning their own constant rows.
+                {"probe"},
+            ),
+            ("GET", "/v1/application?search=1", None, set()),
+            ("GET", "/v1/application?search=Lennon", None, set()),
+            ("GET", "/v1/application?search=Star&limit=1&include_count=false", None, set()),
+            ("GET", "/v1/application?search=Lennon&fields=id,leave_start_date", None, set()),
+            (
+                "GET",
+                "/v1/application?search=Star&limit=1&fields=id,employee.first_name",
+                None,
+                set(),
+            ),
+            ("GET", "/v1/application/export?search=Star", None, set()),
+            # Overlapping applications are found through the R*Tree, by id.
+            (
+                "GET",
+                "/v1/application/overlapping?from=2021-01-15&to=2021-03-15&limit=1",
+                None,
+                set(),
+            ),
+            # Leave usage is read by primary key, or by the month index.
+            ("GET", "/v1/employee/1/leave-summary", None, set()),
+            ("GET", "/v1/leave-usage/2021-02?limit=1", None, set()),
+            # One- and two-character terms can't use the trigram index; they scan employee names,
+            # but still reach applications through the index.
+            ("GET", "/v1/application?search=sT", None, {"employee"}),
+            # Listing every application reads the table in id order.
+            ("GET", "/v1/application", None, {"application"}),
+        ],
+    )
+    def test_handler_queries_use_indexes(
+        self: Self,
+        migrated_db: None,
+        query_plans: list[tuple[str, list[str]]],
+        method: str,
+        path: str,
+        body: Optional[object],
+        allowed_scans: set[str],
+    ) -> None:
+        client = create_app("test").test_client()
+        response = client.request(method, path, json=body)
+        assert response.status_code < 400
+        next_url = response.json().get("next") if path.startswith("/v1/application?") else None
+        if next_url:
+            # Keyset pages are planned differently from the first page.
+            client.get(next_url)
+
+        assert query_plans
+        for statement, plan in query_plans:
+            for step in plan:
+                scanned = re.match(r"SCAN (\w+)$", step)
+                assert not scanned or scanned.group(1) in allowed_scans, (step, statement)
+
+
+class TestSpecCache:
+    SPEC = "openapi: 3.0.0\ninfo:\n  title: Test\n  version: '1'\npaths: {}\n"
+
+    @pytest.fixture
+    def spec_path(self: Self, tmp_path: Path) -> Iterator[str]:
+        path = str(tmp_path / "openapi.yaml")
+        with open(path, "w") as f:
+            f.write(self.SPEC)
+        yield path
+        spec.clear_cache(path)
+
+    def test_parses_once_per_version_of_the_file(
+        self: Self, spec_path: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        parsed = spec.load_spec(spec_path)
+        assert parsed["info"]["title"] == "Test"
+        parsed["info"]["title"] = "Changed"
+
+        def fail(*args: object, **kwargs: object) -> None:
+            raise AssertionError("parsed again")
+
+        with monkeypatch.context() as patched:
+            patched.setattr(spec.yaml, "load", fail)
+            # Each caller gets its own copy, from memory and then, as in a new process, from disk.
+            assert spec.load_spec(spec_path)["info"]["title"] == "Test"
+            patched.setattr(spec, "_parsed", {})
+            assert spec.load_spec(spec_path)["info"]["title"] == "Test"
+
+        with open(spec_path, "w") as f:
+            f.write(self.SPEC.replace("Test", "Edited"))
+        assert spec.load_spec(spec_path)["info"]["title"] == "Edited"
+
+    def test_corrupt_cache_file_is_reparsed(self: Self, spec_path: str) -> None:
+        spec.load_spec(spec_path)
+        with open(spec_path, "rb") as f:
+            cached = spec.cache_path(spec_path, spec.spec_hash(f.read()))
+        with open(cached, "w") as f:
+            f.write('{"openapi": ')
+        spec._parsed.clear()
+
+        assert spec.load_spec(spec_path)["info"]["title"] == "Test"
+
+    def test_sync_app_does_not_import_async_stack(self: Self) -> None:
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, backend_engineer_interview.app as app; "
+                "assert 'sqlalchemy.ext.asyncio' not in sys.modules; "
+                "assert app.create_async_app",
+            ],
+            check=True,
+        )